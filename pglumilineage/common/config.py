@@ -120,6 +120,8 @@ class Settings:
         
         # 日志文件配置
         self.PG_LOG_FILE_PATTERN = kwargs.get("PG_LOG_FILE_PATTERN", "")
+        # 是否按SQL标记预先跳过日志文件和记录，仅适用于英文 lc_messages 的日志
+        self.PG_LOG_SQL_PREFILTER = kwargs.get("PG_LOG_SQL_PREFILTER", False)
         
         # 数据库连接字符串
         self.RAW_LOGS_DSN = kwargs.get("RAW_LOGS_DSN", None)
@@ -10,11 +10,17 @@
 """
 
 import asyncio
+import json
 import logging
 from typing import Dict, Any, List, Optional, Union
 
 import asyncpg
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json 模块
+    orjson = None
+
 from pglumilineage.common.config import get_settings_instance
 from pglumilineage.common.models import RawSQLLog, AnalyticalSQLPattern
 
@@ -24,11 +30,70 @@ db_pool = None
 # 获取日志记录器
 logger = logging.getLogger(__name__)
 
-async def init_db_pool() -> None:
+# jsonb 二进制格式的版本号前缀
+JSONB_BINARY_VERSION = b'\x01'
+
+
+def _encode_jsonb(value: Any) -> bytes:
+    """
+    将参数编码为 jsonb 二进制格式
+    
+    已序列化的 JSON 文本原样发送，dict/list 等结构直接序列化，调用方无需先 json.dumps
+    
+    Args:
+        value: JSON 文本或可序列化的 Python 对象
+        
+    Returns:
+        bytes: jsonb 二进制格式数据
+    """
+    if isinstance(value, str):
+        return JSONB_BINARY_VERSION + value.encode('utf-8')
+    if orjson is not None:
+        return JSONB_BINARY_VERSION + orjson.dumps(value)
+    return JSONB_BINARY_VERSION + json.dumps(value).encode('utf-8')
+
+
+def _decode_jsonb(data: bytes) -> str:
+    """
+    将 jsonb 二进制格式解码为 JSON 文本，与 asyncpg 默认行为一致
+    
+    Args:
+        data: jsonb 二进制格式数据
+        
+    Returns:
+        str: JSON 文本
+    """
+    return data[1:].decode('utf-8')
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """
+    连接池中每个新连接的初始化回调，注册 jsonb 二进制编解码器
+    
+    Args:
+        conn: 新建立的数据库连接
+    """
+    await conn.set_type_codec(
+        'jsonb',
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema='pg_catalog',
+        format='binary'
+    )
+
+
+async def init_db_pool(min_size: int = 5, max_size: int = 25, max_queries: int = 50000,
+                       max_inactive_connection_lifetime: float = 300.0) -> None:
     """
     初始化数据库连接池
     
-    使用配置中的DSN创建asyncpg连接池
+    使用配置中的DSN创建asyncpg连接池，各调度器可按自身负载调整连接池大小
+    
+    Args:
+        min_size: 连接池最小连接数
+        max_size: 连接池最大连接数
+        max_queries: 单个连接执行多少次查询后被替换
+        max_inactive_connection_lifetime: 空闲连接的最长保留时间（秒）
     """
     global db_pool
     
@@ -63,10 +128,13 @@ async def init_db_pool() -> None:
         
         db_pool = await asyncpg.create_pool(
             dsn=dsn,
-            min_size=5,
-            max_size=20,
+            min_size=min_size,
+            max_size=max_size,
+            max_queries=max_queries,
+            max_inactive_connection_lifetime=max_inactive_connection_lifetime,
             command_timeout=60,
-            timeout=10
+            timeout=10,
+            init=_init_connection
         )
         
         logger.info("数据库连接池初始化成功")
@@ -11,7 +11,7 @@
 
 from datetime import datetime
 from typing import Optional, List, Dict, Any # Dict and Any for JSONB
-from pydantic import BaseModel, Field, PositiveInt, NonNegativeInt, constr # constr for TEXT like fields
+from pydantic import BaseModel, Field, PositiveInt, NonNegativeInt, constr, field_validator # constr for TEXT like fields
 
 # Pydantic V2 uses model_config for configuration
 from pydantic_settings import SettingsConfigDict
@@ -97,7 +97,13 @@ class DataSourceConfig(BaseModel):
     port: int = Field(description="数据库端口")
     username: str = Field(description="数据库用户名")
     password: SecretStr = Field(description="数据库密码，使用 SecretStr 类型保护敏感信息")
-    database: str = Field(description="数据库名称")
+    database: str = Field(description="数据库名称，为空时使用 'default_db'")
     
     # Pydantic V2使用model_config进行配置
     model_config = SettingsConfigDict(from_attributes=True, populate_by_name=True)
+    
+    @field_validator('database', mode='before')
+    @classmethod
+    def _default_database(cls, v: Optional[str]) -> str:
+        """数据库名称为空时使用默认值，避免在每次元数据查询中重复判断"""
+        return v or 'default_db'
@@ -15,16 +15,35 @@ PostgreSQL 日志处理服务
 """
 
 import asyncio
+import contextlib
 import csv
 import os
 import glob
+import mmap
+import fnmatch
+import itertools
 import logging
 import time
-import functools
-from typing import List, Set, Dict, Optional, Tuple, Any, Union
-from datetime import datetime, timedelta
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set, Dict, Optional, Tuple, Any, Union, Iterator, AsyncIterator, Final
+from datetime import datetime, timedelta, timezone
 import re
 
+import asyncpg
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow 为可选依赖，未安装时使用标准库 csv 模块解析
+    pa = pc = pa_csv = None
+
+try:
+    import ciso8601
+except ImportError:  # ciso8601 为可选依赖，未安装时使用 datetime.fromisoformat
+    ciso8601 = None
+
 from pglumilineage.common import logging_config, config, db_utils, models
 
 # 设置日志
@@ -32,6 +51,109 @@ logger = logging.getLogger(__name__)
 
 # 批处理设置
 BATCH_SIZE = 1000
+INSERT_CONCURRENCY = 4  # 并发写入的批次数，每个批次占用一个连接池连接，需小于连接池 max_size
+PARSE_CONCURRENCY = 4  # 同时解析的日志文件数
+
+# 日志解析在线程池中执行，避免 CPU 和磁盘密集的解析阻塞事件循环
+_PARSE_EXECUTOR = ThreadPoolExecutor(max_workers=PARSE_CONCURRENCY, thread_name_prefix="log-parser")
+
+# 读取日志文件的缓冲区大小（字节），大缓冲区可减少大日志文件的 read 系统调用次数
+LOG_FILE_BUFFER_SIZE = 1 << 20
+
+# PostgreSQL CSV日志的列顺序
+# 参考: https://www.postgresql.org/docs/current/runtime-config-logging.html#RUNTIME-CONFIG-LOGGING-CSVLOG
+CSV_LOG_FIELDNAMES = [
+    'log_time', 'user_name', 'database_name', 'process_id', 'connection_from', 
+    'session_id', 'session_line_num', 'command_tag', 'session_start_time', 
+    'virtual_transaction_id', 'transaction_id', 'error_severity', 'sql_state_code', 
+    'message', 'detail', 'hint', 'internal_query', 'internal_query_pos', 
+    'context', 'query', 'query_pos', 'location', 'application_name', 'backend_type',
+    'leader_pid', 'query_id'
+]
+
+# 带标题行的CSV日志文件的开头
+CSV_LOG_HEADER_PREFIX = b'log_time,user_name,database_name'
+
+# 构建日志记录时实际用到的CSV列
+CSV_LOG_USED_COLUMNS = [
+    'log_time', 'user_name', 'database_name', 'connection_from', 'session_id',
+    'message', 'query', 'application_name', 'query_id'
+]
+
+# 可能包含SQL的日志行在原始文本中出现的标记，供可选的预筛选使用（见 _may_contain_sql）：
+# message 字段以 statement: 开头；execute/duration 日志；以及 query 字段可能非空的错误级别。
+# query 字段非空本身没有可查找的标记，lc_messages 本地化后 statement:/ERROR 等文本也会被翻译，
+# 因此预筛选默认关闭，只在英文日志且 log_min_error_statement 不低于 WARNING 时通过
+# 配置 PG_LOG_SQL_PREFILTER 开启
+SQL_ROW_MARKERS = ('statement:', 'execute ', 'duration:', ',ERROR,', ',FATAL,', ',PANIC,', ',WARNING,')
+_SQL_ROW_MARKER_BYTES = tuple(marker.encode() for marker in SQL_ROW_MARKERS)
+
+# 匹配SQL开头的 -- 单行注释和空白，一次扫描全部去除。
+# (?=(...))\1 等价于原子分组 (?>...)（Python 3.11 之前的 re 不支持），匹配过的内容不会被回溯
+_LEADING_COMMENT_RE = re.compile(r'\A(?:(?=(--[^\n]*|\s+))\1)+')
+
+# log_timezone 没有缩写时日志时间末尾的数字时区偏移，如 +08、-03:30、+0545
+_TZ_OFFSET_RE = re.compile(r'^([+-])(\d{2}):?(\d{2})?$')
+
+# 客户端IP地址和 message 中持续时间的匹配模式
+_IP_RE = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
+_DUR_RE = re.compile(r'duration:\s*([0-9.]+)\s*ms')
+
+# lumi_logs.captured_logs 中由日志处理器写入的列，顺序与 COPY 的记录布局一致
+_LOG_COLS = (
+    'log_time', 'source_database_name', 'username', 'database_name_logged',
+    'client_addr', 'application_name', 'session_id', 'query_id',
+    'duration_ms', 'raw_sql_text', 'log_source_identifier'
+)
+
+# COPY 失败时使用的逐行插入语句，参数顺序与 _LOG_COLS 一致
+INSERT_LOGS_QUERY = f"""
+INSERT INTO lumi_logs.captured_logs ({', '.join(_LOG_COLS)})
+VALUES ({', '.join(f'${i}' for i in range(1, len(_LOG_COLS) + 1))})
+"""
+
+# 批量更新多个数据源同步状态的语句，参数为按 source_id 对齐的数组
+UPDATE_SYNC_BATCH_SQL: Final[str] = """
+UPDATE lumi_config.source_sync_schedules s
+SET 
+    last_sync_attempt_at = NOW(),
+    last_sync_success_at = CASE WHEN u.inserted_count > 0 THEN NOW() ELSE s.last_sync_success_at END,
+    last_sync_status = CASE WHEN u.inserted_count > 0 THEN 'SUCCESS' ELSE 'NO_RECORDS' END,
+    last_sync_message = u.sync_message,
+    updated_at = NOW()
+FROM unnest($1::int[], $2::int[], $3::text[]) AS u(source_id, inserted_count, sync_message)
+WHERE s.source_id = u.source_id AND s.is_schedule_active = TRUE
+RETURNING s.source_id
+"""
+
+# 数据源数量超过该阈值时，改为 COPY 到临时表再关联更新，避免超大数组参数
+SYNC_STATUS_COPY_THRESHOLD = 500
+
+# 会话级临时暂存表，事务提交时自动清空，不同连接之间互不影响，也无需 TRUNCATE 加锁
+CREATE_SYNC_STAGING_SQL: Final[str] = """
+CREATE TEMP TABLE IF NOT EXISTS _sync_status_staging (
+    source_id INTEGER,
+    inserted_count INTEGER,
+    sync_message TEXT
+) ON COMMIT DELETE ROWS
+"""
+
+# 从暂存表关联更新同步状态的语句
+UPDATE_SYNC_FROM_STAGING_SQL: Final[str] = """
+UPDATE lumi_config.source_sync_schedules s
+SET 
+    last_sync_attempt_at = NOW(),
+    last_sync_success_at = CASE WHEN u.inserted_count > 0 THEN NOW() ELSE s.last_sync_success_at END,
+    last_sync_status = CASE WHEN u.inserted_count > 0 THEN 'SUCCESS' ELSE 'NO_RECORDS' END,
+    last_sync_message = u.sync_message,
+    updated_at = NOW()
+FROM _sync_status_staging u
+WHERE s.source_id = u.source_id AND s.is_schedule_active = TRUE
+RETURNING s.source_id
+"""
+
+# 解析出的日志行，本身就是 COPY 所需的元组，无需再经过 RawSQLLog 校验和拆包
+LogRecord = namedtuple('LogRecord', _LOG_COLS)
 
 # 缓存设置
 DATA_SOURCE_CACHE_TTL = 300  # 数据源缓存有效期（秒）
@@ -49,6 +171,60 @@ processed_files_cache: Dict[str, Any] = {
     "timestamp": {}
 }
 
+# 同步状态写入记录: source_id -> (处理的记录数, 插入的记录数, 最近一次写入的 monotonic 时间)
+# 无新记录时仅按心跳间隔写入，避免空闲数据源每个周期都执行一次 UPDATE
+SYNC_STATUS_HEARTBEAT = 300  # 秒
+_last_status: Dict[int, Tuple[int, int, float]] = {}
+
+# 日志目录扫描缓存: (目录, 文件名模式) -> (目录 mtime, 匹配的文件路径列表)
+_GLOB_CACHE: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+
+# 模块级连接池引用，首次使用时从 db_utils 获取，连接池关闭后需调用 reset_pool() 清除
+_POOL: Optional[asyncpg.Pool] = None
+
+
+async def _get_pool() -> asyncpg.Pool:
+    """
+    获取数据库连接池，首次调用后缓存在模块级变量中
+    
+    Returns:
+        asyncpg.Pool: 数据库连接池
+    """
+    global _POOL
+    if _POOL is None:
+        _POOL = await db_utils.get_db_pool()
+    return _POOL
+
+
+def reset_pool() -> None:
+    """
+    清除缓存的连接池引用，在连接池关闭后或测试清理时调用
+    """
+    global _POOL
+    _POOL = None
+
+
+@contextlib.asynccontextmanager
+async def _acquire(pool: Optional[asyncpg.Pool] = None,
+                   conn: Optional[asyncpg.Connection] = None) -> AsyncIterator[asyncpg.Connection]:
+    """
+    获取数据库连接：调用方已持有连接时直接复用，否则从连接池中借出一个
+    
+    Args:
+        pool: 数据库连接池，未指定时使用全局连接池
+        conn: 调用方已持有的数据库连接
+        
+    Yields:
+        asyncpg.Connection: 数据库连接
+    """
+    if conn is not None:
+        yield conn
+        return
+    if pool is None:
+        pool = _POOL or await _get_pool()
+    async with pool.acquire() as acquired:
+        yield acquired
+
 
 def validate_data_source(data_source: Dict[str, Any]) -> bool:
     """
@@ -149,22 +325,31 @@ def validate_data_source(data_source: Dict[str, Any]) -> bool:
     return True
 
 
-async def get_processed_files_from_db(source_name: str) -> Set[str]:
+async def get_processed_files_from_db(source_name: str, pool: Optional[asyncpg.Pool] = None,
+                                      conn: Optional[asyncpg.Connection] = None) -> Set[str]:
     """
     从数据库中获取已处理的文件记录
     
     Args:
         source_name: 数据源名称
+        pool: 数据库连接池，未指定时使用全局连接池
+        conn: 调用方已持有的数据库连接，指定时不再从连接池获取
         
     Returns:
         Set[str]: 已处理的文件路径集合
     """
+    # 检查缓存是否有效
+    now = datetime.now()
+    cached_at = processed_files_cache["timestamp"].get(source_name)
+    if (cached_at is not None and
+        (now - cached_at).total_seconds() < PROCESSED_FILES_CACHE_TTL and
+        source_name in processed_files_cache["data"]):
+        logger.debug(f"使用缓存的已处理文件记录: {source_name}")
+        return processed_files_cache["data"][source_name]
+    
     processed_files = set()
     
     try:
-        # 获取数据库连接池
-        pool = await db_utils.get_db_pool()
-        
         # 检查表是否存在
         check_table_query = """
         SELECT EXISTS (
@@ -173,7 +358,7 @@ async def get_processed_files_from_db(source_name: str) -> Set[str]:
         )
         """
         
-        async with pool.acquire() as conn:
+        async with _acquire(pool, conn) as conn:
             exists = await conn.fetchval(check_table_query)
             
             if exists:
@@ -187,6 +372,10 @@ async def get_processed_files_from_db(source_name: str) -> Set[str]:
                 processed_files = {row['file_path'] for row in rows}
                 
                 logger.debug(f"从数据库中获取到 {len(processed_files)} 个已处理的文件记录")
+            
+            # 更新缓存
+            processed_files_cache["data"][source_name] = processed_files
+            processed_files_cache["timestamp"][source_name] = now
     
     except Exception as e:
         logger.error(f"从数据库中获取已处理文件记录时出错: {str(e)}")
@@ -194,48 +383,66 @@ async def get_processed_files_from_db(source_name: str) -> Set[str]:
     return processed_files
 
 
-async def save_processed_file(source_name: str, file_path: str) -> None:
+async def _ensure_processed_files_table(pool: asyncpg.Pool) -> None:
     """
-    将已处理的文件记录保存到数据库
+    创建已处理文件记录表（如果不存在）
+    
+    在服务启动时调用一次，而不是每保存一个文件执行一次 DDL
+    
+    Args:
+        pool: 数据库连接池
+    """
+    create_table_query = """
+    CREATE TABLE IF NOT EXISTS lumi_logs.processed_log_files (
+        id SERIAL PRIMARY KEY,
+        source_name TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        processed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT uq_source_file UNIQUE (source_name, file_path)
+    )
+    """
+    
+    async with pool.acquire() as conn:
+        await conn.execute(create_table_query)
+
+
+async def save_processed_files_batch(source_name: str, file_paths: List[str],
+                                     pool: Optional[asyncpg.Pool] = None,
+                                     conn: Optional[asyncpg.Connection] = None) -> None:
+    """
+    将一个处理周期内已处理的文件记录批量保存到数据库
     
     Args:
         source_name: 数据源名称
-        file_path: 文件路径
+        file_paths: 文件路径列表
+        pool: 数据库连接池，未指定时使用全局连接池
+        conn: 调用方已持有的数据库连接，指定时不再从连接池获取
     """
+    if not file_paths:
+        return
+    
     try:
-        # 获取数据库连接池
-        pool = await db_utils.get_db_pool()
-        
-        # 检查是否存在已处理文件记录表，如果不存在则创建
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS lumi_logs.processed_log_files (
-            id SERIAL PRIMARY KEY,
-            source_name TEXT NOT NULL,
-            file_path TEXT NOT NULL,
-            processed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-            CONSTRAINT uq_source_file UNIQUE (source_name, file_path)
-        )
+        # 插入或更新已处理文件记录，ON CONFLICT 不能用于 COPY，因此使用 executemany
+        insert_query = """
+        INSERT INTO lumi_logs.processed_log_files (source_name, file_path)
+        VALUES ($1, $2)
+        ON CONFLICT (source_name, file_path) DO UPDATE
+        SET processed_at = CURRENT_TIMESTAMP
         """
         
-        async with pool.acquire() as conn:
-            await conn.execute(create_table_query)
-            
-            # 插入或更新已处理文件记录
-            insert_query = """
-            INSERT INTO lumi_logs.processed_log_files (source_name, file_path)
-            VALUES ($1, $2)
-            ON CONFLICT (source_name, file_path) DO UPDATE
-            SET processed_at = CURRENT_TIMESTAMP
-            """
-            
-            await conn.execute(insert_query, source_name, file_path)
+        async with _acquire(pool, conn) as conn:
+            async with conn.transaction():
+                await conn.executemany(insert_query, [(source_name, file_path) for file_path in file_paths])
+        
+        # 保持缓存与数据库一致
+        if source_name in processed_files_cache["data"]:
+            processed_files_cache["data"][source_name].update(file_paths)
         
-        logger.debug(f"已保存已处理文件记录: {source_name} - {file_path}")
+        logger.debug(f"已保存 {len(file_paths)} 个已处理文件记录: {source_name}")
     except Exception as e:
         logger.error(f"保存已处理文件记录时出错: {str(e)}")
 
 
-@functools.lru_cache(maxsize=32)
 async def get_data_sources() -> List[Dict[str, Any]]:
     """
     从配置表中获取数据源信息
@@ -258,7 +465,7 @@ async def get_data_sources() -> List[Dict[str, Any]]:
     
     try:
         # 获取数据库连接池
-        pool = await db_utils.get_db_pool()
+        pool = _POOL or await _get_pool()
         
         async with pool.acquire() as conn:
             # 首先检查表是否存在
@@ -340,8 +547,8 @@ async def get_data_sources() -> List[Dict[str, Any]]:
             data_source_cache["data"] = {}
             
             for row in rows:
-                # 将行转换为字典，并过滤掉None值
-                data_source = {k: v for k, v in dict(row).items() if v is not None}
+                # 将行转换为字典，并过滤掉None值（直接遍历 Record，不再先复制为字典）
+                data_source = {k: v for k, v in row.items() if v is not None}
                 
                 # 处理特殊字段
                 # 如果有密码字段，确保它们是字符串
@@ -385,13 +592,62 @@ async def get_data_sources() -> List[Dict[str, Any]]:
         return []
 
 
-async def find_new_log_files(source_name: str, processed_log_files_tracker: Set[str] = None) -> List[str]:
+def list_log_files(log_files_pattern: str) -> List[str]:
+    """
+    列出与日志路径模式匹配的文件
+
+    只对目录执行一次 stat，目录 mtime 未变化时直接复用上次的扫描结果；
+    否则使用 os.scandir 单次遍历目录并用 fnmatch 匹配文件名。
+    目录部分本身包含通配符时退回到 glob.glob。
+
+    Args:
+        log_files_pattern: 日志路径模式，可以是目录或 glob 模式
+
+    Returns:
+        List[str]: 匹配的日志文件路径列表
+    """
+    if os.path.isdir(log_files_pattern):
+        # 如果是目录，则查找目录下的所有CSV文件
+        dir_path, name_pattern = log_files_pattern, "*.csv"
+        logger.info(f"检测到目录路径，自动查找目录下的CSV文件: {os.path.join(dir_path, name_pattern)}")
+    else:
+        dir_path, name_pattern = os.path.split(log_files_pattern)
+
+    if glob.has_magic(dir_path):
+        return glob.glob(log_files_pattern)
+
+    try:
+        dir_mtime = os.stat(dir_path or ".").st_mtime
+    except OSError:
+        return []
+
+    cache_key = (dir_path, name_pattern)
+    cached = _GLOB_CACHE.get(cache_key)
+    if cached is not None and cached[0] == dir_mtime:
+        return list(cached[1])
+
+    log_files = []
+    with os.scandir(dir_path or ".") as entries:
+        for entry in entries:
+            if fnmatch.fnmatchcase(entry.name, name_pattern) and entry.is_file():
+                log_files.append(os.path.join(dir_path, entry.name))
+    log_files.sort()
+
+    _GLOB_CACHE[cache_key] = (dir_mtime, log_files)
+    return list(log_files)
+
+
+async def find_new_log_files(source_name: str, processed_log_files_tracker: Set[str] = None,
+                             pool: Optional[asyncpg.Pool] = None,
+                             conn: Optional[asyncpg.Connection] = None) -> List[str]:
     """
     查找需要处理的新日志文件
     
     Args:
         source_name: 数据源名称
         processed_log_files_tracker: 内存中跟踪的已处理的日志文件集合
+        pool: 数据库连接池，未指定时使用全局连接池
+        conn: 调用方已持有的数据库连接，指定时不再从连接池获取
         
     Returns:
         List[str]: 新日志文件路径列表
@@ -416,12 +672,9 @@ async def find_new_log_files(source_name: str, processed_log_files_tracker: Set[
         
         # 如果缓存中没有，则从数据库中获取
         if not log_files_pattern:
-            # 获取数据库连接池
-            pool = await get_db_pool()
-            
-            async with pool.acquire() as conn:
+            async with _acquire(pool, conn) as source_conn:
                 # 查询数据源配置
-                data_source = await conn.fetchrow(
+                data_source = await source_conn.fetchrow(
                     """SELECT * FROM lumi_config.data_sources WHERE source_name = $1 AND is_active = true""",
                     source_name
                 )
@@ -452,179 +705,473 @@ async def find_new_log_files(source_name: str, processed_log_files_tracker: Set[
     logger.info(f"查找本地日志文件: {log_files_pattern}")
     
     # 获取所有日志文件
-    all_log_files = []
+    log_files = list_log_files(log_files_pattern)
+    logger.info(f"找到 {len(log_files)} 个本地日志文件")
     
-    # 检查log_files_pattern是否是目录
-    if os.path.isdir(log_files_pattern):
-        # 如果是目录，则查找目录下的所有CSV文件
-        csv_pattern = os.path.join(log_files_pattern, "*.csv")
-        log_files = glob.glob(csv_pattern)
-        logger.info(f"检测到目录路径，自动查找目录下的CSV文件: {csv_pattern}")
+    # 从数据库中获取已处理的文件记录
+    db_processed_files = await get_processed_files_from_db(source_name, pool, conn)
+    
+    # 过滤内存中和数据库中记录的已处理文件，无需先合并两个集合
+    new_log_files = [
+        f for f in log_files
+        if f not in processed_log_files_tracker and f not in db_processed_files
+    ]
+    logger.info(f"找到 {len(new_log_files)} 个新日志文件需要处理（共 {len(log_files)} 个文件，{len(log_files) - len(new_log_files)} 个已处理）")
+    
+    return new_log_files
+
+
+def _extract_sql_text(row: Dict[str, Any]) -> Optional[str]:
+    """
+    从日志行中提取SQL语句 - 可能在query字段或message字段(以statement:开头)
+    
+    Args:
+        row: 按 PostgreSQL CSV 日志列名索引的日志行
+        
+    Returns:
+        Optional[str]: SQL语句，没有SQL时返回 None
+    """
+    query = row.get('query')
+    if query and query.strip():
+        return query.strip()
+    message = row.get('message') or ''
+    if message.startswith('statement:'):
+        return message[len('statement:'):].strip()
+    return None
+
+
+def _parse_log_time(log_time_str: str) -> datetime:
+    """
+    解析 PostgreSQL CSV 日志中的时间戳，如"2023-01-01 12:34:56.789 UTC"
+    
+    末尾的时区缩写为 UTC/GMT 时返回带 UTC 时区的时间，为 +08、-03:30 等数字偏移时
+    返回带对应固定偏移时区的时间；其他缩写（如 CST）无法可靠映射，去掉后保持为
+    不带时区的本地时间。安装了 ciso8601 时使用其 C 实现解析。
+    
+    Args:
+        log_time_str: 日志时间字符串
+        
+    Returns:
+        datetime: 解析后的时间
+        
+    Raises:
+        ValueError: 时间格式无效
+    """
+    timestamp, _, tz_name = log_time_str.rpartition(' ')
+    offset_match = _TZ_OFFSET_RE.match(tz_name) if timestamp else None
+    if not timestamp or not (tz_name.isalpha() or offset_match):
+        timestamp, tz_name = log_time_str, ''
+    
+    if ciso8601 is not None:
+        log_time = ciso8601.parse_datetime(timestamp)
     else:
-        # 如果不是目录，则使用原有的glob模式
-        log_files = glob.glob(log_files_pattern)
+        log_time = datetime.fromisoformat(timestamp)
     
-    all_log_files.extend(log_files)
-    logger.info(f"找到 {len(log_files)} 个本地日志文件")
+    if log_time.tzinfo is None:
+        if tz_name in ('UTC', 'GMT'):
+            log_time = log_time.replace(tzinfo=timezone.utc)
+        elif offset_match:
+            sign, hours, minutes = offset_match.groups()
+            offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+            log_time = log_time.replace(tzinfo=timezone(-offset if sign == '-' else offset))
+    return log_time
+
+
+def _build_log_record(row: Dict[str, Any], sql_text: str, source_name: str,
+                      log_source_identifier: str, fallback_log_time: datetime) -> LogRecord:
+    """
+    将一行包含SQL的日志转换为 COPY 所需的记录元组
     
-    # 从数据库中获取已处理的文件记录
-    db_processed_files = await get_processed_files_from_db(source_name)
+    Args:
+        row: 按 PostgreSQL CSV 日志列名索引的日志行
+        sql_text: 已提取的SQL语句
+        source_name: 源数据库名称
+        log_source_identifier: 日志来源标识（日志文件名）
+        fallback_log_time: 日志时间缺失或无法解析时使用的时间
+        
+    Returns:
+        LogRecord: 日志记录
+    """
+    # 提取客户端地址 (从connection_from字段，格式可能是host:port)
+    client_addr = row.get('connection_from') or ''
     
-    # 合并内存中的记录和数据库中的记录
-    all_processed_files = processed_log_files_tracker.union(db_processed_files)
+    # 处理客户端地址，确保它是有效的IP地址
+    # 如果是带引号的格式，如"127.0.0.1:5432"，则去掉引号
+    if client_addr.startswith('"') and client_addr.endswith('"'):
+        client_addr = client_addr[1:-1]
+        
+    # 如果包含端口号，只保留IP地址部分
+    client_addr = client_addr.partition(':')[0]
+        
+    # 如果不是有效的IP地址，则使用默认值
+    if not _IP_RE.match(client_addr):
+        client_addr = '127.0.0.1'  # 使用本地回环地址作为默认值
     
-    # 过滤已处理的文件
-    new_log_files = [f for f in all_log_files if f not in all_processed_files]
-    logger.info(f"找到 {len(new_log_files)} 个新日志文件需要处理（共 {len(all_log_files)} 个文件，{len(all_processed_files)} 个已处理）")
+    # 提取持续时间 (可能在message字段中，格式如"duration: X.XXX ms")
+    duration_ms = 0
+    message = row.get('message') or ''
+    duration_match = _DUR_RE.search(message)
+    if duration_match:
+        try:
+            duration_ms = int(float(duration_match.group(1)) * 1000)
+        except (ValueError, IndexError):
+            logger.warning(f"无法解析持续时间: {message}")
     
-    return new_log_files
+    # 解析日志时间 (格式如"2023-01-01 12:34:56.789 UTC")
+    log_time = fallback_log_time
+    if row.get('log_time'):
+        try:
+            log_time = _parse_log_time(row.get('log_time'))
+        except ValueError as e:
+            logger.warning(f"无法解析日志时间: {row.get('log_time')}, 错误: {str(e)}")
+    
+    # 提取查询ID (非数字或为空时记为 None)
+    try:
+        query_id = int(row.get('query_id'))
+    except (TypeError, ValueError):
+        query_id = None
+    
+    # 直接构建 COPY 所需的记录元组
+    return LogRecord(
+        log_time=log_time,
+        source_database_name=source_name,
+        username=row.get('user_name') or '',
+        database_name_logged=row.get('database_name') or '',
+        client_addr=client_addr,
+        application_name=row.get('application_name') or '',
+        session_id=row.get('session_id') or '',
+        query_id=query_id,
+        duration_ms=duration_ms,
+        raw_sql_text=sql_text,
+        log_source_identifier=log_source_identifier
+    )
 
 
-async def parse_log_file(source_name: str, log_file_path: str, target_db_name: Optional[str] = None) -> List[models.RawSQLLog]:
+def _may_contain_sql(text: Union[str, bytes, mmap.mmap]) -> bool:
     """
-    解析日志文件，提取SQL日志条目
+    判断一段原始日志文本（单条记录或整个文件）中是否可能有 _extract_sql_text 接受的行
+    
+    整个文件的跳过判断和逐条记录的预筛选都使用这一判断，二者的结果保持一致。
+    
+    Args:
+        text: 日志记录文本，或日志文件的字节内容 / mmap
+        
+    Returns:
+        bool: 是否包含任一 SQL_ROW_MARKERS 标记
+    """
+    markers = SQL_ROW_MARKERS if isinstance(text, str) else _SQL_ROW_MARKER_BYTES
+    return any(text.find(marker) != -1 for marker in markers)
+
+
+def _sql_prefilter_enabled() -> bool:
+    """
+    从全局配置中读取是否开启基于 SQL_ROW_MARKERS 的预筛选
+    
+    Returns:
+        bool: 配置了 PG_LOG_SQL_PREFILTER 为真时返回 True，默认关闭
+    """
+    from pglumilineage.common.config import get_settings_instance
+    settings = get_settings_instance()
+    return bool(getattr(settings, "PG_LOG_SQL_PREFILTER", False))
+
+
+def _scan_log_file(log_file_path: str, prefilter: bool = False) -> Tuple[bool, bool]:
+    """
+    在CSV解析之前扫描原始字节，判断日志文件是否可能包含SQL行以及是否有标题行
+    
+    开启预筛选时通过 mmap 映射文件并用 _may_contain_sql 查找标记，
+    不包含任何标记的文件（如只有连接、检查点日志的轮转文件）无需逐行解析。
+    标题行直接检查映射的前几个字节，无需额外读取和回退文件指针。
+    
+    Args:
+        log_file_path: 日志文件路径
+        prefilter: 是否按 SQL_ROW_MARKERS 判断文件是否可能包含SQL行，关闭时非空文件都需要解析
+        
+    Returns:
+        Tuple[bool, bool]: (文件是否可能包含SQL行, 文件是否有标题行)
+    """
+    with open(log_file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False, False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            has_header = mm[:len(CSV_LOG_HEADER_PREFIX)] == CSV_LOG_HEADER_PREFIX
+            may_contain_sql = _may_contain_sql(mm) if prefilter else True
+    return may_contain_sql, has_header
+
+
+def _advise_sequential(fd: int) -> None:
+    """
+    提示内核按顺序读取文件，加大预读窗口（仅在支持 posix_fadvise 的平台上生效）
+    
+    Args:
+        fd: 文件描述符
+    """
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def _iter_candidate_records(csvfile) -> Iterator[str]:
+    """
+    按CSV记录（而不是物理行）读取日志文本，只产出可能包含SQL的记录
+    
+    带引号的字段中可能有换行，引号数为奇数时继续拼接下一行，直到记录完整。
+    记录完整后先用 _may_contain_sql 对原始文本做子串判断（与整个文件的跳过判断相同），
+    不包含 SQL_ROW_MARKERS 的记录（连接、认证、autovacuum 等日志）不再进行CSV字段解析。
+    
+    Args:
+        csvfile: 以文本模式打开的日志文件
+        
+    Yields:
+        str: 可能包含SQL的完整CSV记录文本
+    """
+    skipped_count = 0
+    record_lines = []
+    quote_count = 0
+    
+    for line in csvfile:
+        record_lines.append(line)
+        quote_count += line.count('"')
+        if quote_count % 2:
+            continue
+        
+        record = record_lines[0] if len(record_lines) == 1 else ''.join(record_lines)
+        record_lines = []
+        quote_count = 0
+        
+        if _may_contain_sql(record):
+            yield record
+        else:
+            skipped_count += 1
+    
+    if record_lines:
+        yield ''.join(record_lines)
+    
+    logger.debug(f"CSV预筛选跳过了 {skipped_count} 条不含SQL的日志记录")
+
+
+def _iter_rows_csv(log_file_path: str, has_header: bool, prefilter: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    使用标准库 csv 模块读取日志文件
     
     Args:
-        source_name: 数据源名称
+        log_file_path: 日志文件路径
+        has_header: 文件是否有标题行
+        prefilter: 是否在CSV字段解析前跳过不包含 SQL_ROW_MARKERS 的记录
+        
+    Yields:
+        Dict[str, Any]: 按列名索引的日志行
+    """
+    # PostgreSQL CSV 日志按 UTF-8 编码读取；个别非法字节替换为 U+FFFD，
+    # 避免整个文件因一处解码错误而解析失败
+    with open(log_file_path, 'r', newline='', buffering=LOG_FILE_BUFFER_SIZE,
+              encoding='utf-8', errors='replace') as csvfile:
+        _advise_sequential(csvfile.fileno())
+        
+        # 如果有标题行，跳过第一行
+        if has_header:
+            csvfile.readline()
+        
+        # PostgreSQL CSV日志通常没有标题行，需要手动指定字段名
+        records = _iter_candidate_records(csvfile) if prefilter else csvfile
+        for fields in csv.reader(records):
+            yield dict(zip(CSV_LOG_FIELDNAMES, fields))
+
+
+def _detect_csv_column_names(log_file_path: str, has_header: bool) -> List[str]:
+    """
+    根据第一条日志记录的列数确定列名
+    
+    不同 PostgreSQL 版本的 CSV 日志列数不同，多出的列以 extra_N 命名，
+    缺少的列（旧版本）直接省略。
+    
+    Args:
+        log_file_path: 日志文件路径
+        has_header: 文件是否有标题行
+        
+    Returns:
+        List[str]: 列名列表
+    """
+    with open(log_file_path, 'r', newline='', encoding='utf-8', errors='replace') as csvfile:
+        csv_reader = csv.reader(csvfile)
+        if has_header:
+            next(csv_reader, None)
+        first_row = next(csv_reader, None) or CSV_LOG_FIELDNAMES
+    
+    column_count = len(first_row)
+    column_names = CSV_LOG_FIELDNAMES[:column_count]
+    column_names += [f"extra_{i}" for i in range(len(column_names), column_count)]
+    return column_names
+
+
+def _iter_rows_arrow(log_file_path: str, has_header: bool,
+                     target_db_name: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    使用 pyarrow 的 C++ CSV 解析器读取日志文件
+    
+    只解析 CSV_LOG_USED_COLUMNS 中的列，并按块流式读取以限制内存占用。
+    每个块先用 Arrow 计算函数筛选出包含SQL的行（以及目标数据库的行），
+    只把筛选后的少量行转换为 Python 字典。
+    
+    Args:
+        log_file_path: 日志文件路径
+        has_header: 文件是否有标题行
+        target_db_name: 目标数据库名称，如果指定则只保留该数据库的日志
+        
+    Yields:
+        List[Dict[str, Any]]: 一个 Arrow 块中筛选出的日志行，按列名索引
+    """
+    column_names = _detect_csv_column_names(log_file_path, has_header)
+    used_columns = [name for name in CSV_LOG_USED_COLUMNS if name in column_names]
+    reader = pa_csv.open_csv(
+        log_file_path,
+        read_options=pa_csv.ReadOptions(
+            column_names=column_names,
+            skip_rows=1 if has_header else 0,
+            block_size=LOG_FILE_BUFFER_SIZE
+        ),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in used_columns},
+            include_columns=used_columns,
+            strings_can_be_null=False
+        )
+    )
+    
+    for batch in reader:
+        has_query = pc.greater(pc.utf8_length(pc.utf8_trim_whitespace(batch['query'])), 0)
+        is_statement = pc.starts_with(batch['message'], 'statement:')
+        mask = pc.or_(has_query, is_statement)
+        if target_db_name:
+            mask = pc.and_(mask, pc.equal(batch['database_name'], target_db_name))
+        
+        yield batch.filter(mask).to_pylist()
+
+
+def _iter_log_records(source_name: str, log_file_path: str,
+                      target_db_name: Optional[str] = None, prefilter: bool = False) -> Iterator[LogRecord]:
+    """
+    逐条解析日志文件中的SQL日志条目
+    
+    安装了 pyarrow 时使用列式解析并在 Arrow 中完成行筛选，
+    否则（或 pyarrow 解析失败时）回退到标准库 csv 模块逐行读取。
+    
+    Args:
+        source_name: 源数据库名称
         log_file_path: 日志文件路径
         target_db_name: 目标数据库名称，如果指定则只处理该数据库的日志
+        prefilter: 是否跳过不包含 SQL_ROW_MARKERS 的文件和记录
         
+    Yields:
+        LogRecord: 解析后的SQL日志条目
+    """
+    # 日志时间缺失或无法解析时使用的回退时间，每个文件只计算一次。
+    # captured_logs.log_time 是 NOT NULL 的分区键，COPY 写入 NULL 不会触发列默认值，
+    # 因此这里使用带时区的解析开始时间，而不是逐行调用 datetime.now()
+    fallback_log_time = datetime.now(timezone.utc)
+    log_source_identifier = os.path.basename(log_file_path)
+    
+    may_contain_sql, has_header = _scan_log_file(log_file_path, prefilter)
+    if not may_contain_sql:
+        logger.debug(f"日志文件 {log_file_path} 中没有SQL行标记，跳过解析")
+        return
+    
+    rows = None
+    if pa_csv is not None:
+        try:
+            # 按 Arrow 块流式读取，内存中只保留一个块的筛选结果。
+            # 只有打开文件或读取第一个块失败时才回退到 csv 模块，之后的错误直接向上抛出，
+            # 避免已产出的行被 csv 模块重复解析
+            arrow_batches = _iter_rows_arrow(log_file_path, has_header, target_db_name)
+            first_batch = next(arrow_batches, [])
+            rows = itertools.chain(first_batch, itertools.chain.from_iterable(arrow_batches))
+        except Exception as e:
+            logger.warning(f"pyarrow 解析日志文件 {log_file_path} 失败，回退到 csv 模块: {str(e)}")
+    if rows is None:
+        rows = _iter_rows_csv(log_file_path, has_header, prefilter)
+    
+    for row in rows:
+        sql_text = _extract_sql_text(row)
+        
+        # 只处理包含SQL语句的行，去掉开头的注释，纯注释行直接跳过
+        if not sql_text:
+            continue
+        if _LEADING_COMMENT_RE.match(sql_text):
+            sql_text = _LEADING_COMMENT_RE.sub('', sql_text, count=1)
+            if not sql_text:
+                continue
+        
+        # 如果指定了目标数据库名称，则只处理该数据库的日志
+        if target_db_name and row.get('database_name', '') != target_db_name:
+            continue  # 跳过非目标数据库的日志
+        
+        try:
+            yield _build_log_record(row, sql_text, source_name, log_source_identifier, fallback_log_time)
+        except Exception as e:
+            logger.error(f"解析日志行时出错: {str(e)}, 行数据: {row}")
+            continue
+
+
+def _parse_log_file_sync(source_name: str, log_file_path: str,
+                         target_db_name: Optional[str] = None, prefilter: bool = False) -> List[LogRecord]:
+    """
+    同步解析日志文件，提取全部SQL日志条目
+    
+    Args:
+        source_name: 源数据库名称
+        log_file_path: 日志文件路径
+        target_db_name: 目标数据库名称，如果指定则只处理该数据库的日志
+        prefilter: 是否开启基于 SQL_ROW_MARKERS 的预筛选
+        
+    Returns:
+        List[LogRecord]: 解析后的SQL日志条目列表
+    """
+    return list(_iter_log_records(source_name, log_file_path, target_db_name, prefilter))
+
+
+def _get_source_database_name() -> str:
+    """
+    从全局配置中获取源数据库名称
+    
     Returns:
-        List[models.RawSQLLog]: 解析后的SQL日志条目列表
+        str: 源数据库名称，未配置时为空字符串
     """
     # 获取全局配置实例
     from pglumilineage.common.config import get_settings_instance
     settings = get_settings_instance()
     
-    # 获取源数据库名称
-    source_name = ""
     if hasattr(settings, "log_processor") and hasattr(settings.log_processor, "source_database_name"):
-        source_name = settings.log_processor.source_database_name
+        return settings.log_processor.source_database_name
     elif hasattr(settings, "PRODUCTION_DB") and hasattr(settings.PRODUCTION_DB, "DB_NAME"):
-        source_name = settings.PRODUCTION_DB.DB_NAME
-    logger.info(f"开始解析日志文件: {log_file_path}")
-    log_entries = []
+        return settings.PRODUCTION_DB.DB_NAME
+    return ""
+
+
+async def parse_log_file(source_name: str, log_file_path: str, target_db_name: Optional[str] = None) -> List[LogRecord]:
+    """
+    解析日志文件，提取SQL日志条目
     
-    # 定义PostgreSQL CSV日志的列顺序
-    # 参考: https://www.postgresql.org/docs/current/runtime-config-logging.html#RUNTIME-CONFIG-LOGGING-CSVLOG
-    # CSV columns expected: 
-    # log_time, user_name, database_name, process_id, connection_from, session_id, session_line_num, 
-    # command_tag, session_start_time, virtual_transaction_id, transaction_id, error_severity, 
-    # sql_state_code, message, detail, hint, internal_query, internal_query_pos, context, query, 
-    # query_pos, location, application_name, backend_type, leader_pid, query_id
-    fieldnames = [
-        'log_time', 'user_name', 'database_name', 'process_id', 'connection_from', 
-        'session_id', 'session_line_num', 'command_tag', 'session_start_time', 
-        'virtual_transaction_id', 'transaction_id', 'error_severity', 'sql_state_code', 
-        'message', 'detail', 'hint', 'internal_query', 'internal_query_pos', 
-        'context', 'query', 'query_pos', 'location', 'application_name', 'backend_type',
-        'leader_pid', 'query_id'
-    ]
+    Args:
+        source_name: 数据源名称
+        log_file_path: 日志文件路径
+        target_db_name: 目标数据库名称，如果指定则只处理该数据库的日志
+        
+    Returns:
+        List[LogRecord]: 解析后的SQL日志条目列表，按 _LOG_COLS 顺序排列的元组
+    """
+    # 获取源数据库名称
+    source_name = _get_source_database_name()
+    logger.info(f"开始解析日志文件: {log_file_path}")
     
+    log_entries = []
     try:
-        with open(log_file_path, 'r', newline='') as csvfile:
-            # 检查文件是否有标题行
-            first_line = csvfile.readline().strip()
-            has_header = first_line.startswith('log_time,user_name,database_name')
-            
-            # 重置文件指针到开头
-            csvfile.seek(0)
-            
-            # PostgreSQL CSV日志通常没有标题行，需要手动指定字段名
-            csv_reader = csv.DictReader(csvfile, fieldnames=fieldnames)
-            
-            # 如果有标题行，跳过第一行
-            if has_header:
-                next(csv_reader)
-            
-            for row in csv_reader:
-                # 提取SQL语句 - 可能在query字段或message字段(以statement:开头)
-                sql_text = None
-                
-                if row.get('query') and row.get('query').strip():
-                    sql_text = row.get('query').strip()
-                elif row.get('message', '').startswith('statement:'):
-                    sql_text = row.get('message')[len('statement:'):].strip()
-                
-                # 只处理包含SQL语句的行
-                if sql_text and not sql_text.startswith('--'):
-                    # 如果指定了目标数据库名称，则只处理该数据库的日志
-                    if target_db_name and row.get('database_name', '') != target_db_name:
-                        continue  # 跳过非目标数据库的日志
-                    try:
-                        # 提取客户端地址 (从connection_from字段，格式可能是host:port)
-                        client_addr = row.get('connection_from', '')
-                        
-                        # 处理客户端地址，确保它是有效的IP地址
-                        # 如果是带引号的格式，如"127.0.0.1:5432"，则去掉引号
-                        if client_addr.startswith('"') and client_addr.endswith('"'):
-                            client_addr = client_addr[1:-1]
-                            
-                        # 如果包含端口号，只保留IP地址部分
-                        if ':' in client_addr:
-                            client_addr = client_addr.split(':')[0]  # 只保留IP地址部分
-                            
-                        # 如果不是有效的IP地址，则使用默认值
-                        import re
-                        ip_pattern = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
-                        if not ip_pattern.match(client_addr):
-                            client_addr = '127.0.0.1'  # 使用本地回环地址作为默认值
-                        
-                        # 提取持续时间 (可能在message字段中，格式如"duration: X.XXX ms")
-                        duration_ms = 0
-                        message = row.get('message', '')
-                        duration_match = re.search(r'duration:\s*([0-9.]+)\s*ms', message)
-                        if duration_match:
-                            try:
-                                duration_ms = int(float(duration_match.group(1)) * 1000)
-                            except (ValueError, IndexError):
-                                logger.warning(f"无法解析持续时间: {message}")
-                        
-                        # 解析日志时间 (格式如"2023-01-01 12:34:56.789 UTC")
-                        log_time = datetime.now()
-                        if row.get('log_time'):
-                            try:
-                                # 处理带时区的时间戳
-                                log_time_str = row.get('log_time')
-                                if ' UTC' in log_time_str:
-                                    # 如果有UTC标记，先移除它，然后添加Z表示UTC
-                                    log_time_str = log_time_str.replace(' UTC', 'Z')
-                                # 处理毫秒部分
-                                if '.' in log_time_str:
-                                    # 确保毫秒部分格式正确
-                                    date_part, time_part = log_time_str.split(' ', 1)
-                                    time_part, tz_part = time_part.split('Z', 1) if 'Z' in time_part else (time_part, '')
-                                    time_parts = time_part.split('.')
-                                    if len(time_parts) > 1:
-                                        # 确保毫秒部分最多3位
-                                        ms_part = time_parts[1][:3]
-                                        time_part = f"{time_parts[0]}.{ms_part}"
-                                    log_time_str = f"{date_part} {time_part}{'Z' if tz_part == '' and 'Z' in log_time_str else tz_part}"
-                                
-                                # 尝试解析时间
-                                log_time = datetime.fromisoformat(log_time_str.replace('Z', '+00:00'))
-                            except (ValueError, IndexError) as e:
-                                logger.warning(f"无法解析日志时间: {row.get('log_time')}, 错误: {str(e)}")
-                        
-                        # 创建RawSQLLog对象
-                        log_entry = models.RawSQLLog(
-                            log_time=log_time,
-                            source_database_name=source_name,
-                            username=row.get('user_name', ''),
-                            database_name_logged=row.get('database_name', ''),
-                            client_addr=client_addr,
-                            application_name=row.get('application_name', ''),
-                            session_id=row.get('session_id', ''),
-                            query_id=int(row.get('query_id', 0)) if row.get('query_id', '').isdigit() else None,
-                            duration_ms=duration_ms,
-                            raw_sql_text=sql_text,
-                            log_source_identifier=os.path.basename(log_file_path)
-                        )
-                        log_entries.append(log_entry)
-                    except Exception as e:
-                        logger.error(f"解析日志行时出错: {str(e)}, 行数据: {row}")
-                        continue
-    
+        loop = asyncio.get_running_loop()
+        log_entries = await loop.run_in_executor(
+            _PARSE_EXECUTOR, _parse_log_file_sync, source_name, log_file_path, target_db_name,
+            _sql_prefilter_enabled()
+        )
     except Exception as e:
         logger.error(f"解析日志文件 {log_file_path} 时出错: {str(e)}")
     
@@ -632,103 +1179,98 @@ async def parse_log_file(source_name: str, log_file_path: str, target_db_name: O
     return log_entries
 
 
-async def batch_insert_logs(log_entries: List[models.RawSQLLog]) -> int:
+async def parse_log_file_batches(source_name: str, log_file_path: str, target_db_name: Optional[str] = None,
+                                 batch_size: int = BATCH_SIZE) -> AsyncIterator[List[LogRecord]]:
+    """
+    按批次解析日志文件，每次产出最多 batch_size 条SQL日志条目
+    
+    与 parse_log_file 不同，不会把整个文件的解析结果保存在内存中，
+    调用方可以在解析下一批的同时写入上一批。
+    
+    Args:
+        source_name: 数据源名称
+        log_file_path: 日志文件路径
+        target_db_name: 目标数据库名称，如果指定则只处理该数据库的日志
+        batch_size: 每批的记录数
+        
+    Yields:
+        List[LogRecord]: 一批解析后的SQL日志条目
+    """
+    # 获取源数据库名称
+    source_name = _get_source_database_name()
+    logger.info(f"开始解析日志文件: {log_file_path}")
+    
+    parsed_count = 0
+    try:
+        # 每一批都在线程池中解析，事件循环在此期间可以继续处理已解析批次的写入
+        loop = asyncio.get_running_loop()
+        log_records = _iter_log_records(source_name, log_file_path, target_db_name, _sql_prefilter_enabled())
+        while True:
+            batch = await loop.run_in_executor(
+                _PARSE_EXECUTOR, lambda: list(itertools.islice(log_records, batch_size))
+            )
+            if not batch:
+                break
+            parsed_count += len(batch)
+            yield batch
+    except Exception as e:
+        logger.error(f"解析日志文件 {log_file_path} 时出错: {str(e)}")
+    
+    logger.info(f"从日志文件 {log_file_path} 中解析出 {parsed_count} 条SQL日志")
+
+
+async def batch_insert_logs(records: List[Tuple], pool: Optional[asyncpg.Pool] = None) -> int:
     """
     批量插入日志条目到数据库
     
     Args:
-        log_entries: 要插入的日志条目列表
+        records: 要插入的日志记录列表，每条记录为按 _LOG_COLS 顺序排列的元组
+        pool: 数据库连接池，未指定时使用全局连接池
         
     Returns:
         int: 成功插入的记录数
     """
-    if not log_entries:
+    if not records:
         return 0
     
-    logger.info(f"准备批量插入 {len(log_entries)} 条日志记录")
+    logger.info(f"准备批量插入 {len(records)} 条日志记录")
     
     try:
         # 获取数据库连接池
-        pool = await db_utils.get_db_pool()
+        if pool is None:
+            pool = _POOL or await _get_pool()
         
         # 定义目标表的列顺序
-        # lumi_logs.captured_logs 表的列顺序如下：
-        # 1. log_id (serial, 自增主键，不需要插入)
-        # 2. log_time
-        # 3. source_database_name
-        # 4. username
-        # 5. database_name_logged
-        # 6. client_addr
-        # 7. application_name
-        # 8. session_id
-        # 9. query_id
-        # 10. duration_ms
-        # 11. raw_sql_text
-        # 12. log_source_identifier
-        # 13. created_at (默认为 now()，不需要插入)
-        # 14. updated_at (默认为 now()，不需要插入)
-        
-        # 定义要插入的列
-        columns = [
-            'log_time', 'source_database_name', 'username', 'database_name_logged',
-            'client_addr', 'application_name', 'session_id', 'query_id',
-            'duration_ms', 'raw_sql_text', 'log_source_identifier'
-        ]
-        
-        # 准备要插入的记录
-        # 注意：记录顺序必须与 columns 定义的顺序一致
-        records = [
-            (
-                entry.log_time,
-                entry.source_database_name,
-                entry.username,
-                entry.database_name_logged,
-                entry.client_addr,
-                entry.application_name,
-                entry.session_id,
-                entry.query_id,
-                entry.duration_ms,
-                entry.raw_sql_text,
-                entry.log_source_identifier
-            )
-            for entry in log_entries
-        ]
+        # lumi_logs.captured_logs 表中 log_id (自增主键)、created_at、updated_at
+        # 由数据库生成，其余列见 _LOG_COLS
+        columns = list(_LOG_COLS)
         
         # 使用 copy_records_to_table 进行高性能批量插入
         async with pool.acquire() as conn:
             try:
-                # 开始事务
-                async with conn.transaction():
-                    # 使用 COPY 协议批量插入数据
-                    # 确保使用完全限定名称并设置 schema
-                    await conn.execute('SET search_path TO lumi_logs, public')
-                    result = await conn.copy_records_to_table(
-                        'captured_logs',  # 不使用 schema 前缀，因为已经设置了搜索路径
-                        records=records,
-                        columns=columns
-                    )
-                    
-                    # copy_records_to_table 不返回影响行数，所以我们使用记录数量
-                    inserted_count = len(records)
-                    logger.info(f"成功插入 {inserted_count} 条日志记录")
-                    return inserted_count
+                # 使用 COPY 协议批量插入数据，直接指定 schema，无需 SET search_path
+                # 单条 COPY 语句本身是原子的，不需要显式事务
+                await conn.copy_records_to_table(
+                    'captured_logs',
+                    schema_name='lumi_logs',
+                    records=records,
+                    columns=columns
+                )
+                
+                # copy_records_to_table 不返回影响行数，所以我们使用记录数量
+                inserted_count = len(records)
+                logger.info(f"成功插入 {inserted_count} 条日志记录")
+                return inserted_count
             except Exception as e:
                 # 如果 COPY 失败，尝试使用 executemany 方法
                 logger.warning(f"COPY 协议插入失败，尝试使用 executemany: {str(e)}")
                 
-                # 准备 INSERT 语句
-                insert_query = """
-                INSERT INTO lumi_logs.captured_logs (
-                    log_time, source_database_name, username, database_name_logged,
-                    client_addr, application_name, session_id, query_id,
-                    duration_ms, raw_sql_text, log_source_identifier
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                """
-                
                 # 开始新事务
                 async with conn.transaction():
-                    # 执行批量插入
-                    await conn.executemany(insert_query, records)
+                    # 使用预备语句执行批量插入；查询文本固定，同一连接上再次 prepare
+                    # 会命中 asyncpg 的连接级语句缓存，不会重新解析和规划
+                    insert_stmt = await conn.prepare(INSERT_LOGS_QUERY)
+                    await insert_stmt.executemany(records)
                     
                     inserted_count = len(records)
                     logger.info(f"成功插入 {inserted_count} 条日志记录 (使用 executemany)")
@@ -761,11 +1303,23 @@ async def process_log_files(interval_seconds: int = 60, run_once: bool = False,
         processed_log_files: Dict[str, Set[str]] = {}  # 数据源名称 -> 已处理文件集合
         total_processed_records = 0
         
+        # 尚未完成的同步状态更新任务
+        pending_status_updates: Set[asyncio.Task] = set()
+        
+        # 已处理文件记录表只需在启动时确保存在一次
+        try:
+            await _ensure_processed_files_table(await _get_pool())
+        except Exception as e:
+            logger.error(f"创建已处理文件记录表时出错: {str(e)}")
+        
         # 定义处理一次日志的函数
         async def process_logs_once() -> int:
             processed_count = 0
             
             try:
+                # 每个处理周期只获取一次连接池，并显式传递给各个辅助函数
+                pool = _POOL or await _get_pool()
+                
                 # 获取数据源信息
                 data_sources = await get_data_sources()
                 
@@ -781,6 +1335,34 @@ async def process_log_files(interval_seconds: int = 60, run_once: bool = False,
                         return 0
                     logger.info(f"将只处理指定的数据源: {source_name}")
                 
+                # 所有日志文件共享的写入并发限制，以及同时解析的文件数限制
+                insert_semaphore = asyncio.Semaphore(INSERT_CONCURRENCY)
+                file_semaphore = asyncio.Semaphore(PARSE_CONCURRENCY)
+                
+                async def insert_batch(batch):
+                    try:
+                        return await batch_insert_logs(batch, pool)
+                    finally:
+                        insert_semaphore.release()
+                
+                async def process_file(current_source_name, log_file, target_db_name):
+                    # 按批次解析日志文件（传入目标数据库名称进行过滤），
+                    # 每解析出一批就交给连接池中的连接并发写入，解析与写入流水线进行，
+                    # 同时最多只有 INSERT_CONCURRENCY 个批次驻留在内存中
+                    async with file_semaphore:
+                        parsed_count = 0
+                        insert_tasks = []
+                        async for batch in parse_log_file_batches(current_source_name, log_file, target_db_name):
+                            parsed_count += len(batch)
+                            await insert_semaphore.acquire()
+                            insert_tasks.append(asyncio.create_task(insert_batch(batch)))
+                        
+                        batch_results = await asyncio.gather(*insert_tasks)
+                        return parsed_count, sum(batch_results)
+                
+                # 本周期各数据源的同步状态，在所有数据源处理完后一次性写入
+                sync_status_items = []
+                
                 for data_source in data_sources:
                     current_source_name = data_source['source_name']
                     logger.info(f"处理数据源: {current_source_name}")
@@ -789,42 +1371,56 @@ async def process_log_files(interval_seconds: int = 60, run_once: bool = False,
                     if current_source_name not in processed_log_files:
                         processed_log_files[current_source_name] = set()
                     
-                    # 查找新的日志文件
-                    new_log_files = await find_new_log_files(current_source_name, processed_log_files[current_source_name])
+                    # 查找新的日志文件。只在查询时借出连接，解析和并发写入期间不占用连接，
+                    # 否则多个数据源同时处理时这些连接会占满连接池，COPY 写入永远等不到连接
+                    async with pool.acquire() as conn:
+                        new_log_files = await find_new_log_files(current_source_name, processed_log_files[current_source_name], pool, conn)
                     
-                    for log_file in new_log_files:
-                        # 获取数据源配置的目标数据库名称
-                        target_db_name = data_source.get('db_name')
-                        if target_db_name:
-                            logger.info(f"将只处理目标数据库 {target_db_name} 的日志")
-                        
-                        # 解析日志文件，并传入目标数据库名称进行过滤
-                        log_entries = await parse_log_file(current_source_name, log_file, target_db_name)
+                    # 获取数据源配置的目标数据库名称
+                    target_db_name = data_source.get('db_name')
+                    if target_db_name:
+                        logger.info(f"将只处理目标数据库 {target_db_name} 的日志")
+                    
+                    # 并发解析和写入该数据源的新日志文件
+                    file_results = await asyncio.gather(
+                        *(process_file(current_source_name, log_file, target_db_name) for log_file in new_log_files)
+                    )
+                    
+                    # 本周期内成功写入的文件，在数据源处理完后统一持久化
+                    saved_log_files = []
+                    source_parsed_count = 0
+                    source_inserted_count = 0
+                    
+                    for log_file, (parsed_count, total_inserted_count) in zip(new_log_files, file_results):
+                        # 标记文件为已处理
+                        processed_log_files[current_source_name].add(log_file)
                         
-                        if not log_entries:
+                        if not parsed_count:
                             logger.info(f"日志文件 {log_file} 中没有找到有效的SQL日志条目")
-                            processed_log_files[current_source_name].add(log_file)
                             continue
                         
-                        # 初始化插入计数
-                        total_inserted_count = 0
-                        
-                        # 分批处理日志条目
-                        for i in range(0, len(log_entries), BATCH_SIZE):
-                            batch = log_entries[i:i + BATCH_SIZE]
-                            batch_inserted_count = await batch_insert_logs(batch)
-                            total_inserted_count += batch_inserted_count
-                            processed_count += batch_inserted_count
-                        
-                        # 标记文件为已处理
-                        processed_log_files[current_source_name].add(log_file)
+                        processed_count += total_inserted_count
+                        source_parsed_count += parsed_count
+                        source_inserted_count += total_inserted_count
                         logger.info(f"已成功处理日志文件 {log_file}，插入 {total_inserted_count} 条记录")
                         
-                        # 更新同步状态
-                        await update_sync_status(current_source_name, len(log_entries), total_inserted_count)
-                        
-                        # 持久化已处理文件记录
-                        await save_processed_file(current_source_name, log_file)
+                        saved_log_files.append(log_file)
+                    
+                    # 批量持久化已处理文件记录
+                    await save_processed_files_batch(current_source_name, saved_log_files, pool)
+                    
+                    # 每个数据源都提交同步状态，没有新记录的空闲数据源由
+                    # update_sync_status_batch 按心跳间隔写入
+                    sync_status_items.append(
+                        (data_source['source_id'], source_parsed_count, source_inserted_count)
+                    )
+
+                # 异步更新同步状态，不阻塞本周期返回；写入与下一次等待/处理重叠进行，
+                # 任务自行从连接池获取连接
+                if sync_status_items:
+                    task = asyncio.create_task(update_sync_status_batch(sync_status_items, pool))
+                    pending_status_updates.add(task)
+                    task.add_done_callback(pending_status_updates.discard)
                 
                 return processed_count
             except Exception as e:
@@ -867,74 +1463,107 @@ async def process_log_files(interval_seconds: int = 60, run_once: bool = False,
         logger.error(f"日志处理服务出错: {str(e)}")
         return 0
     finally:
+        # 等待未完成的同步状态更新，再关闭数据库连接池
+        if pending_status_updates:
+            await asyncio.gather(*pending_status_updates, return_exceptions=True)
+        
         # 关闭数据库连接池
         try:
             await db_utils.close_db_pool()
+            reset_pool()
             logger.info("数据库连接池已关闭")
         except Exception as e:
             logger.error(f"关闭数据库连接池时出错: {str(e)}")
 
 
-async def update_sync_status(source_name: str, processed_count: int, inserted_count: int) -> None:
+def _sync_status_changed(source_id: int, processed_count: int, inserted_count: int) -> bool:
     """
-    更新数据源的同步状态
+    判断是否需要写入同步状态：有新记录时总是写入，无新记录时仅在超过心跳间隔后写入
+    
+    只做判断，不修改 _last_status；写入成功后由 update_sync_status_batch 记录，
+    写入失败时下一个周期会重新尝试。
     
     Args:
-        source_name: 数据源名称
+        source_id: 数据源ID
         processed_count: 处理的记录数
         inserted_count: 插入的记录数
+        
+    Returns:
+        bool: 是否需要写入
+    """
+    if processed_count == 0 and inserted_count == 0:
+        last = _last_status.get(source_id)
+        if last is not None and time.monotonic() - last[2] < SYNC_STATUS_HEARTBEAT:
+            return False
+    return True
+
+
+async def update_sync_status_batch(items: List[Tuple[int, int, int]],
+                                   pool: Optional[asyncpg.Pool] = None,
+                                   conn: Optional[asyncpg.Connection] = None) -> None:
     """
+    用一条 UPDATE 批量更新多个数据源的同步状态
+    
+    数据源数量不超过 SYNC_STATUS_COPY_THRESHOLD 时以 unnest 数组参数一次往返完成；
+    超过时在一个事务中 COPY 到会话临时表，再用 UPDATE ... FROM 关联更新。
+    
+    Args:
+        items: (source_id, 处理的记录数, 插入的记录数) 列表
+        pool: 数据库连接池，未指定时使用全局连接池
+        conn: 调用方已持有的数据库连接，指定时不再从连接池获取
+    """
+    # 跳过无新记录且未到心跳间隔的数据源
+    items = [item for item in items if _sync_status_changed(*item)]
+    if not items:
+        return
+    
     try:
-        # 获取数据源信息
-        data_source = data_source_cache.get(source_name)
-        
-        if not data_source:
-            logger.error(f"未找到数据源: {source_name}")
-            return
+        # 按 source_id 排序，保证并发更新时加锁顺序一致，避免死锁
+        items = sorted(items)
+        source_ids = [source_id for source_id, _, _ in items]
+        inserted_counts = [inserted_count for _, _, inserted_count in items]
+        sync_messages = [
+            f"处理了 {processed_count} 条记录，成功插入 {inserted_count} 条"
+            for _, processed_count, inserted_count in items
+        ]
         
-        # 获取数据库连接池
-        pool = await db_utils.get_db_pool()
-        
-        # 更新同步状态
-        update_query = """
-        UPDATE lumi_config.source_sync_schedules
-        SET 
-            last_sync_attempt_at = NOW(),
-            last_sync_success_at = CASE WHEN $3 > 0 THEN NOW() ELSE last_sync_success_at END,
-            last_sync_status = CASE WHEN $3 > 0 THEN 'SUCCESS' ELSE 'NO_RECORDS' END,
-            last_sync_message = $4,
-            updated_at = NOW()
-            -- 注意：表中没有 processed_count 列
-        WHERE source_id = $1 AND is_schedule_active = TRUE
-        """
+        if len(items) <= SYNC_STATUS_COPY_THRESHOLD:
+            executor = conn if conn is not None else (pool or _POOL or await _get_pool())
+            rows = await executor.fetch(UPDATE_SYNC_BATCH_SQL, source_ids, inserted_counts, sync_messages)
+        else:
+            async with _acquire(pool, conn) as conn:
+                async with conn.transaction():
+                    await conn.execute(CREATE_SYNC_STAGING_SQL)
+                    await conn.copy_records_to_table(
+                        '_sync_status_staging',
+                        records=zip(source_ids, inserted_counts, sync_messages),
+                        columns=['source_id', 'inserted_count', 'sync_message']
+                    )
+                    rows = await conn.fetch(UPDATE_SYNC_FROM_STAGING_SQL)
         
-        # 构造同步状态消息
-        sync_message = f"处理了 {processed_count} 条记录，成功插入 {inserted_count} 条"
+        # 写入成功后才记录，供下一个周期判断是否需要写入
+        written_at = time.monotonic()
+        for source_id, processed_count, inserted_count in items:
+            _last_status[source_id] = (processed_count, inserted_count, written_at)
         
-        async with pool.acquire() as conn:
-            # 执行更新
-            # 确保参数类型正确并与 SQL 中的参数匹配
-            result = await conn.execute(
-                update_query, 
-                int(data_source['source_id']),  # 确保 source_id 是整数
-                int(processed_count),           # $2
-                int(inserted_count),            # $3
-                str(sync_message)               # $4
-            )
-            
-            if result == 'UPDATE 0':
-                # 如果没有更新任何行，可能是因为没有活跃的计划
-                logger.warning(f"没有找到数据源 {source_name} 的活跃同步计划")
-            else:
-                logger.info(f"已更新数据源 {source_name} 的同步状态: {sync_message}")
+        missing_ids = set(source_ids).difference(row[0] for row in rows)
+        if missing_ids:
+            # 没有更新到的数据源，可能是因为没有活跃的计划
+            logger.warning("没有找到数据源 %s 的活跃同步计划", sorted(missing_ids))
+        logger.info("已批量更新 %d 个数据源的同步状态", len(rows))
     
     except Exception as e:
-        logger.error(f"更新同步状态时出错: {str(e)}")
+        logger.error("批量更新同步状态时出错: %s", e)
 
 
-# 如果直接运行该模块，则启动日志处理服务
-if __name__ == "__main__":
+def main() -> None:
+    """
+    命令行入口：解析参数并运行日志处理服务
+    
+    安装了 uvloop 时使用其事件循环，否则使用 asyncio 默认事件循环。
+    """
     import argparse
+    import sys
     
     # 解析命令行参数
     parser = argparse.ArgumentParser(description="PostgreSQL 日志处理服务")
@@ -952,12 +1581,30 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
+    # uvloop 为可选依赖，仅在命令行运行时导入
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    
     # 运行日志处理服务
     try:
-        asyncio.run(process_log_files(interval_seconds=args.interval, run_once=args.run_once))
+        coro = process_log_files(interval_seconds=args.interval, run_once=args.run_once)
+        if uvloop is None:
+            asyncio.run(coro)
+        elif sys.version_info >= (3, 12):
+            asyncio.run(coro, loop_factory=uvloop.new_event_loop)
+        else:
+            uvloop.install()
+            asyncio.run(coro)
     except KeyboardInterrupt:
         print("\n程序被用户中断")
     except Exception as e:
         print(f"\n程序出错: {str(e)}")
         import traceback
         traceback.print_exc()
+
+
+# 如果直接运行该模块，则启动日志处理服务
+if __name__ == "__main__":
+    main()
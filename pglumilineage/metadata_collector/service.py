@@ -16,15 +16,27 @@
 """
 
 import asyncio
+import hashlib
 import json
 import logging
-import functools
+import operator
+import time
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional, Tuple, Set, Union, cast
+from typing import List, Dict, Any, Optional, Tuple, Set, Union, AsyncIterator, cast
 
 import asyncpg
 from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json 模块
+    orjson = None
+
+try:
+    from croniter import croniter
+except ImportError:  # 未安装 croniter 时 cron 调度退化为每天运行一次
+    croniter = None
+
 from pglumilineage.common import config, db_utils, models
 
 # 配置日志记录器
@@ -32,13 +44,113 @@ logger = logging.getLogger(__name__)
 
 # 缓存设置
 SCHEDULES_CACHE_TTL = 300  # 调度规则缓存有效期（秒）
+# timestamp 为 time.monotonic() 时间戳，读写均在 _schedules_lock 内进行；
+# by_id 为 schedule_id -> data 中的调度规则，同步完成后只更新对应条目，不清空整个缓存
 _schedules_cache: Dict[str, Any] = {
     "data": None,
+    "by_id": {},
     "timestamp": None
 }
+_schedules_lock = asyncio.Lock()  # 保证并发刷新时只有一个协程查询数据库
+# 数据源配置对象缓存: source_id -> (连接参数指纹, DataSourceConfig)，连接参数未变化时复用，避免重复校验
+_source_config_cache: Dict[int, Tuple[bytes, models.DataSourceConfig]] = {}
+_cron_iterators: Dict[str, Any] = {}  # cron 表达式 -> 已解析的 croniter 对象，避免每次计算都重新解析
+# schedule_id -> ((调度参数, 上次成功同步时间), 下次运行时间)，避免每轮重复计算
+_next_run_times: Dict[int, Tuple[Tuple[Any, ...], datetime]] = {}
+
+# 源数据库连接池: source_id -> (连接参数, 连接池)，各次同步复用已建立的连接
+# 对象和函数元数据并行收集，每次同步最多同时使用 2 个连接
+SOURCE_POOL_MAX_SIZE = 2
+_source_pools: Dict[int, Tuple[Tuple[Any, ...], asyncpg.Pool]] = {}
+
+# 日志降噪：仅在状态变化时输出 INFO 日志，稳定状态下使用 DEBUG
+_last_schedule_count: Optional[int] = None  # 上一轮找到的调度规则数量
+_last_schedule_status: Dict[int, bool] = {}  # schedule_id -> 上一次同步是否成功
+
+# 源数据库元数据查询结果缓存: (source_id, 主机, 端口, 数据库, 用户名) -> (time.monotonic() 时间戳, 源库结构指纹, 查询结果)
+# 键中包含连接参数，数据源改为指向其他数据库后不会命中旧结果；
+# TTL 内直接使用缓存；过期后先比较结构指纹，未变化则沿用缓存结果并续期
+METADATA_CACHE_TTL = 300  # 元数据查询结果缓存有效期（秒）
+_objects_cache: Dict[Tuple[Any, ...], Tuple[float, Optional[str], List[Any]]] = {}
+
+# 源数据库对象结构指纹查询。对象相关的 pg_class/pg_attribute/pg_constraint/pg_rewrite/
+# pg_description 行在 DDL、COMMENT 后 xmin 会变化；reltuples 与最后分析时间对应 row_count/last_analyzed
+OBJECTS_FINGERPRINT_QUERY = """
+    SELECT md5(string_agg(
+        n.nspname || '.' || c.oid::text || ':' || c.xmin::text || ':' || c.reltuples::text || ':' ||
+        COALESCE(GREATEST(
+            pg_catalog.pg_stat_get_last_analyze_time(c.oid),
+            pg_catalog.pg_stat_get_last_autoanalyze_time(c.oid)
+        )::text, '') || ':' ||
+        COALESCE(a.sig, '') || ':' || COALESCE(k.sig, '') || ':' ||
+        COALESCE(r.xmin::text, '') || ':' || COALESCE(d.xmin::text, ''),
+        ',' ORDER BY c.oid
+    ))
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
+    LEFT JOIN (
+        SELECT attrelid, string_agg(xmin::text, '.' ORDER BY attnum) AS sig
+        FROM pg_catalog.pg_attribute
+        WHERE attnum > 0
+        GROUP BY attrelid
+    ) a ON a.attrelid = c.oid
+    LEFT JOIN (
+        SELECT conrelid, string_agg(xmin::text, '.' ORDER BY oid) AS sig
+        FROM pg_catalog.pg_constraint
+        GROUP BY conrelid
+    ) k ON k.conrelid = c.oid
+    LEFT JOIN pg_catalog.pg_rewrite r ON r.ev_class = c.oid AND r.rulename = '_RETURN'
+    LEFT JOIN pg_catalog.pg_description d
+        ON d.objoid = c.oid AND d.classoid = 'pg_catalog.pg_class'::regclass AND d.objsubid = 0
+    WHERE c.relkind IN ('r', 'p', 'v', 'm')
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND n.nspname NOT LIKE 'pg_toast%'
+      AND n.nspname NOT LIKE 'pg_temp%'
+"""
 
 # 批处理设置
-BATCH_SIZE = 100  # 批量处理的大小
+BATCH_SIZE = 1000  # 批量处理的大小，也是列元数据游标每次预取和保存的行数
+
+# 并发设置
+COLLECTION_CONCURRENCY = 8  # 同时收集元数据的数据源数量，每个数据源占用两个源数据库连接
+COLUMN_SAVE_CONCURRENCY = 4  # 每个数据源同时保存的列元数据批次数，保存与游标读取下一批并行进行
+
+# 元数据存储表的唯一键列 (列名, 类型)，即 ON CONFLICT 目标，也用于 UPSERT 后按键取回记录ID
+OBJECT_KEY_COLUMNS = [
+    ('source_id', 'int'), ('database_name', 'text'), ('schema_name', 'text'),
+    ('object_name', 'text'), ('object_type', 'text'),
+]
+COLUMN_KEY_COLUMNS = [('object_id', 'bigint'), ('column_name', 'text')]
+FUNCTION_KEY_COLUMNS = [
+    ('source_id', 'int'), ('database_name', 'text'), ('schema_name', 'text'),
+    ('function_name', 'text'), ('function_type', 'text'),
+]
+
+# 元数据存储表的非键列 (列名, 类型)，顺序与参数元组中唯一键之后的顺序一致
+OBJECT_VALUE_COLUMNS = [
+    ('owner', 'text'), ('description', 'text'), ('definition', 'text'),
+    ('row_count', 'bigint'), ('last_ddl_time', 'timestamptz'), ('last_analyzed', 'timestamptz'),
+    ('properties', 'jsonb'), ('content_hash', 'bytea'),
+]
+COLUMN_VALUE_COLUMNS = [
+    ('ordinal_position', 'int'), ('data_type', 'text'), ('max_length', 'int'),
+    ('numeric_precision', 'int'), ('numeric_scale', 'int'), ('is_nullable', 'boolean'),
+    ('default_value', 'text'), ('is_primary_key', 'boolean'), ('is_unique', 'boolean'),
+    ('foreign_key_to_table_schema', 'text'), ('foreign_key_to_table_name', 'text'),
+    ('foreign_key_to_column_name', 'text'), ('description', 'text'),
+    ('properties', 'jsonb'), ('content_hash', 'bytea'),
+]
+FUNCTION_VALUE_COLUMNS = [
+    ('parameters', 'jsonb'), ('return_type', 'text'), ('language', 'text'),
+    ('owner', 'text'), ('description', 'text'), ('definition', 'text'),
+    ('properties', 'jsonb'), ('content_hash', 'bytea'),
+]
+
+# 按上述列顺序从元数据模型中一次取出参数元组（不含 content_hash），
+# 字段名与列名一致，attrgetter 在 C 层完成逐字段读取
+_OBJECT_PARAMS = operator.attrgetter(*(name for name, _ in OBJECT_KEY_COLUMNS + OBJECT_VALUE_COLUMNS[:-1]))
+_COLUMN_PARAMS = operator.attrgetter(*(name for name, _ in COLUMN_KEY_COLUMNS + COLUMN_VALUE_COLUMNS[:-1]))
+_FUNCTION_PARAMS = operator.attrgetter(*(name for name, _ in FUNCTION_KEY_COLUMNS + FUNCTION_VALUE_COLUMNS[:-1]))
 
 
 # 元数据模型定义
@@ -120,6 +232,89 @@ class MetadataSyncStatus(BaseModel):
     updated_at: Optional[datetime] = None
 
 
+def _content_hash(params: Tuple) -> bytes:
+    """
+    计算一行元数据参数的内容指纹，用于跳过内容未变化的 UPSERT
+    
+    Args:
+        params: 一行元数据的参数元组
+        
+    Returns:
+        bytes: 16 字节 BLAKE2b 摘要
+    """
+    if orjson is not None:
+        payload = orjson.dumps(params, default=str, option=orjson.OPT_SORT_KEYS)
+    else:
+        payload = json.dumps(params, default=str, sort_keys=True).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _loads_json(value: Union[str, bytes]) -> Any:
+    """
+    解析 JSON 文本，优先使用 orjson
+    
+    Args:
+        value: JSON 文本
+        
+    Returns:
+        Any: 解析结果
+    """
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+def _metadata_cache_key(source_config: models.DataSourceConfig) -> Tuple[Any, ...]:
+    """
+    生成元数据缓存键：数据源ID加上决定连接到哪个数据库的连接参数
+    
+    Args:
+        source_config: 数据源配置
+        
+    Returns:
+        Tuple[Any, ...]: 缓存键
+    """
+    return (
+        source_config.source_id,
+        source_config.host,
+        source_config.port,
+        source_config.database,
+        source_config.username
+    )
+
+
+def _get_cached_metadata(cache: Dict[Tuple[Any, ...], Tuple[float, Optional[str], List[Any]]],
+                         cache_key: Tuple[Any, ...]) -> Optional[List[Any]]:
+    """
+    从元数据缓存中获取未过期的查询结果
+    
+    Args:
+        cache: 元数据缓存
+        cache_key: 缓存键，由 _metadata_cache_key 生成
+        
+    Returns:
+        Optional[List[Any]]: 缓存的查询结果，不存在或已过期时返回 None
+    """
+    entry = cache.get(cache_key)
+    if entry is not None and time.monotonic() - entry[0] < METADATA_CACHE_TTL:
+        return entry[2]
+    return None
+
+
+def invalidate_metadata_cache(source_id: Optional[int] = None) -> None:
+    """
+    使元数据查询结果缓存失效，检测到源数据库 DDL 变更时调用
+    
+    Args:
+        source_id: 数据源ID，为 None 时清空所有数据源的缓存
+    """
+    if source_id is None:
+        _objects_cache.clear()
+    else:
+        for cache_key in [key for key in _objects_cache if key[0] == source_id]:
+            del _objects_cache[cache_key]
+
+
 async def get_source_db_connection(source_config: models.DataSourceConfig) -> asyncpg.Connection:
     """
     建立与源数据库的连接
@@ -147,6 +342,76 @@ async def get_source_db_connection(source_config: models.DataSourceConfig) -> as
         raise
 
 
+async def get_source_db_pool(source_config: models.DataSourceConfig) -> asyncpg.Pool:
+    """
+    获取源数据库连接池
+    
+    每个数据源维护一个长期存在的连接池，后续同步直接复用已建立的连接；
+    连接参数变化时关闭旧连接池并重新创建
+    
+    Args:
+        source_config: 数据源配置
+        
+    Returns:
+        asyncpg.Pool: 源数据库连接池
+    """
+    pool_key = (
+        source_config.host,
+        source_config.port,
+        source_config.database,
+        source_config.username,
+        source_config.password.get_secret_value()
+    )
+    cached_pool = _source_pools.get(source_config.source_id)
+    if cached_pool is not None:
+        if cached_pool[0] == pool_key:
+            return cached_pool[1]
+        # 连接参数已变化，关闭旧连接池
+        await close_source_db_pool(source_config.source_id)
+    
+    logger.info(f"正在创建数据源连接池: {source_config.source_name} ({source_config.host}:{source_config.port}/{source_config.database})")
+    
+    try:
+        pool = await asyncpg.create_pool(
+            user=source_config.username,
+            password=source_config.password.get_secret_value(),
+            host=source_config.host,
+            port=source_config.port,
+            database=source_config.database,
+            min_size=1,
+            max_size=SOURCE_POOL_MAX_SIZE
+        )
+        _source_pools[source_config.source_id] = (pool_key, pool)
+        logger.info(f"成功创建数据源连接池: {source_config.source_name}")
+        return pool
+    except Exception as e:
+        logger.error(f"创建数据源 {source_config.source_name} 连接池失败: {str(e)}")
+        raise
+
+
+async def close_source_db_pool(source_id: int) -> None:
+    """
+    关闭指定数据源的连接池
+    
+    Args:
+        source_id: 数据源ID
+    """
+    cached_pool = _source_pools.pop(source_id, None)
+    if cached_pool is not None:
+        await cached_pool[1].close()
+        logger.info(f"已关闭数据源 {source_id} 的连接池")
+
+
+async def close_source_db_pools() -> None:
+    """
+    关闭所有数据源连接池
+    """
+    await asyncio.gather(
+        *(close_source_db_pool(source_id) for source_id in list(_source_pools)),
+        return_exceptions=True
+    )
+
+
 async def fetch_objects_metadata(conn: asyncpg.Connection, source_config: models.DataSourceConfig) -> List[ObjectMetadata]:
     """
     获取数据库对象（表、视图等）的元数据
@@ -158,84 +423,46 @@ async def fetch_objects_metadata(conn: asyncpg.Connection, source_config: models
     Returns:
         List[ObjectMetadata]: 对象元数据列表
     """
-    logger.info(f"正在从数据源 {source_config.source_name} 获取对象元数据")
+    cache_key = _metadata_cache_key(source_config)
+    cached = _get_cached_metadata(_objects_cache, cache_key)
+    if cached is not None:
+        logger.debug(f"使用缓存的数据源 {source_config.source_name} 对象元数据")
+        return cached
     
-    # 使用数据源配置中的数据库名称
-    db_name = source_config.database
-    logger.info(f"使用数据源配置中的数据库名称: {db_name}")
+    # 缓存已过期时先比较源库结构指纹，未发生 DDL 变更则续期缓存，无需重新执行元数据查询
+    fingerprint = await conn.fetchval(OBJECTS_FINGERPRINT_QUERY)
+    entry = _objects_cache.get(cache_key)
+    if entry is not None and entry[1] is not None and entry[1] == fingerprint:
+        logger.debug(f"数据源 {source_config.source_name} 结构未变化，沿用缓存的对象元数据")
+        _objects_cache[cache_key] = (time.monotonic(), fingerprint, entry[2])
+        return entry[2]
     
-    # 如果数据源配置中没有数据库名称，则使用默认值
-    if not db_name:
-        logger.warning(f"数据源配置中没有数据库名称，使用默认值 'default_db'")
-        db_name = 'default_db'
-        db_name = 'default_db'
+    logger.info(f"正在从数据源 {source_config.source_name} 获取对象元数据")
     
     # 查询获取表、视图和物化视图的元数据
     query = """
-    WITH tables_info AS (
-        -- 从 information_schema.tables 获取表信息
-        SELECT 
-            t.table_schema AS schema_name,
-            t.table_name AS object_name,
-            'TABLE' AS object_type,
-            -- 从 pg_tables 获取表所有者
-            (SELECT tableowner FROM pg_catalog.pg_tables 
-             WHERE schemaname = t.table_schema AND tablename = t.table_name) AS owner,
-            -- 获取表的OID以用于查询描述和行数
-            (SELECT c.oid FROM pg_catalog.pg_class c 
-             JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid 
-             WHERE n.nspname = t.table_schema AND c.relname = t.table_name) AS oid,
-            NULL AS object_definition
-        FROM information_schema.tables t
-        WHERE t.table_type = 'BASE TABLE'
-          AND t.table_schema NOT IN ('pg_catalog', 'information_schema')
-          AND t.table_schema NOT LIKE 'pg_toast%'
-          AND t.table_schema NOT LIKE 'pg_temp%'
-    ),
-    views_info AS (
-        -- 从 information_schema.views 获取视图信息
-        SELECT 
-            v.table_schema AS schema_name,
-            v.table_name AS object_name,
-            'VIEW' AS object_type,
-            -- 从 pg_views 获取视图所有者
-            (SELECT viewowner FROM pg_catalog.pg_views 
-             WHERE schemaname = v.table_schema AND viewname = v.table_name) AS owner,
-            -- 获取视图的OID以用于查询描述
-            (SELECT c.oid FROM pg_catalog.pg_class c 
-             JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid 
-             WHERE n.nspname = v.table_schema AND c.relname = v.table_name) AS oid,
-            v.view_definition AS object_definition
-        FROM information_schema.views v
-        WHERE v.table_schema NOT IN ('pg_catalog', 'information_schema')
-          AND v.table_schema NOT LIKE 'pg_toast%'
-          AND v.table_schema NOT LIKE 'pg_temp%'
-    ),
-    matviews_info AS (
-        -- 获取物化视图信息
+    WITH combined_objects AS (
+        -- 直接从 pg_catalog 获取表、分区表、视图和物化视图信息
         SELECT 
             n.nspname AS schema_name,
             c.relname AS object_name,
-            'MATERIALIZED VIEW' AS object_type,
-            -- 获取物化视图所有者
+            CASE c.relkind
+                WHEN 'v' THEN 'VIEW'
+                WHEN 'm' THEN 'MATERIALIZED VIEW'
+                ELSE 'TABLE'
+            END AS object_type,
             pg_catalog.pg_get_userbyid(c.relowner) AS owner,
             c.oid,
-            -- 获取物化视图定义
-            pg_catalog.pg_get_viewdef(c.oid) AS object_definition
+            c.reltuples,
+            c.relispartition,
+            -- 获取视图和物化视图定义
+            CASE WHEN c.relkind IN ('v', 'm') THEN pg_catalog.pg_get_viewdef(c.oid) END AS object_definition
         FROM pg_catalog.pg_class c
         JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-        WHERE c.relkind = 'm'  -- 'm' 表示物化视图
+        WHERE c.relkind IN ('r', 'p', 'v', 'm')  -- 'r' 普通表, 'p' 分区表, 'v' 视图, 'm' 物化视图
           AND n.nspname NOT IN ('pg_catalog', 'information_schema')
           AND n.nspname NOT LIKE 'pg_toast%'
           AND n.nspname NOT LIKE 'pg_temp%'
-    ),
-    combined_objects AS (
-        -- 合并表、视图和物化视图信息
-        SELECT * FROM tables_info
-        UNION ALL
-        SELECT * FROM views_info
-        UNION ALL
-        SELECT * FROM matviews_info
     )
     SELECT 
         co.schema_name,
@@ -249,16 +476,14 @@ async def fetch_objects_metadata(conn: asyncpg.Connection, source_config: models
         CASE WHEN co.object_type = 'TABLE' THEN 
             'CREATE TABLE ' || co.schema_name || '.' || co.object_name || ' (\n' ||
             (SELECT string_agg(
-                '    ' || cols.column_name || ' ' || cols.data_type ||
-                CASE WHEN cols.character_maximum_length IS NOT NULL 
-                     THEN '(' || cols.character_maximum_length || ')' 
-                     ELSE '' END ||
-                CASE WHEN cols.is_nullable = 'NO' THEN ' NOT NULL' ELSE '' END,
+                '    ' || a.attname || ' ' || pg_catalog.format_type(a.atttypid, -1) ||
+                COALESCE('(' || information_schema._pg_char_max_length(a.atttypid, a.atttypmod) || ')', '') ||
+                CASE WHEN a.attnotnull THEN ' NOT NULL' ELSE '' END,
                 ',\n'
-                ORDER BY cols.ordinal_position
+                ORDER BY a.attnum
             )
-            FROM information_schema.columns cols
-            WHERE cols.table_schema = co.schema_name AND cols.table_name = co.object_name) ||
+            FROM pg_catalog.pg_attribute a
+            WHERE a.attrelid = co.oid AND a.attnum > 0 AND NOT a.attisdropped) ||
             -- 获取主键约束
             COALESCE(',\n' || (
                 SELECT string_agg(
@@ -294,9 +519,7 @@ async def fetch_objects_metadata(conn: asyncpg.Connection, source_config: models
             '\n);'
         ELSE NULL END AS table_ddl,
         -- 仅对表获取行数估计
-        CASE WHEN co.object_type = 'TABLE' THEN 
-            (SELECT c.reltuples::bigint FROM pg_catalog.pg_class c WHERE c.oid = co.oid)
-        ELSE 0 END AS row_count,
+        CASE WHEN co.object_type = 'TABLE' THEN co.reltuples::bigint ELSE 0 END AS row_count,
         NULL AS last_ddl_time,
         -- 获取最后分析时间
         CASE WHEN co.object_type = 'TABLE' THEN 
@@ -309,26 +532,48 @@ async def fetch_objects_metadata(conn: asyncpg.Connection, source_config: models
         CASE 
             WHEN co.object_type = 'TABLE' THEN (
                 SELECT jsonb_build_object(
-                    'has_primary_key', (SELECT EXISTS (SELECT 1 FROM pg_catalog.pg_constraint WHERE conrelid = co.oid AND contype = 'p')),
-                    'has_foreign_keys', (SELECT EXISTS (SELECT 1 FROM pg_catalog.pg_constraint WHERE conrelid = co.oid AND contype = 'f')),
-                    'has_indexes', (SELECT EXISTS (SELECT 1 FROM pg_catalog.pg_index WHERE indrelid = co.oid)),
-                    'is_partitioned', (SELECT c.relispartition FROM pg_catalog.pg_class c WHERE c.oid = co.oid),
+                    'has_primary_key', COALESCE(cg.has_primary_key, false),
+                    'has_foreign_keys', COALESCE(cg.has_foreign_keys, false),
+                    'has_indexes', ig.indrelid IS NOT NULL,
+                    'is_partitioned', co.relispartition,
                     'table_size', pg_catalog.pg_total_relation_size(co.oid),
                     'table_size_pretty', pg_catalog.pg_size_pretty(pg_catalog.pg_total_relation_size(co.oid))
                 )
             )
             WHEN co.object_type = 'VIEW' THEN (
+                -- 与 information_schema.views 的计算方式一致：pg_relation_is_updatable 位掩码
+                -- (INSERT=8, UPDATE=4, DELETE=16) 和 INSTEAD OF 触发器类型位掩码
                 SELECT jsonb_build_object(
-                    'is_updatable', (SELECT is_updatable FROM information_schema.views WHERE table_schema = co.schema_name AND table_name = co.object_name),
-                    'is_insertable_into', (SELECT is_insertable_into FROM information_schema.views WHERE table_schema = co.schema_name AND table_name = co.object_name),
-                    'is_trigger_updatable', (SELECT is_trigger_updatable FROM information_schema.views WHERE table_schema = co.schema_name AND table_name = co.object_name),
-                    'is_trigger_deletable', (SELECT is_trigger_deletable FROM information_schema.views WHERE table_schema = co.schema_name AND table_name = co.object_name),
-                    'is_trigger_insertable_into', (SELECT is_trigger_insertable_into FROM information_schema.views WHERE table_schema = co.schema_name AND table_name = co.object_name)
+                    'is_updatable', CASE WHEN (pg_catalog.pg_relation_is_updatable(co.oid, false) & 20) = 20 THEN 'YES' ELSE 'NO' END,
+                    'is_insertable_into', CASE WHEN (pg_catalog.pg_relation_is_updatable(co.oid, false) & 8) = 8 THEN 'YES' ELSE 'NO' END,
+                    'is_trigger_updatable', CASE WHEN tg.is_trigger_updatable THEN 'YES' ELSE 'NO' END,
+                    'is_trigger_deletable', CASE WHEN tg.is_trigger_deletable THEN 'YES' ELSE 'NO' END,
+                    'is_trigger_insertable_into', CASE WHEN tg.is_trigger_insertable_into THEN 'YES' ELSE 'NO' END
                 )
             )
             ELSE '{}'::jsonb
         END AS properties
     FROM combined_objects co
+    -- 约束、索引和触发器标志按关系一次性聚合后关联，避免逐行的相关子查询
+    LEFT JOIN (
+        SELECT conrelid,
+               bool_or(contype = 'p') AS has_primary_key,
+               bool_or(contype = 'f') AS has_foreign_keys
+        FROM pg_catalog.pg_constraint
+        WHERE contype IN ('p', 'f')
+        GROUP BY conrelid
+    ) cg ON cg.conrelid = co.oid
+    LEFT JOIN (
+        SELECT DISTINCT indrelid FROM pg_catalog.pg_index
+    ) ig ON ig.indrelid = co.oid
+    LEFT JOIN (
+        SELECT tgrelid,
+               bool_or((tgtype & 81) = 81) AS is_trigger_updatable,
+               bool_or((tgtype & 73) = 73) AS is_trigger_deletable,
+               bool_or((tgtype & 69) = 69) AS is_trigger_insertable_into
+        FROM pg_catalog.pg_trigger
+        GROUP BY tgrelid
+    ) tg ON tg.tgrelid = co.oid
     ORDER BY co.schema_name, co.object_name
     """
     
@@ -346,9 +591,10 @@ async def fetch_objects_metadata(conn: asyncpg.Connection, source_config: models
                 # 对于视图和物化视图，使用object_definition
                 definition = row['object_definition']
                 
-            obj_metadata = ObjectMetadata(
+            # 查询结果类型已由 asyncpg 确定，使用 model_construct 跳过逐字段校验
+            obj_metadata = ObjectMetadata.model_construct(
                 source_id=source_config.source_id,
-                database_name=db_name,  # 添加数据库名称
+                database_name=source_config.database,  # 为空时已由 DataSourceConfig 填充默认值
                 schema_name=row['schema_name'],
                 object_name=row['object_name'],
                 object_type=row['object_type'],
@@ -357,199 +603,172 @@ async def fetch_objects_metadata(conn: asyncpg.Connection, source_config: models
                 definition=definition,  # 使用适当的定义
                 row_count=row['row_count'],
                 last_ddl_time=row['last_ddl_time'],
-                last_analyzed=row['last_analyzed'],
-                properties={}
+                last_analyzed=row['last_analyzed']
             )
             result.append(obj_metadata)
         
         logger.info(f"从数据源 {source_config.source_name} 获取到 {len(result)} 个对象元数据")
+        # 同一数据源只保留当前连接参数对应的缓存
+        invalidate_metadata_cache(source_config.source_id)
+        _objects_cache[cache_key] = (time.monotonic(), fingerprint, result)
         return result
     except Exception as e:
         logger.error(f"获取对象元数据失败: {str(e)}")
         raise
 
 
-async def fetch_columns_metadata(conn: asyncpg.Connection, object_id: int, schema_name: str, object_name: str, source_config: models.DataSourceConfig) -> List[ColumnMetadata]:
-    """
-    获取指定对象的列元数据
-    
-    Args:
-        conn: 源数据库连接
-        object_id: 对象ID
-        schema_name: 模式名称
-        object_name: 对象名称
-        source_config: 数据源配置
-        
-    Returns:
-        List[ColumnMetadata]: 列元数据列表
-    """
-    logger.info(f"正在获取 {schema_name}.{object_name} 的列元数据")
-    
-    # 查询获取列的元数据
-    query = """
-    WITH column_info AS (
-        -- 从 information_schema.columns 获取基本列信息
+# 一次查询整个数据库所有用户模式的列元数据（直接查询 pg_catalog）
+ALL_COLUMNS_METADATA_QUERY = """
+    WITH key_flags AS (
+        -- 一次扫描 pg_constraint 得到每个列的主键/唯一约束标记
         SELECT
-            c.table_schema,
-            c.table_name,
-            c.column_name,
-            c.ordinal_position,
-            c.data_type,
-            c.character_maximum_length AS max_length,
-            c.numeric_precision,
-            c.numeric_scale,
-            CASE WHEN c.is_nullable = 'YES' THEN TRUE ELSE FALSE END AS is_nullable,
-            c.column_default AS default_value,
-            -- 从 pg_catalog 获取更多信息
-            (SELECT a.attnum FROM pg_catalog.pg_attribute a
-             JOIN pg_catalog.pg_class cl ON a.attrelid = cl.oid
-             JOIN pg_catalog.pg_namespace n ON cl.relnamespace = n.oid
-             WHERE n.nspname = c.table_schema AND cl.relname = c.table_name AND a.attname = c.column_name) AS attnum,
-            (SELECT cl.oid FROM pg_catalog.pg_class cl
-             JOIN pg_catalog.pg_namespace n ON cl.relnamespace = n.oid
-             WHERE n.nspname = c.table_schema AND cl.relname = c.table_name) AS reloid
-        FROM information_schema.columns c
-        WHERE c.table_schema = $1 AND c.table_name = $2
-    ),
-    primary_keys AS (
-        -- 获取主键信息
-        SELECT
-            kcu.table_schema,
-            kcu.table_name,
-            kcu.column_name,
-            TRUE AS is_primary_key
-        FROM information_schema.key_column_usage kcu
-        JOIN information_schema.table_constraints tc ON
-            kcu.constraint_name = tc.constraint_name AND
-            kcu.table_schema = tc.table_schema AND
-            kcu.table_name = tc.table_name
-        WHERE tc.constraint_type = 'PRIMARY KEY'
-          AND kcu.table_schema = $1 AND kcu.table_name = $2
-    ),
-    unique_constraints AS (
-        -- 获取唯一约束信息
-        SELECT
-            kcu.table_schema,
-            kcu.table_name,
-            kcu.column_name,
-            TRUE AS is_unique
-        FROM information_schema.key_column_usage kcu
-        JOIN information_schema.table_constraints tc ON
-            kcu.constraint_name = tc.constraint_name AND
-            kcu.table_schema = tc.table_schema AND
-            kcu.table_name = tc.table_name
-        WHERE tc.constraint_type = 'UNIQUE'
-          AND kcu.table_schema = $1 AND kcu.table_name = $2
+            con.conrelid,
+            k.attnum,
+            bool_or(con.contype = 'p') AS is_primary_key,
+            bool_or(con.contype = 'u') AS is_unique
+        FROM pg_catalog.pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey) AS k(attnum)
+        WHERE con.contype IN ('p', 'u')
+        GROUP BY con.conrelid, k.attnum
     ),
     foreign_keys AS (
-        -- 获取外键信息
-        SELECT
-            kcu.table_schema,
-            kcu.table_name,
-            kcu.column_name,
-            ccu.table_schema AS foreign_key_to_table_schema,
-            ccu.table_name AS foreign_key_to_table_name,
-            ccu.column_name AS foreign_key_to_column_name
-        FROM information_schema.key_column_usage kcu
-        JOIN information_schema.referential_constraints rc ON
-            kcu.constraint_name = rc.constraint_name AND
-            kcu.table_schema = rc.constraint_schema
-        JOIN information_schema.constraint_column_usage ccu ON
-            rc.unique_constraint_name = ccu.constraint_name AND
-            rc.unique_constraint_schema = ccu.constraint_schema
-        WHERE kcu.table_schema = $1 AND kcu.table_name = $2
+        -- 获取外键信息，conkey 与 confkey 按位置一一对应
+        SELECT DISTINCT ON (con.conrelid, k.attnum)
+            con.conrelid,
+            k.attnum,
+            fn.nspname AS foreign_key_to_table_schema,
+            fc.relname AS foreign_key_to_table_name,
+            fa.attname AS foreign_key_to_column_name
+        FROM pg_catalog.pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, fattnum)
+        JOIN pg_catalog.pg_class fc ON fc.oid = con.confrelid
+        JOIN pg_catalog.pg_namespace fn ON fn.oid = fc.relnamespace
+        JOIN pg_catalog.pg_attribute fa ON fa.attrelid = con.confrelid AND fa.attnum = k.fattnum
+        WHERE con.contype = 'f'
+        ORDER BY con.conrelid, k.attnum, con.conname
     )
     SELECT
-        ci.column_name,
-        ci.ordinal_position,
-        ci.data_type,
-        ci.max_length,
-        ci.numeric_precision,
-        ci.numeric_scale,
-        ci.is_nullable,
-        ci.default_value,
-        COALESCE(pk.is_primary_key, FALSE) AS is_primary_key,
-        COALESCE(uc.is_unique, FALSE) AS is_unique,
+        n.nspname AS table_schema,
+        c.relname AS table_name,
+        a.attname AS column_name,
+        a.attnum AS ordinal_position,
+        pg_catalog.format_type(a.atttypid, -1) AS data_type,
+        information_schema._pg_char_max_length(a.atttypid, a.atttypmod) AS max_length,
+        information_schema._pg_numeric_precision(a.atttypid, a.atttypmod) AS numeric_precision,
+        information_schema._pg_numeric_scale(a.atttypid, a.atttypmod) AS numeric_scale,
+        NOT a.attnotnull AS is_nullable,
+        pg_catalog.pg_get_expr(ad.adbin, ad.adrelid) AS default_value,
+        COALESCE(kf.is_primary_key, FALSE) AS is_primary_key,
+        COALESCE(kf.is_unique, FALSE) AS is_unique,
         fk.foreign_key_to_table_schema,
         fk.foreign_key_to_table_name,
         fk.foreign_key_to_column_name,
-        pg_catalog.col_description(ci.reloid, ci.attnum) AS description,
+        pg_catalog.col_description(c.oid, a.attnum) AS description,
         -- 构建列的其他属性
         jsonb_build_object(
-            'is_identity', (SELECT EXISTS(
-                SELECT 1 FROM pg_catalog.pg_attribute a
-                WHERE a.attrelid = ci.reloid AND a.attname = ci.column_name AND a.attidentity != ''
-            )),
-            'is_generated', (SELECT EXISTS(
-                SELECT 1 FROM pg_catalog.pg_attribute a
-                WHERE a.attrelid = ci.reloid AND a.attname = ci.column_name AND a.attgenerated != ''
-            )),
-            'statistics_target', (SELECT attstattarget FROM pg_catalog.pg_attribute a
-                                 WHERE a.attrelid = ci.reloid AND a.attname = ci.column_name),
-            'has_default', (ci.default_value IS NOT NULL)
+            'is_identity', a.attidentity != '',
+            'is_generated', a.attgenerated != '',
+            'statistics_target', a.attstattarget,
+            'has_default', a.atthasdef
         ) AS properties
-    FROM column_info ci
-    LEFT JOIN primary_keys pk ON
-        ci.table_schema = pk.table_schema AND
-        ci.table_name = pk.table_name AND
-        ci.column_name = pk.column_name
-    LEFT JOIN unique_constraints uc ON
-        ci.table_schema = uc.table_schema AND
-        ci.table_name = uc.table_name AND
-        ci.column_name = uc.column_name
-    LEFT JOIN foreign_keys fk ON
-        ci.table_schema = fk.table_schema AND
-        ci.table_name = fk.table_name AND
-        ci.column_name = fk.column_name
-    ORDER BY ci.ordinal_position
+    FROM pg_catalog.pg_attribute a
+    JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
+    JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
+    LEFT JOIN pg_catalog.pg_attrdef ad ON ad.adrelid = a.attrelid AND ad.adnum = a.attnum
+    LEFT JOIN key_flags kf ON kf.conrelid = c.oid AND kf.attnum = a.attnum
+    LEFT JOIN foreign_keys fk ON fk.conrelid = c.oid AND fk.attnum = a.attnum
+    WHERE a.attnum > 0
+      AND NOT a.attisdropped
+      AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND n.nspname NOT LIKE 'pg_toast%' AND n.nspname NOT LIKE 'pg_temp%'
+    ORDER BY n.nspname, c.relname, a.attnum
+    """
+
+
+def _build_column_metadata(row: asyncpg.Record, object_id: int) -> ColumnMetadata:
     """
+    将列元数据查询结果行转换为 ColumnMetadata
     
-    try:
-        rows = await conn.fetch(query, schema_name, object_name)
+    Args:
+        row: 列元数据查询结果行
+        object_id: 列所属对象在元数据存储中的ID
         
-        result = []
-        for row in rows:
-            # 构建完整的数据类型定义
-            data_type = row['data_type']
-            
-            # 对于字符类型，添加长度信息
-            if row['max_length'] is not None and ('char' in data_type.lower() or 'text' in data_type.lower()):
-                if 'varying' in data_type.lower() or 'varchar' in data_type.lower():
-                    data_type = f"character varying({row['max_length']})"
-                elif 'character' in data_type.lower() and 'varying' not in data_type.lower():
-                    data_type = f"character({row['max_length']})"
-            
-            # 对于数值类型，添加精度和小数位数信息
-            if row['numeric_precision'] is not None and ('numeric' in data_type.lower() or 'decimal' in data_type.lower()):
-                if row['numeric_scale'] is not None:
-                    data_type = f"{data_type}({row['numeric_precision']},{row['numeric_scale']})"
-                else:
-                    data_type = f"{data_type}({row['numeric_precision']})"
-            
-            col_metadata = ColumnMetadata(
-                object_id=object_id,
-                column_name=row['column_name'],
-                ordinal_position=row['ordinal_position'],
-                data_type=data_type,  # 使用完整的数据类型定义
-                max_length=row['max_length'],
-                numeric_precision=row['numeric_precision'],
-                numeric_scale=row['numeric_scale'],
-                is_nullable=row['is_nullable'],
-                default_value=row['default_value'],
-                is_primary_key=row['is_primary_key'],
-                is_unique=row['is_unique'],
-                foreign_key_to_table_schema=row['foreign_key_to_table_schema'],
-                foreign_key_to_table_name=row['foreign_key_to_table_name'],
-                foreign_key_to_column_name=row['foreign_key_to_column_name'],
-                description=row['description'],
-                properties={}
-            )
-            result.append(col_metadata)
+    Returns:
+        ColumnMetadata: 列元数据
+    """
+    # 构建完整的数据类型定义
+    data_type = row['data_type']
+    
+    # 对于字符类型，添加长度信息
+    if row['max_length'] is not None and ('char' in data_type.lower() or 'text' in data_type.lower()):
+        if 'varying' in data_type.lower() or 'varchar' in data_type.lower():
+            data_type = f"character varying({row['max_length']})"
+        elif 'character' in data_type.lower() and 'varying' not in data_type.lower():
+            data_type = f"character({row['max_length']})"
+    
+    # 对于数值类型，添加精度和小数位数信息
+    if row['numeric_precision'] is not None and ('numeric' in data_type.lower() or 'decimal' in data_type.lower()):
+        if row['numeric_scale'] is not None:
+            data_type = f"{data_type}({row['numeric_precision']},{row['numeric_scale']})"
+        else:
+            data_type = f"{data_type}({row['numeric_precision']})"
+    
+    # 查询结果类型已由 asyncpg 确定，使用 model_construct 跳过逐字段校验
+    return ColumnMetadata.model_construct(
+        object_id=object_id,
+        column_name=row['column_name'],
+        ordinal_position=row['ordinal_position'],
+        data_type=data_type,  # 使用完整的数据类型定义
+        max_length=row['max_length'],
+        numeric_precision=row['numeric_precision'],
+        numeric_scale=row['numeric_scale'],
+        is_nullable=row['is_nullable'],
+        default_value=row['default_value'],
+        is_primary_key=row['is_primary_key'],
+        is_unique=row['is_unique'],
+        foreign_key_to_table_schema=row['foreign_key_to_table_schema'],
+        foreign_key_to_table_name=row['foreign_key_to_table_name'],
+        foreign_key_to_column_name=row['foreign_key_to_column_name'],
+        description=row['description']
+    )
+
+
+async def iter_all_columns_metadata(conn: asyncpg.Connection, source_config: models.DataSourceConfig,
+                                    object_ids: Dict[Tuple[str, str], int],
+                                    batch_size: int = BATCH_SIZE) -> AsyncIterator[List[ColumnMetadata]]:
+    """
+    通过服务端游标流式读取整个数据库的列元数据，按批返回
+    
+    内存中最多只保留一批列元数据，适合列数量很大的数据库。
+    
+    Args:
+        conn: 源数据库连接
+        source_config: 数据源配置
+        object_ids: (模式名称, 对象名称) -> 元数据存储中的对象ID，不在其中的对象的列会被忽略
+        batch_size: 每批的列数
         
-        logger.info(f"获取到 {schema_name}.{object_name} 的 {len(result)} 个列元数据")
-        return result
+    Yields:
+        List[ColumnMetadata]: 一批列元数据
+    """
+    logger.info(f"正在从数据源 {source_config.source_name} 获取列元数据")
+    
+    try:
+        # 服务端游标必须在事务中使用
+        async with conn.transaction():
+            batch: List[ColumnMetadata] = []
+            async for row in conn.cursor(ALL_COLUMNS_METADATA_QUERY, prefetch=batch_size):
+                object_id = object_ids.get((row['table_schema'], row['table_name']))
+                if object_id is None:
+                    continue
+                batch.append(_build_column_metadata(row, object_id))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
     except Exception as e:
-        logger.error(f"获取 {schema_name}.{object_name} 的列元数据失败: {str(e)}")
+        logger.error(f"获取列元数据失败: {str(e)}")
         raise
 
 
@@ -566,16 +785,6 @@ async def fetch_functions_metadata(conn: asyncpg.Connection, source_config: mode
     """
     logger.info(f"正在从数据源 {source_config.source_name} 获取函数元数据")
     
-    # 使用数据源配置中的数据库名称
-    db_name = source_config.database
-    logger.info(f"使用数据源配置中的数据库名称: {db_name}")
-    
-    # 如果数据源配置中没有数据库名称，则使用默认值
-    if not db_name:
-        logger.warning(f"数据源配置中没有数据库名称，使用默认值 'default_db'")
-        db_name = 'default_db'
-        db_name = 'default_db'
-    
     # 查询获取函数的元数据
     query = """
     SELECT
@@ -589,7 +798,18 @@ async def fetch_functions_metadata(conn: asyncpg.Connection, source_config: mode
             ELSE p.prokind::text
         END AS function_type,
         pg_get_function_result(p.oid) AS return_type,
-        pg_get_function_arguments(p.oid) AS arguments,
+        -- 在服务端把参数解析为 JSON 数组，避免在 Python 中按逗号/空格拆分
+        -- （numeric(10,2)、character varying 等类型会被拆错）；与 pg_get_function_arguments 一致，不含 TABLE 返回列
+        (SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'name', COALESCE(NULLIF(p.proargnames[g.i], ''), 'arg' || g.i),
+                        'type', format_type(COALESCE(p.proallargtypes[g.i], p.proargtypes[g.i - 1]), NULL),
+                        'mode', COALESCE(p.proargmodes[g.i], 'i'),
+                        'position', g.i
+                    ) ORDER BY g.i
+                )
+         FROM generate_series(1, COALESCE(array_length(p.proallargtypes, 1), p.pronargs)) AS g(i)
+         WHERE COALESCE(p.proargmodes[g.i], 'i') <> 't') AS parameters,
         -- 使用 COALESCE 处理可能的空值情况
         COALESCE(
             CASE WHEN p.prokind = 'a' THEN NULL ELSE pg_get_functiondef(p.oid) END,
@@ -612,27 +832,13 @@ async def fetch_functions_metadata(conn: asyncpg.Connection, source_config: mode
         
         result = []
         for row in rows:
-            # 将参数转换为JSON格式
-            args_str = row['arguments']
-            args_list = []
-            if args_str:
-                args_parts = args_str.split(',')
-                for i, arg in enumerate(args_parts):
-                    arg = arg.strip()
-                    if arg:
-                        parts = arg.split(' ')
-                        if len(parts) >= 2:
-                            arg_name = parts[0]
-                            arg_type = ' '.join(parts[1:])
-                            args_list.append({
-                                "name": arg_name,
-                                "type": arg_type,
-                                "position": i + 1
-                            })
+            # 参数已在服务端构造为 JSON 数组
+            args_list = _loads_json(row['parameters']) if row['parameters'] else None
             
-            func_metadata = FunctionMetadata(
+            # 查询结果类型已由 asyncpg 确定，使用 model_construct 跳过逐字段校验
+            func_metadata = FunctionMetadata.model_construct(
                 source_id=source_config.source_id,
-                database_name=db_name,  # 添加数据库名称
+                database_name=source_config.database,  # 为空时已由 DataSourceConfig 填充默认值
                 schema_name=row['schema_name'],
                 function_name=row['function_name'],
                 function_type=row['function_type'],
@@ -641,8 +847,7 @@ async def fetch_functions_metadata(conn: asyncpg.Connection, source_config: mode
                 definition=row['definition'],  # 修正列名，之前错误地使用了 'view_definition'
                 language=row['language'],
                 owner=row['owner'],
-                description=row['description'],
-                properties={}
+                description=row['description']
             )
             result.append(func_metadata)
         
@@ -669,69 +874,23 @@ async def save_objects_metadata(metadata_list: List[ObjectMetadata]) -> List[int
     
     logger.info(f"正在保存 {len(metadata_list)} 个对象元数据")
     
-    # 创建独立的数据库连接
+    # 使用元数据存储数据库连接池
     try:
-        # 使用RAW_LOGS_DSN创建连接
-        dsn = str(config.settings.RAW_LOGS_DSN)
-        conn = await asyncpg.connect(dsn=dsn)
+        # 获取元数据存储数据库连接池
+        pool = await db_utils.get_db_pool()
         
-        try:
-            object_ids = []
+        async with pool.acquire() as conn:
+            # 准备参数列表，前 5 个参数即唯一键 (source_id, database_name, schema_name, object_name, object_type)
+            params_list = [params + (_content_hash(params),) for params in map(_OBJECT_PARAMS, metadata_list)]
             
-            # 使用事务来确保原子性
-            async with conn.transaction():
-                for metadata in metadata_list:
-                    # 将 properties 转换为 JSON 格式
-                    properties_json = json.dumps(metadata.properties) if metadata.properties else None
-                    
-                    # 使用 UPSERT 操作保存元数据
-                    query = """
-                    INSERT INTO lumi_metadata_store.objects_metadata (
-                        source_id, database_name, schema_name, object_name, object_type,
-                        owner, description, definition, row_count,
-                        last_ddl_time, last_analyzed, properties,
-                        created_at, updated_at
-                    ) VALUES (
-                        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12,
-                        CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-                    )
-                    ON CONFLICT (source_id, database_name, schema_name, object_name, object_type)
-                    DO UPDATE SET
-                        object_type = $5,
-                        owner = $6,
-                        description = $7,
-                        definition = $8,
-                        row_count = $9,
-                        last_ddl_time = $10,
-                        last_analyzed = $11,
-                        properties = $12,
-                        updated_at = CURRENT_TIMESTAMP
-                    RETURNING object_id
-                    """
-                    
-                    result = await conn.fetchval(
-                        query,
-                        metadata.source_id,
-                        metadata.database_name,  # 添加数据库名称参数
-                        metadata.schema_name,
-                        metadata.object_name,
-                        metadata.object_type,
-                        metadata.owner,
-                        metadata.description,
-                        metadata.definition,
-                        metadata.row_count,
-                        metadata.last_ddl_time,
-                        metadata.last_analyzed,
-                        properties_json
-                    )
-                    
-                    object_ids.append(result)
+            object_ids = await save_metadata_to_store(
+                conn, params_list,
+                'lumi_metadata_store.objects_metadata', 'object_id',
+                OBJECT_KEY_COLUMNS, OBJECT_VALUE_COLUMNS
+            )
             
             logger.info(f"成功保存 {len(object_ids)} 个对象元数据")
             return object_ids
-        finally:
-            # 关闭连接
-            await conn.close()
     except Exception as e:
         logger.error(f"保存对象元数据失败: {str(e)}")
         raise
@@ -754,105 +913,102 @@ async def save_columns_metadata(metadata_list: List[ColumnMetadata]) -> List[int
     
     logger.info(f"正在保存 {len(metadata_list)} 个列元数据")
     
-    # 创建独立的数据库连接
+    # 使用元数据存储数据库连接池
     try:
-        # 使用RAW_LOGS_DSN创建连接
-        dsn = str(config.settings.RAW_LOGS_DSN)
-        conn = await asyncpg.connect(dsn=dsn)
+        # 获取元数据存储数据库连接池
+        pool = await db_utils.get_db_pool()
         
-        try:
-            column_ids = []
+        async with pool.acquire() as conn:
+            # 准备参数列表，前 2 个参数即唯一键 (object_id, column_name)
+            params_list = [params + (_content_hash(params),) for params in map(_COLUMN_PARAMS, metadata_list)]
             
-            for metadata in metadata_list:
-                # 使用 UPSERT 操作保存元数据
-                query = """
-                INSERT INTO lumi_metadata_store.columns_metadata (
-                    object_id, column_name, ordinal_position, data_type, max_length,
-                    numeric_precision, numeric_scale, is_nullable, default_value,
-                    is_primary_key, is_unique, foreign_key_to_table_schema,
-                    foreign_key_to_table_name, foreign_key_to_column_name,
-                    description, properties, created_at, updated_at
-                ) VALUES (
-                    $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16,
-                    CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-                )
-                ON CONFLICT (object_id, column_name)
-                DO UPDATE SET
-                    ordinal_position = $3,
-                    data_type = $4,
-                    max_length = $5,
-                    numeric_precision = $6,
-                    numeric_scale = $7,
-                    is_nullable = $8,
-                    default_value = $9,
-                    is_primary_key = $10,
-                    is_unique = $11,
-                    foreign_key_to_table_schema = $12,
-                    foreign_key_to_table_name = $13,
-                    foreign_key_to_column_name = $14,
-                    description = $15,
-                    properties = $16,
-                    updated_at = CURRENT_TIMESTAMP
-                RETURNING column_id
-                """
-                
-                # 将 properties 转换为 JSON 格式
-                properties_json = json.dumps(metadata.properties) if metadata.properties else None
-                
-                result = await conn.fetchval(
-                    query,
-                    metadata.object_id,
-                    metadata.column_name,
-                    metadata.ordinal_position,
-                    metadata.data_type,
-                    metadata.max_length,
-                    metadata.numeric_precision,
-                    metadata.numeric_scale,
-                    metadata.is_nullable,
-                    metadata.default_value,
-                    metadata.is_primary_key,
-                    metadata.is_unique,
-                    metadata.foreign_key_to_table_schema,
-                    metadata.foreign_key_to_table_name,
-                    metadata.foreign_key_to_column_name,
-                    metadata.description,
-                    properties_json
-                )
-                
-                column_ids.append(result)
+            column_ids = await save_metadata_to_store(
+                conn, params_list,
+                'lumi_metadata_store.columns_metadata', 'column_id',
+                COLUMN_KEY_COLUMNS, COLUMN_VALUE_COLUMNS
+            )
             
             logger.info(f"成功保存 {len(column_ids)} 个列元数据")
             return column_ids
-        finally:
-            # 关闭连接
-            await conn.close()
     except Exception as e:
         logger.error(f"保存列元数据失败: {str(e)}")
         raise
 
 
 
-async def save_metadata_to_store(conn: asyncpg.Connection, query: str, params_list: List[Tuple]) -> List[int]:
+async def save_metadata_to_store(conn: asyncpg.Connection, params_list: List[Tuple],
+                                 table_name: str, id_column: str,
+                                 key_columns: List[Tuple[str, str]],
+                                 value_columns: List[Tuple[str, str]]) -> List[int]:
     """
     通用函数，将元数据保存到元数据存储数据库
     
+    在一个事务内先用二进制 COPY 把整批参数写入临时暂存表，再用一条语句完成
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE 并按暂存表顺序返回全部记录ID。
+    往返次数与批大小无关。
+    
     Args:
         conn: 元数据存储数据库连接
-        query: SQL查询语句
-        params_list: 参数列表，每个元素是一组参数
+        params_list: 参数列表，每个元素是一组参数，唯一键列位于最前面，其后依次为非键列
+        table_name: 目标表名（包含schema）
+        id_column: 主键列名
+        key_columns: 唯一键列的 (列名, 类型) 列表，即 ON CONFLICT 目标
+        value_columns: 非键列的 (列名, 类型) 列表，须包含 content_hash
         
     Returns:
-        List[int]: 保存的记录ID列表
+        List[int]: 保存的记录ID列表，顺序与 params_list 一致
     """
     if not params_list:
         return []
     
-    result_ids = []
-    for params in params_list:
-        result = await conn.fetchval(query, *params)
-        result_ids.append(result)
+    # 同一批次的记录共用一个在应用端取得的时间戳，作为 created_at/updated_at 参数传入
+    now = datetime.now(timezone.utc)
+    
+    staging_table = f"_stg_{table_name.rsplit('.', 1)[-1]}"
+    column_names = [name for name, _ in key_columns + value_columns]
+    key_names = ", ".join(name for name, _ in key_columns)
+    insert_columns = ", ".join(column_names)
+    column_defs = ", ".join(f"{name} {pg_type}" for name, pg_type in key_columns + value_columns)
+    update_set = ",\n            ".join(f"{name} = EXCLUDED.{name}" for name, _ in value_columns)
+    upserted_join = " AND ".join(f"u.{name} = s.{name}" for name, _ in key_columns)
+    existing_join = " AND ".join(f"e.{name} = s.{name}" for name, _ in key_columns)
+    
+    # 同一批次内唯一键重复（如重载函数）时只保留最后一条，与逐行 UPSERT 的结果一致。
+    # 新插入或已更新的行从 RETURNING 取ID；内容未变化而跳过更新的行不会出现在
+    # RETURNING 中，其ID从语句快照中已有的记录取得
+    upsert_query = f"""
+    WITH upserted AS (
+        INSERT INTO {table_name} AS t ({insert_columns}, created_at, updated_at)
+        SELECT DISTINCT ON ({key_names}) {insert_columns}, $1::timestamptz, $1::timestamptz
+        FROM {staging_table}
+        ORDER BY {key_names}, ord DESC
+        ON CONFLICT ({key_names})
+        DO UPDATE SET
+            {update_set},
+            updated_at = $1::timestamptz
+        -- 内容未变化时跳过更新，避免无谓的索引写入和 WAL
+        WHERE t.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+        RETURNING {id_column}, {key_names}
+    )
+    SELECT COALESCE(u.{id_column}, e.{id_column})
+    FROM {staging_table} s
+    LEFT JOIN upserted u ON {upserted_join}
+    LEFT JOIN {table_name} e ON {existing_join}
+    ORDER BY s.ord
+    """
+    
+    async with conn.transaction():
+        await conn.execute(
+            f"CREATE TEMP TABLE {staging_table} (ord bigint, {column_defs}) ON COMMIT DROP"
+        )
+        await conn.copy_records_to_table(
+            staging_table,
+            records=[(ord_, *params) for ord_, params in enumerate(params_list)],
+            columns=['ord'] + column_names
+        )
+        rows = await conn.fetch(upsert_query, now)
     
-    return result_ids
+    return [row[0] for row in rows]
 
 
 async def save_functions_metadata(metadata_list: List[FunctionMetadata]) -> List[int]:
@@ -877,58 +1033,15 @@ async def save_functions_metadata(metadata_list: List[FunctionMetadata]) -> List
         pool = await db_utils.get_db_pool()
         
         async with pool.acquire() as conn:
-            # 准备参数列表
-            params_list = []
-            
-            for metadata in metadata_list:
-                # 将 properties 转换为 JSON 格式
-                properties_json = json.dumps(metadata.properties) if metadata.properties else None
-                
-                # 将参数转换为 JSON 格式
-                parameters_json = json.dumps(metadata.parameters) if metadata.parameters else None
-                
-                params = (
-                    metadata.source_id,
-                    metadata.database_name,
-                    metadata.schema_name,
-                    metadata.function_name,
-                    metadata.function_type,
-                    parameters_json,
-                    metadata.return_type,
-                    metadata.language,
-                    metadata.owner,
-                    metadata.description,
-                    metadata.definition,
-                    properties_json
-                )
-                
-                params_list.append(params)
-            
-            # 使用 UPSERT 操作保存元数据
-            query = """
-            INSERT INTO lumi_metadata_store.functions_metadata (
-                source_id, database_name, schema_name, function_name, function_type,
-                parameters, return_type, language, owner,
-                description, definition, properties, created_at, updated_at
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12,
-                CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-            )
-            ON CONFLICT (source_id, database_name, schema_name, function_name, function_type)
-            DO UPDATE SET
-                parameters = $6,
-                return_type = $7,
-                language = $8,
-                owner = $9,
-                description = $10,
-                definition = $11,
-                properties = $12,
-                updated_at = CURRENT_TIMESTAMP
-            RETURNING function_id
-            """
+            # 准备参数列表，前 5 个参数即唯一键 (source_id, database_name, schema_name, function_name, function_type)
+            params_list = [params + (_content_hash(params),) for params in map(_FUNCTION_PARAMS, metadata_list)]
             
             # 保存元数据
-            function_ids = await save_metadata_to_store(conn, query, params_list)
+            function_ids = await save_metadata_to_store(
+                conn, params_list,
+                'lumi_metadata_store.functions_metadata', 'function_id',
+                FUNCTION_KEY_COLUMNS, FUNCTION_VALUE_COLUMNS
+            )
             
             logger.info(f"成功保存 {len(function_ids)} 个函数元数据")
             return function_ids
@@ -938,91 +1051,84 @@ async def save_functions_metadata(metadata_list: List[FunctionMetadata]) -> List
 
 
 
-async def update_sync_status(sync_status: MetadataSyncStatus) -> int:
+async def update_sync_status(sync_status: MetadataSyncStatus,
+                             conn: Optional[asyncpg.Connection] = None) -> int:
     """
-    更新元数据同步状态
+    写入元数据同步状态
+    
+    开始和结束状态使用同一条 UPSERT，按 (source_id, object_type, sync_start_time) 唯一键合并
     
     Args:
         sync_status: 同步状态对象
+        conn: 可选的元数据存储数据库连接，连续写入多条状态时可复用同一连接；为空时从连接池获取
         
     Returns:
         int: 同步状态ID
     """
+    if conn is None:
+        pool = await db_utils.get_db_pool()
+        async with pool.acquire() as conn:
+            return await update_sync_status(sync_status, conn)
+    
     logger.info(f"正在更新数据源 {sync_status.source_id} 的 {sync_status.object_type} 同步状态")
     
-    # 创建独立的数据库连接
+    query = """
+    INSERT INTO lumi_metadata_store.metadata_sync_status (
+        source_id, object_type, sync_start_time, sync_end_time,
+        sync_status, items_processed, items_succeeded, items_failed,
+        error_details, sync_details, created_at, updated_at
+    ) VALUES (
+        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10,
+        CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (source_id, object_type, sync_start_time)
+    DO UPDATE SET
+        sync_end_time = EXCLUDED.sync_end_time,
+        sync_status = EXCLUDED.sync_status,
+        items_processed = EXCLUDED.items_processed,
+        items_succeeded = EXCLUDED.items_succeeded,
+        items_failed = EXCLUDED.items_failed,
+        error_details = EXCLUDED.error_details,
+        sync_details = EXCLUDED.sync_details,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING sync_id
+    """
+    
     try:
-        # 使用RAW_LOGS_DSN创建连接
-        dsn = str(config.settings.RAW_LOGS_DSN)
-        conn = await asyncpg.connect(dsn=dsn)
+        result = await conn.fetchval(
+            query,
+            sync_status.source_id,
+            sync_status.object_type,
+            sync_status.sync_start_time,
+            sync_status.sync_end_time,
+            sync_status.sync_status,
+            sync_status.items_processed,
+            sync_status.items_succeeded,
+            sync_status.items_failed,
+            sync_status.error_details,
+            sync_status.sync_details
+        )
         
-        try:
-            if sync_status.sync_id:
-                # 更新现有同步状态
-                query = """
-                UPDATE lumi_metadata_store.metadata_sync_status SET
-                    sync_end_time = $1,
-                    sync_status = $2,
-                    items_processed = $3,
-                    items_succeeded = $4,
-                    items_failed = $5,
-                    error_details = $6,
-                    sync_details = $7,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE sync_id = $8
-                RETURNING sync_id
-                """
-                
-                result = await conn.fetchval(
-                    query,
-                    sync_status.sync_end_time,
-                    sync_status.sync_status,
-                    sync_status.items_processed,
-                    sync_status.items_succeeded,
-                    sync_status.items_failed,
-                    sync_status.error_details,
-                    sync_status.sync_details,
-                    sync_status.sync_id
-                )
-            else:
-                # 创建新的同步状态
-                query = """
-                INSERT INTO lumi_metadata_store.metadata_sync_status (
-                    source_id, object_type, sync_start_time, sync_end_time,
-                    sync_status, items_processed, items_succeeded, items_failed,
-                    error_details, sync_details, created_at, updated_at
-                ) VALUES (
-                    $1, $2, $3, $4, $5, $6, $7, $8, $9, $10,
-                    CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
-                )
-                RETURNING sync_id
-                """
-                
-                result = await conn.fetchval(
-                    query,
-                    sync_status.source_id,
-                    sync_status.object_type,
-                    sync_status.sync_start_time,
-                    sync_status.sync_end_time,
-                    sync_status.sync_status,
-                    sync_status.items_processed,
-                    sync_status.items_succeeded,
-                    sync_status.items_failed,
-                    sync_status.error_details,
-                    sync_status.sync_details
-                )
-            
-            logger.info(f"成功更新同步状态，ID: {result}")
-            return result
-        finally:
-            # 关闭连接
-            await conn.close()
+        logger.info(f"成功更新同步状态，ID: {result}")
+        return result
     except Exception as e:
         logger.error(f"更新同步状态失败: {str(e)}")
         raise
 
 
-@functools.lru_cache(maxsize=32)
+async def write_sync_statuses(*sync_statuses: MetadataSyncStatus) -> None:
+    """
+    使用同一个连接池连接依次写入多条同步状态，并回填各自的同步状态ID
+    
+    Args:
+        sync_statuses: 同步状态对象
+    """
+    pool = await db_utils.get_db_pool()
+    async with pool.acquire() as conn:
+        for sync_status in sync_statuses:
+            sync_status.sync_id = await update_sync_status(sync_status, conn)
+
+
 async def get_metadata_sync_schedules_from_db() -> List[Dict[str, Any]]:
     """
     从数据库获取元数据同步调度规则
@@ -1061,8 +1167,28 @@ async def get_metadata_sync_schedules_from_db() -> List[Dict[str, Any]]:
         schedules = []
         
         for row in rows:
-            # 将密码字符串转换为 SecretStr
-            password_secret = models.SecretStr(row['db_password']) if row['db_password'] else models.SecretStr('')
+            # 连接参数未变化时复用已构建的数据源配置
+            config_hash = hashlib.blake2b(
+                repr((row['source_name'], row['db_host'], row['db_port'],
+                      row['db_user'], row['db_password'], row['db_name'])).encode(),
+                digest_size=8
+            ).digest()
+            cached_config = _source_config_cache.get(row['source_id'])
+            if cached_config is not None and cached_config[0] == config_hash:
+                source_config = cached_config[1]
+            else:
+                # 将密码字符串转换为 SecretStr
+                password_secret = models.SecretStr(row['db_password']) if row['db_password'] else models.SecretStr('')
+                source_config = models.DataSourceConfig(
+                    source_id=row['source_id'],
+                    source_name=row['source_name'],
+                    host=row['db_host'],
+                    port=row['db_port'],
+                    username=row['db_user'],
+                    password=password_secret,
+                    database=row['db_name']
+                )
+                _source_config_cache[row['source_id']] = (config_hash, source_config)
             
             schedule = {
                 'schedule_id': row['schedule_id'],
@@ -1073,52 +1199,51 @@ async def get_metadata_sync_schedules_from_db() -> List[Dict[str, Any]]:
                 'cron_expression': row['cron_expression'],
                 'last_sync_attempt_at': row['last_sync_attempt_at'],
                 'last_sync_success_at': row['last_sync_success_at'],
-                'source_config': models.DataSourceConfig(
-                    source_id=row['source_id'],
-                    source_name=row['source_name'],
-                    host=row['db_host'],
-                    port=row['db_port'],
-                    username=row['db_user'],
-                    password=password_secret,
-                    database=row['db_name']
-                )
+                'source_config': source_config
             }
             schedules.append(schedule)
         
+        # 数据源已移除或停用调度时，清理其配置缓存并关闭连接池
+        active_source_ids = {row['source_id'] for row in rows}
+        for source_id in list(_source_config_cache):
+            if source_id not in active_source_ids:
+                del _source_config_cache[source_id]
+        for source_id in [sid for sid in _source_pools if sid not in active_source_ids]:
+            await close_source_db_pool(source_id)
+        
         return schedules
 
 
 async def get_metadata_sync_schedules() -> List[Dict[str, Any]]:
     """
     从 lumi_config.source_sync_schedules 表获取元数据同步调度规则
-    使用缓存机制减少数据库查询
+    使用缓存机制减少数据库查询，并发调用时最多只有一个协程查询数据库
 
     Returns:
         List[Dict[str, Any]]: 调度规则列表
     """
-    global _schedules_cache
-
-    # 检查缓存是否有效
-    now = datetime.now()
-    if (_schedules_cache["data"] is not None and
-        _schedules_cache["timestamp"] is not None and
-        (now - _schedules_cache["timestamp"]).total_seconds() < SCHEDULES_CACHE_TTL):
-        logger.debug("使用缓存的元数据同步调度规则")
-        return _schedules_cache["data"]
-    
-    logger.info("获取元数据同步调度规则")
-    
-    # 从数据库获取调度规则
-    schedules = await get_metadata_sync_schedules_from_db()
-    
-    # 更新缓存
-    _schedules_cache["data"] = schedules
-    _schedules_cache["timestamp"] = now
-    
-    return schedules
+    async with _schedules_lock:
+        # 检查缓存是否有效
+        if (_schedules_cache["data"] is not None and
+            time.monotonic() - _schedules_cache["timestamp"] < SCHEDULES_CACHE_TTL):
+            logger.debug("使用缓存的元数据同步调度规则")
+            return _schedules_cache["data"]
+        
+        logger.info("获取元数据同步调度规则")
+        
+        # 从数据库获取调度规则
+        schedules = await get_metadata_sync_schedules_from_db()
+        
+        # 更新缓存
+        _schedules_cache["data"] = schedules
+        _schedules_cache["by_id"] = {schedule['schedule_id']: schedule for schedule in schedules}
+        _schedules_cache["timestamp"] = time.monotonic()
+        
+        return schedules
 
 
-async def update_schedule_sync_status(schedule_id: int, success: bool, message: str = None) -> None:
+async def update_schedule_sync_status(schedule_id: int, success: bool, message: str = None,
+                                      status_buffer: Optional[Dict[int, Tuple[datetime, bool, Optional[str]]]] = None) -> None:
     """
     更新调度规则的同步状态
     
@@ -1126,52 +1251,89 @@ async def update_schedule_sync_status(schedule_id: int, success: bool, message:
         schedule_id: 调度规则ID
         success: 同步是否成功
         message: 同步消息
+        status_buffer: 可选的状态缓冲区，提供时只记录状态，由调用方统一调用
+            update_schedule_sync_status_batch 批量写入
     """
-    logger.info(f"更新调度规则 {schedule_id} 的同步状态: {'SUCCESS' if success else 'FAILED'}")
-    
     now = datetime.now(timezone.utc)
-    status = "SUCCESS" if success else "FAILED"
+    if status_buffer is not None:
+        status_buffer[schedule_id] = (now, success, message)
+        return
+    
+    await update_schedule_sync_status_batch({schedule_id: (now, success, message)})
+
+
+async def update_schedule_sync_status_batch(statuses: Dict[int, Tuple[datetime, bool, Optional[str]]]) -> None:
+    """
+    用一条 UPDATE 批量更新多个调度规则的同步状态
+    
+    Args:
+        statuses: schedule_id -> (同步时间, 同步是否成功, 同步消息)
+    """
+    if not statuses:
+        return
+    
+    schedule_ids = []
+    attempt_times = []
+    sync_statuses = []
+    messages = []
+    successes = []
+    for schedule_id, (attempt_time, success, message) in statuses.items():
+        # 只有同步结果在成功/失败之间切换时才输出 INFO 日志
+        log_level = logging.DEBUG if _last_schedule_status.get(schedule_id) == success else logging.INFO
+        _last_schedule_status[schedule_id] = success
+        logger.log(log_level, f"更新调度规则 {schedule_id} 的同步状态: {'SUCCESS' if success else 'FAILED'}")
+        
+        schedule_ids.append(schedule_id)
+        attempt_times.append(attempt_time)
+        sync_statuses.append("SUCCESS" if success else "FAILED")
+        messages.append(message)
+        successes.append(success)
     
     # 使用全局连接池而不是创建新连接
     pool = await db_utils.get_db_pool()
     async with pool.acquire() as conn:
         try:
             query = """
-            UPDATE lumi_config.source_sync_schedules
-            SET last_sync_attempt_at = $1, 
-                last_sync_status = $2, 
-                last_sync_message = $3,
-                last_sync_success_at = CASE WHEN $4 THEN $1 ELSE last_sync_success_at END,
+            UPDATE lumi_config.source_sync_schedules s
+            SET last_sync_attempt_at = v.attempt_time,
+                last_sync_status = v.sync_status,
+                last_sync_message = v.message,
+                last_sync_success_at = CASE WHEN v.success THEN v.attempt_time ELSE s.last_sync_success_at END,
                 updated_at = CURRENT_TIMESTAMP
-            WHERE schedule_id = $5
+            FROM unnest($1::int[], $2::timestamptz[], $3::text[], $4::text[], $5::boolean[])
+                AS v(schedule_id, attempt_time, sync_status, message, success)
+            WHERE s.schedule_id = v.schedule_id
             """
             
-            await conn.execute(query, now, status, message, success, schedule_id)
-            
-            # 清除缓存，确保下次获取最新数据
-            if hasattr(get_metadata_sync_schedules_from_db, 'cache_clear'):
-                get_metadata_sync_schedules_from_db.cache_clear()
+            await conn.execute(query, schedule_ids, attempt_times, sync_statuses, messages, successes)
             
-            # 同时清除内存缓存
-            global _schedules_cache
-            _schedules_cache["data"] = None
-            _schedules_cache["timestamp"] = None
+            # 只更新缓存中对应调度规则的同步时间，调度规则的结构变更由缓存 TTL 到期后的全量刷新获取
+            cached_schedules = _schedules_cache["by_id"]
+            for schedule_id, attempt_time, success in zip(schedule_ids, attempt_times, successes):
+                schedule = cached_schedules.get(schedule_id)
+                if schedule is not None:
+                    schedule['last_sync_attempt_at'] = attempt_time
+                    if success:
+                        schedule['last_sync_success_at'] = attempt_time
             
         except Exception as e:
             logger.error(f"更新调度规则同步状态时出错: {str(e)}")
             raise
 
 
-async def calculate_next_run_time(sync_frequency_type: str, sync_interval_seconds: int, 
-                               cron_expression: str, from_time: datetime) -> datetime:
+def calculate_next_run_time(sync_frequency_type: str, sync_interval_seconds: int,
+                            cron_expression: str, from_time: datetime) -> datetime:
     """
     根据调度类型计算下次运行时间
     
+    cron 表达式按 from_time 所在的时区求值（调用方传入 UTC 时间，即按 UTC 求值）；
+    表达式无效时记录警告并按默认间隔（1 天）计算，避免一条错误的调度规则中断整个收集循环
+    
     Args:
         sync_frequency_type: 同步频率类型 ('interval', 'cron', 'manual')
         sync_interval_seconds: 同步间隔秒数
         cron_expression: cron 表达式
-        from_time: 起始时间
+        from_time: 起始时间，同时决定 cron 表达式的求值时区
         
     Returns:
         datetime: 下次运行时间
@@ -1179,10 +1341,23 @@ async def calculate_next_run_time(sync_frequency_type: str, sync_interval_second
     if sync_frequency_type == 'interval' and sync_interval_seconds:
         return from_time + timedelta(seconds=sync_interval_seconds)
     elif sync_frequency_type == 'cron' and cron_expression:
-        # 注意: 实际实现中应使用 croniter 等库来处理 cron 表达式
-        # 这里简化处理，返回一天后的时间
-        logger.warning(f"Cron 表达式处理未实现，使用默认间隔 (1 天): {cron_expression}")
-        return from_time + timedelta(days=1)
+        if croniter is None:
+            logger.warning(f"未安装 croniter，Cron 表达式使用默认间隔 (1 天): {cron_expression}")
+            return from_time + timedelta(days=1)
+        try:
+            cron = _cron_iterators.get(cron_expression)
+            if cron is None:
+                cron = croniter(cron_expression, from_time)
+            else:
+                cron.set_current(from_time, force=True)
+            next_run_time = cron.get_next(datetime)
+        except ValueError as e:
+            # CroniterBadCronError 等 croniter 异常均为 ValueError 的子类；无效的迭代器不缓存
+            _cron_iterators.pop(cron_expression, None)
+            logger.warning(f"无效的 Cron 表达式 {cron_expression}: {str(e)}，使用默认间隔 (1 天)")
+            return from_time + timedelta(days=1)
+        _cron_iterators[cron_expression] = cron
+        return next_run_time
     elif sync_frequency_type == 'manual':
         # 手动模式下，返回远期时间
         return from_time + timedelta(days=365)
@@ -1196,23 +1371,44 @@ async def process_metadata_collection(interval_seconds: int = 86400, run_once: b
     """
     处理元数据收集
     
+    每轮执行所有已到期的调度规则，然后等待到最早的下次运行时间（不超过检查间隔）。
+    调度规则在外部修改后，最迟在调度规则缓存过期后的下一轮检查中生效
+    
     Args:
-        interval_seconds: 检查间隔时间（秒），默认为86400秒（1天）
+        interval_seconds: 最长检查间隔时间（秒），默认为86400秒（1天）
         run_once: 是否只运行一次
     """
+    global _last_schedule_count
+    
     logger.info(f"启动元数据收集服务，检查间隔: {interval_seconds}秒，{'单次运行' if run_once else '持续运行'}")
     
     try:
         while True:
             now = datetime.now(timezone.utc)
-            logger.info(f"检查元数据同步调度规则，当前时间: {now}")
+            logger.debug(f"检查元数据同步调度规则，当前时间: {now}")
             
             # 获取调度规则
             schedules = await get_metadata_sync_schedules()
-            logger.info(f"找到 {len(schedules)} 个启用的元数据同步调度规则")
+            # 调度规则数量变化（新增或移除）时才输出 INFO 日志
+            log_level = logging.DEBUG if len(schedules) == _last_schedule_count else logging.INFO
+            _last_schedule_count = len(schedules)
+            logger.log(log_level, f"找到 {len(schedules)} 个启用的元数据同步调度规则")
+            
+            # 并行处理每个调度规则，信号量限制同时收集的数据源数量；
+            # 各数据源的调度状态先写入缓冲区，本轮结束后用一条 UPDATE 批量写入
+            semaphore = asyncio.Semaphore(COLLECTION_CONCURRENCY)
+            status_buffer: Dict[int, Tuple[datetime, bool, Optional[str]]] = {}
+            
+            async def process_with_limit(schedule_id: int, source_config: models.DataSourceConfig) -> None:
+                async with semaphore:
+                    await process_single_source(schedule_id, source_config, status_buffer)
             
-            # 并行处理每个调度规则
             tasks = []
+            dispatched = []
+            # 本轮的下次运行时间计算结果，只保留当前存在的调度规则
+            next_run_times: Dict[int, Tuple[Tuple[Any, ...], datetime]] = {}
+            # 未到期调度规则的下次运行时间
+            pending_runs: List[datetime] = []
             for schedule in schedules:
                 schedule_id = schedule['schedule_id']
                 source_config = schedule['source_config']
@@ -1221,38 +1417,67 @@ async def process_metadata_collection(interval_seconds: int = 86400, run_once: b
                 sync_interval_seconds = schedule.get('sync_interval_seconds', 86400)
                 cron_expression = schedule.get('cron_expression', '')
                 
-                # 如果有上次成功同步时间，计算下次应该同步的时间
+                # 如果有上次成功同步时间，计算下次应该同步的时间；调度参数和上次成功时间
+                # 都未变化时沿用上一轮的计算结果
                 should_sync = True
                 if last_sync_success_at:
-                    next_run_time = await calculate_next_run_time(
-                        sync_frequency_type, sync_interval_seconds, cron_expression, last_sync_success_at
-                    )
+                    run_key = (sync_frequency_type, sync_interval_seconds, cron_expression, last_sync_success_at)
+                    cached_run = _next_run_times.get(schedule_id)
+                    if cached_run is not None and cached_run[0] == run_key:
+                        next_run_time = cached_run[1]
+                    else:
+                        next_run_time = calculate_next_run_time(
+                            sync_frequency_type, sync_interval_seconds, cron_expression, last_sync_success_at
+                        )
+                    next_run_times[schedule_id] = (run_key, next_run_time)
                     should_sync = now >= next_run_time
                 
                 # 如果应该同步，创建异步任务执行元数据收集
                 if should_sync:
                     task = asyncio.create_task(
-                        process_single_source(schedule_id, source_config)
+                        process_with_limit(schedule_id, source_config)
                     )
                     tasks.append(task)
+                    dispatched.append(schedule)
                 else:
-                    next_run_time = await calculate_next_run_time(
-                        sync_frequency_type, sync_interval_seconds, cron_expression, last_sync_success_at
-                    )
-                    logger.info(f"数据源 {source_config.source_name} 的元数据收集还不需要运行，下次运行时间: {next_run_time}")
+                    pending_runs.append(next_run_time)
+                    logger.debug(f"数据源 {source_config.source_name} 的元数据收集还不需要运行，下次运行时间: {next_run_time}")
+            
+            _next_run_times.clear()
+            _next_run_times.update(next_run_times)
             
             # 等待所有任务完成
             if tasks:
                 await asyncio.gather(*tasks, return_exceptions=True)
             
+            # 批量写入本轮的调度状态
+            try:
+                await update_schedule_sync_status_batch(status_buffer)
+            except Exception as e:
+                logger.error(f"批量更新调度规则同步状态失败: {str(e)}")
+            
             # 如果只运行一次，则退出循环
             if run_once:
                 logger.info("单次运行模式，元数据收集完成")
                 break
             
-            # 等待下一次检查
-            logger.info(f"等待 {interval_seconds} 秒后进行下一次检查")
-            await asyncio.sleep(interval_seconds)
+            # 本轮执行过的调度规则从完成时刻起计算下次运行时间（失败时同样按间隔重试）
+            finished_at = datetime.now(timezone.utc)
+            for schedule in dispatched:
+                next_run_time = calculate_next_run_time(
+                    schedule.get('sync_frequency_type', 'interval'),
+                    schedule.get('sync_interval_seconds', 86400),
+                    schedule.get('cron_expression', ''),
+                    finished_at
+                )
+                pending_runs.append(next_run_time)
+            
+            # 等待到最早的下次运行时间，最长不超过检查间隔
+            wait_seconds = interval_seconds
+            if pending_runs:
+                wait_seconds = min(wait_seconds, max(0.0, (min(pending_runs) - finished_at).total_seconds()))
+            logger.debug(f"等待 {wait_seconds:.0f} 秒后进行下一次检查")
+            await asyncio.sleep(wait_seconds)
     
     except asyncio.CancelledError:
         logger.info("元数据收集服务任务被取消")
@@ -1260,15 +1485,20 @@ async def process_metadata_collection(interval_seconds: int = 86400, run_once: b
     except Exception as e:
         logger.error(f"元数据收集服务出错: {str(e)}")
         raise
+    finally:
+        # 服务退出时关闭所有源数据库连接池
+        await close_source_db_pools()
 
 
-async def process_single_source(schedule_id: int, source_config: models.DataSourceConfig) -> None:
+async def process_single_source(schedule_id: int, source_config: models.DataSourceConfig,
+                                status_buffer: Optional[Dict[int, Tuple[datetime, bool, Optional[str]]]] = None) -> None:
     """
     处理单个数据源的元数据收集
     
     Args:
         schedule_id: 调度规则ID
         source_config: 数据源配置
+        status_buffer: 可选的调度状态缓冲区，提供时同步状态只写入缓冲区，由调用方批量写入数据库
     """
     logger.info(f"开始执行数据源 {source_config.source_name} 的元数据收集")
     
@@ -1279,15 +1509,15 @@ async def process_single_source(schedule_id: int, source_config: models.DataSour
         # 更新调度规则的同步状态
         if success:
             logger.info(f"数据源 {source_config.source_name} 的元数据收集成功")
-            await update_schedule_sync_status(schedule_id, True, "元数据收集成功")
+            await update_schedule_sync_status(schedule_id, True, "元数据收集成功", status_buffer)
         else:
             logger.error(f"数据源 {source_config.source_name} 的元数据收集失败: {error_message}")
-            await update_schedule_sync_status(schedule_id, False, f"元数据收集失败: {error_message}")
+            await update_schedule_sync_status(schedule_id, False, f"元数据收集失败: {error_message}", status_buffer)
     
     except Exception as e:
         error_msg = f"处理数据源 {source_config.source_name} 的元数据收集时出错: {str(e)}"
         logger.error(error_msg)
-        await update_schedule_sync_status(schedule_id, False, error_msg)
+        await update_schedule_sync_status(schedule_id, False, error_msg, status_buffer)
 
 
 async def collect_metadata_for_source(source_config: models.DataSourceConfig) -> Tuple[bool, str]:
@@ -1302,8 +1532,8 @@ async def collect_metadata_for_source(source_config: models.DataSourceConfig) ->
     """
     logger.info(f"开始为数据源 {source_config.source_name} 收集元数据")
     
-    # 初始化同步状态
-    now = datetime.now()
+    # 初始化同步状态，两条同步状态使用同一个开始时间
+    now = datetime.now(timezone.utc)
     
     # 对象元数据同步状态
     objects_sync_status = MetadataSyncStatus(
@@ -1312,8 +1542,6 @@ async def collect_metadata_for_source(source_config: models.DataSourceConfig) ->
         sync_start_time=now,
         sync_status="RUNNING"
     )
-    objects_sync_id = await update_sync_status(objects_sync_status)
-    objects_sync_status.sync_id = objects_sync_id
     
     # 函数元数据同步状态
     functions_sync_status = MetadataSyncStatus(
@@ -1322,109 +1550,132 @@ async def collect_metadata_for_source(source_config: models.DataSourceConfig) ->
         sync_start_time=now,
         sync_status="RUNNING"
     )
-    functions_sync_id = await update_sync_status(functions_sync_status)
-    functions_sync_status.sync_id = functions_sync_id
     
-    try:
-        # 连接到源数据库
-        conn = await get_source_db_connection(source_config)
+    # 两条初始状态复用同一个连接写入
+    await write_sync_statuses(objects_sync_status, functions_sync_status)
+    
+    async def collect_objects(conn: asyncpg.Connection) -> None:
+        """收集并保存对象及其列的元数据"""
+        # 获取对象元数据
+        objects_metadata = await fetch_objects_metadata(conn, source_config)
+        objects_sync_status.items_processed = len(objects_metadata)
+        
+        # 批量保存对象元数据
+        object_ids = await save_objects_metadata(objects_metadata)
+        objects_sync_status.items_succeeded = len(object_ids)
+        
+        # 获取并保存列元数据：一次查询取回所有对象的列，按 (模式, 对象名) 关联到对象ID，
+        # 通过游标边读边按批保存，不在内存中保留全部列。批次保存在后台任务中进行，
+        # 与游标读取下一批重叠，在途批次数受信号量限制
+        columns_count = 0
+        columns_success = 0
+        columns_errors = []
+        save_semaphore = asyncio.Semaphore(COLUMN_SAVE_CONCURRENCY)
+        save_tasks = []
+        
+        async def save_columns_batch(columns_metadata: List[ColumnMetadata]) -> int:
+            try:
+                return len(await save_columns_metadata(columns_metadata))
+            finally:
+                save_semaphore.release()
         
+        object_id_map = {
+            (obj_metadata.schema_name, obj_metadata.object_name): object_id
+            for obj_metadata, object_id in zip(objects_metadata, object_ids)
+            if obj_metadata.object_type in ('TABLE', 'VIEW', 'MATERIALIZED VIEW')
+        }
         try:
-            # 获取对象元数据
-            objects_metadata = await fetch_objects_metadata(conn, source_config)
-            objects_sync_status.items_processed = len(objects_metadata)
-            
-            # 批量保存对象元数据
-            object_ids = await save_objects_metadata(objects_metadata)
-            objects_sync_status.items_succeeded = len(object_ids)
-            
-            # 获取并保存列元数据
-            columns_count = 0
-            columns_success = 0
-            
-            for i, obj_metadata in enumerate(objects_metadata):
-                if obj_metadata.object_type in ('TABLE', 'VIEW', 'MATERIALIZED VIEW'):
-                    try:
-                        columns_metadata = await fetch_columns_metadata(
-                            conn, 
-                            object_ids[i], 
-                            obj_metadata.schema_name, 
-                            obj_metadata.object_name,
-                            source_config
-                        )
-                        
-                        columns_count += len(columns_metadata)
-                        # 批量保存列元数据
-                        column_ids = await save_columns_metadata(columns_metadata)
-                        columns_success += len(column_ids)
-                    except Exception as e:
-                        logger.error(f"处理 {obj_metadata.schema_name}.{obj_metadata.object_name} 的列元数据时出错: {str(e)}")
-                        objects_sync_status.items_failed += 1
-            
-            # 更新对象同步状态
-            objects_sync_status.sync_end_time = datetime.now()
+            async for columns_metadata in iter_all_columns_metadata(conn, source_config, object_id_map):
+                columns_count += len(columns_metadata)
+                # 批量保存列元数据
+                await save_semaphore.acquire()
+                save_tasks.append(asyncio.create_task(save_columns_batch(columns_metadata)))
+        except Exception as e:
+            logger.error(f"处理数据源 {source_config.source_name} 的列元数据时出错: {str(e)}")
+            columns_errors.append(f"读取列元数据时出错: {str(e)}")
+        
+        for result in await asyncio.gather(*save_tasks, return_exceptions=True):
+            if isinstance(result, BaseException):
+                logger.error(f"保存数据源 {source_config.source_name} 的列元数据时出错: {str(result)}")
+                columns_errors.append(f"保存列元数据时出错: {str(result)}")
+            else:
+                columns_success += result
+        
+        # 更新对象同步状态：对象已保存但有列元数据读取或保存失败时标记为部分完成
+        objects_sync_status.sync_end_time = datetime.now(timezone.utc)
+        objects_sync_status.items_failed = objects_sync_status.items_processed - objects_sync_status.items_succeeded
+        if columns_errors:
+            objects_sync_status.sync_status = "PARTIAL"
+            objects_sync_status.error_details = "; ".join(columns_errors)
+        else:
             objects_sync_status.sync_status = "COMPLETED"
-            objects_sync_status.items_failed = objects_sync_status.items_processed - objects_sync_status.items_succeeded
-            await update_sync_status(objects_sync_status)
-            
-            logger.info(f"对象元数据同步完成: 处理 {objects_sync_status.items_processed} 个对象，成功 {objects_sync_status.items_succeeded} 个")
-            logger.info(f"列元数据同步完成: 处理 {columns_count} 个列，成功 {columns_success} 个")
-            
-            # 获取函数元数据
-            functions_metadata = await fetch_functions_metadata(conn, source_config)
-            functions_sync_status.items_processed = len(functions_metadata)
-            
-            # 保存函数元数据
-            function_ids = await save_functions_metadata(functions_metadata)
-            functions_sync_status.items_succeeded = len(function_ids)
-            
-            # 更新函数同步状态
-            functions_sync_status.sync_end_time = datetime.now()
-            functions_sync_status.sync_status = "COMPLETED"
-            functions_sync_status.items_failed = functions_sync_status.items_processed - functions_sync_status.items_succeeded
-            await update_sync_status(functions_sync_status)
-            
-            logger.info(f"函数元数据同步完成: 处理 {functions_sync_status.items_processed} 个函数，成功 {functions_sync_status.items_succeeded} 个")
-            
-            return True, ""
+        await update_sync_status(objects_sync_status)
         
-        except Exception as e:
-            error_msg = f"处理数据源 {source_config.source_name} 的元数据时出错: {str(e)}"
-            logger.error(error_msg)
-            
-            # 更新同步状态为失败
-            now = datetime.now()
-            
-            objects_sync_status.sync_end_time = now
-            objects_sync_status.sync_status = "FAILED"
-            objects_sync_status.error_details = error_msg
-            await update_sync_status(objects_sync_status)
-            
-            functions_sync_status.sync_end_time = now
-            functions_sync_status.sync_status = "FAILED"
-            functions_sync_status.error_details = error_msg
-            await update_sync_status(functions_sync_status)
-            
-            return False, error_msg
-        finally:
-            # 关闭数据库连接
-            await conn.close()
+        logger.info(f"对象元数据同步完成: 处理 {objects_sync_status.items_processed} 个对象，成功 {objects_sync_status.items_succeeded} 个")
+        logger.info(f"列元数据同步完成: 处理 {columns_count} 个列，成功 {columns_success} 个")
+    
+    async def collect_functions(conn: asyncpg.Connection) -> None:
+        """收集并保存函数元数据"""
+        # 获取函数元数据
+        functions_metadata = await fetch_functions_metadata(conn, source_config)
+        functions_sync_status.items_processed = len(functions_metadata)
+        
+        # 保存函数元数据
+        function_ids = await save_functions_metadata(functions_metadata)
+        functions_sync_status.items_succeeded = len(function_ids)
+        
+        # 更新函数同步状态
+        functions_sync_status.sync_end_time = datetime.now(timezone.utc)
+        functions_sync_status.sync_status = "COMPLETED"
+        functions_sync_status.items_failed = functions_sync_status.items_processed - functions_sync_status.items_succeeded
+        await update_sync_status(functions_sync_status)
+        
+        logger.info(f"函数元数据同步完成: 处理 {functions_sync_status.items_processed} 个函数，成功 {functions_sync_status.items_succeeded} 个")
+    
+    try:
+        # 对象和函数元数据互不依赖，各自从源数据库连接池取一个连接并行收集
+        source_pool = await get_source_db_pool(source_config)
+        async with source_pool.acquire() as objects_conn, source_pool.acquire() as functions_conn:
+            results = await asyncio.gather(
+                collect_objects(objects_conn),
+                collect_functions(functions_conn),
+                return_exceptions=True
+            )
     
     except Exception as e:
         error_msg = f"连接数据源 {source_config.source_name} 时出错: {str(e)}"
         logger.error(error_msg)
         
-        # 更新同步状态为失败
-        now = datetime.now()
+        # 更新同步状态为失败，两条同步状态使用同一个结束时间
+        end_time = datetime.now(timezone.utc)
         
-        objects_sync_status.sync_end_time = now
-        objects_sync_status.sync_status = "FAILED"
-        objects_sync_status.error_details = error_msg
-        await update_sync_status(objects_sync_status)
-        
-        functions_sync_status.sync_end_time = now
-        functions_sync_status.sync_status = "FAILED"
-        functions_sync_status.error_details = error_msg
-        await update_sync_status(functions_sync_status)
+        for sync_status in (objects_sync_status, functions_sync_status):
+            sync_status.sync_end_time = end_time
+            sync_status.sync_status = "FAILED"
+            sync_status.error_details = error_msg
+        await write_sync_statuses(objects_sync_status, functions_sync_status)
         
-        return False, error_msg
\ No newline at end of file
+        return False, error_msg
+    
+    # 两个阶段分别记录结果，只把出错的阶段标记为失败，另一阶段保留已写入的状态
+    end_time = datetime.now(timezone.utc)
+    failed_statuses = []
+    error_msgs = []
+    for sync_status, result in zip((objects_sync_status, functions_sync_status), results):
+        if isinstance(result, BaseException):
+            error_msg = f"处理数据源 {source_config.source_name} 的 {sync_status.object_type} 元数据时出错: {str(result)}"
+            logger.error(error_msg)
+            sync_status.sync_end_time = end_time
+            sync_status.sync_status = "FAILED"
+            sync_status.error_details = error_msg
+            failed_statuses.append(sync_status)
+            error_msgs.append(error_msg)
+        elif sync_status.sync_status != "COMPLETED":
+            error_msgs.append(f"数据源 {source_config.source_name} 的 {sync_status.object_type} 元数据部分同步失败: {sync_status.error_details}")
+    
+    if failed_statuses:
+        await write_sync_statuses(*failed_statuses)
+    
+    if error_msgs:
+        return False, "; ".join(error_msgs)
+    return True, ""
\ No newline at end of file
@@ -14,13 +14,20 @@ PGLumiLineage LLM分析器调度器
 
 import asyncio
 import argparse
+import functools
+import json
 import logging
 import os
 import signal
 import sys
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json 模块
+    orjson = None
+
 from pglumilineage.common.logging_config import setup_logging
 from pglumilineage.common import db_utils
 from pglumilineage.llm_analyzer import service as llm_analyzer_service
@@ -32,6 +39,9 @@ logger = logging.getLogger(__name__)
 # 全局任务列表
 tasks: List[asyncio.Task] = []
 
+# 信号触发的关闭任务，保留引用避免任务在运行中被垃圾回收
+_shutdown_task: Optional[asyncio.Task] = None
+
 # 定义输出目录结构
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
 LLM_DATA_DIR = os.path.join(DATA_DIR, "llm")
@@ -41,9 +51,56 @@ METADATA_DIR = os.path.join(LLM_DATA_DIR, "metadata")
 RELATIONS_DIR = os.path.join(LLM_DATA_DIR, "relations")
 DEBUG_DIR = os.path.join(LLM_DATA_DIR, "debug")
 
-# 确保目录存在
-for directory in [PROMPTS_DIR, RESPONSES_DIR, METADATA_DIR, RELATIONS_DIR, DEBUG_DIR]:
-    os.makedirs(directory, exist_ok=True)
+
+@functools.cache
+def _ensure_llm_dirs() -> None:
+    """
+    确保输出目录存在，仅在需要写入分析产物时调用，每个进程只创建一次
+    """
+    for directory in [PROMPTS_DIR, RESPONSES_DIR, METADATA_DIR, RELATIONS_DIR, DEBUG_DIR]:
+        os.makedirs(directory, exist_ok=True)
+
+
+def _write_json_file(path: str, obj: object) -> None:
+    """
+    将对象以缩进格式写入 JSON 文件，优先使用 orjson 序列化
+    
+    Args:
+        path: 文件路径
+        obj: 要写入的对象
+    """
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_text_file(path: str, text: str) -> None:
+    """
+    将文本写入文件
+    
+    Args:
+        path: 文件路径
+        text: 要写入的文本
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+async def _save_artifact(write_func: Callable[[str, Any], None], path: str, content: Any, description: str) -> None:
+    """
+    在线程中写入分析产物文件，避免阻塞事件循环
+    
+    Args:
+        write_func: 文件写入函数
+        path: 文件路径
+        content: 要写入的内容
+        description: 产物描述，用于日志
+    """
+    await asyncio.to_thread(write_func, path, content)
+    logger.info(f"{description}已保存到文件: {path}")
 
 
 async def start_llm_analyzer(batch_size: int = 10, interval_seconds: int = 300, run_once: bool = False) -> asyncio.Task:
@@ -75,9 +132,9 @@ async def start_llm_analyzer(batch_size: int = 10, interval_seconds: int = 300,
     return task
 
 
-def shutdown(sig: signal.Signals) -> None:
+async def shutdown(sig: signal.Signals) -> None:
     """
-    优雅关闭所有服务
+    优雅关闭所有服务：取消并等待所有任务结束，数据库连接池由 main() 统一关闭
     
     Args:
         sig: 触发关闭的信号
@@ -85,16 +142,29 @@ def shutdown(sig: signal.Signals) -> None:
     logger.info(f"收到信号 {sig.name}，开始优雅关闭...")
     
     # 取消所有任务
-    for task in tasks:
-        if not task.done():
-            task.cancel()
+    pending = [task for task in tasks if not task.done()]
+    for task in pending:
+        task.cancel()
     
-    # 关闭数据库连接池
-    asyncio.create_task(db_utils.close_db_pool())
+    # 等待所有任务完成
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
     
     logger.info("所有服务已关闭")
 
 
+def _request_shutdown(sig: signal.Signals) -> None:
+    """
+    信号处理器：在事件循环中调度异步关闭，重复收到信号时不重复创建关闭任务
+    
+    Args:
+        sig: 触发关闭的信号
+    """
+    global _shutdown_task
+    if _shutdown_task is None or _shutdown_task.done():
+        _shutdown_task = asyncio.create_task(shutdown(sig))
+
+
 async def main() -> None:
     """
     主函数
@@ -111,13 +181,15 @@ async def main() -> None:
         # 初始化数据库连接池
         await db_utils.init_db_pool()
         
-        # 注册信号处理器
-        for sig in [signal.SIGINT, signal.SIGTERM]:
-            signal.signal(sig, lambda s, _: asyncio.create_task(asyncio.shield(asyncio.to_thread(shutdown, s))))
+        # 注册信号处理器：在事件循环中调度异步关闭，避免在信号上下文中创建任务
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, _request_shutdown, sig)
         
         # 如果指定了SQL哈希，则只分析该SQL模式
         if args.analyze_sql:
             logger.info(f"分析指定的SQL模式: {args.analyze_sql}")
+            _ensure_llm_dirs()
             # 从数据库获取SQL模式
             query = """
             SELECT 
@@ -164,79 +236,81 @@ async def main() -> None:
                 # 获取元数据上下文
                 metadata_context = await llm_analyzer_service.fetch_metadata_context_for_sql(sql_pattern)
                 
-                # 保存元数据上下文到文件
+                # 分析产物的文件写入在后台执行，不阻塞 LLM 调用和后续处理，结束前统一等待
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                metadata_file = os.path.join(METADATA_DIR, f"{sql_pattern.sql_hash[:8]}_{timestamp}.json")
-                with open(metadata_file, "w", encoding="utf-8") as f:
-                    import json
-                    json.dump(metadata_context, f, indent=2, ensure_ascii=False)
-                
-                logger.info(f"元数据上下文已保存到文件: {metadata_file}")
-                
-                # 确定SQL模式类型
-                sql_mode = "INSERT"  # 默认值
-                if sql_pattern.normalized_sql_text.strip().upper().startswith("SELECT"):
-                    sql_mode = "SELECT"
-                elif sql_pattern.normalized_sql_text.strip().upper().startswith("UPDATE"):
-                    sql_mode = "UPDATE"
-                elif sql_pattern.normalized_sql_text.strip().upper().startswith("DELETE"):
-                    sql_mode = "DELETE"
-                elif sql_pattern.normalized_sql_text.strip().upper().startswith("INSERT"):
-                    sql_mode = "INSERT"
-                
-                logger.info(f"SQL模式类型: {sql_mode}")
-                
-                # 构造LLM的prompt
-                messages = llm_analyzer_service.construct_prompt_for_qwen(
-                    sql_mode=sql_mode,
-                    sample_sql=sql_pattern.sample_raw_sql_text,
-                    metadata_context=metadata_context,
-                    sql_hash=sql_pattern.sql_hash
-                )
-                
-                # 保存prompt到文件
-                prompt_file = os.path.join(PROMPTS_DIR, f"{sql_pattern.sql_hash[:8]}_{timestamp}.json")
-                with open(prompt_file, "w", encoding="utf-8") as f:
-                    json.dump(messages, f, indent=2, ensure_ascii=False)
-                
-                logger.info(f"LLM prompt已保存到文件: {prompt_file}")
-                
-                # 调用LLM API
-                response_content = await llm_analyzer_service.call_qwen_api(messages)
-                
-                if not response_content:
-                    logger.error("LLM API调用失败，未获取到响应内容")
-                    return
-                
-                # 保存LLM响应内容到文件
-                response_file = os.path.join(RESPONSES_DIR, f"{sql_pattern.sql_hash[:8]}_{timestamp}.txt")
-                with open(response_file, "w", encoding="utf-8") as f:
-                    f.write(response_content)
-                
-                logger.info(f"LLM响应内容已保存到文件: {response_file}")
-                
-                # 解析LLM响应内容，提取实体关系
-                relations_json = llm_analyzer_service.parse_llm_response(response_content)
-                
-                if not relations_json:
-                    logger.error("解析LLM响应内容失败，未获取到实体关系")
-                    return
-                
-                # 保存实体关系到文件
-                relations_file = os.path.join(RELATIONS_DIR, f"{sql_pattern.sql_hash[:8]}_{timestamp}.json")
-                with open(relations_file, "w", encoding="utf-8") as f:
-                    json.dump(relations_json, f, indent=2, ensure_ascii=False)
-                
-                logger.info(f"实体关系已保存到文件: {relations_file}")
-                
-                # 更新SQL模式的分析结果
-                await llm_analyzer_service.update_sql_pattern_analysis_result(
-                    sql_hash=sql_pattern.sql_hash,
-                    status="COMPLETED",
-                    relations_json=relations_json
-                )
+                file_prefix = f"{sql_pattern.sql_hash[:8]}_{timestamp}"
+                write_tasks: List[asyncio.Task] = []
                 
-                logger.info(f"已更新SQL模式 {sql_pattern.sql_hash[:8]}... 的分析结果")
+                try:
+                    # 保存元数据上下文到文件
+                    metadata_file = os.path.join(METADATA_DIR, f"{file_prefix}.json")
+                    write_tasks.append(asyncio.create_task(
+                        _save_artifact(_write_json_file, metadata_file, metadata_context, "元数据上下文")
+                    ))
+                    
+                    # 确定SQL模式类型：只取开头的关键字大写一次，默认值为 INSERT
+                    head = sql_pattern.normalized_sql_text.lstrip()[:6].upper()
+                    sql_mode = next(
+                        (mode for mode in ("SELECT", "UPDATE", "DELETE", "INSERT") if head.startswith(mode)),
+                        "INSERT"
+                    )
+                    
+                    logger.info(f"SQL模式类型: {sql_mode}")
+                    
+                    # 构造LLM的prompt
+                    messages = llm_analyzer_service.construct_prompt_for_qwen(
+                        sql_mode=sql_mode,
+                        sample_sql=sql_pattern.sample_raw_sql_text,
+                        metadata_context=metadata_context,
+                        sql_hash=sql_pattern.sql_hash
+                    )
+                    
+                    # prompt 构造完成后立即调用LLM API，同时保存prompt到文件
+                    response_task = asyncio.create_task(llm_analyzer_service.call_qwen_api(messages))
+                    prompt_file = os.path.join(PROMPTS_DIR, f"{file_prefix}.json")
+                    write_tasks.append(asyncio.create_task(
+                        _save_artifact(_write_json_file, prompt_file, messages, "LLM prompt")
+                    ))
+                    
+                    response_content = await response_task
+                    
+                    if not response_content:
+                        logger.error("LLM API调用失败，未获取到响应内容")
+                        return
+                    
+                    # 保存LLM响应内容到文件
+                    response_file = os.path.join(RESPONSES_DIR, f"{file_prefix}.txt")
+                    write_tasks.append(asyncio.create_task(
+                        _save_artifact(_write_text_file, response_file, response_content, "LLM响应内容")
+                    ))
+                    
+                    # 解析LLM响应内容，提取实体关系
+                    relations_json = llm_analyzer_service.parse_llm_response(response_content)
+                    
+                    if not relations_json:
+                        logger.error("解析LLM响应内容失败，未获取到实体关系")
+                        return
+                    
+                    # 保存实体关系到文件
+                    relations_file = os.path.join(RELATIONS_DIR, f"{file_prefix}.json")
+                    write_tasks.append(asyncio.create_task(
+                        _save_artifact(_write_json_file, relations_file, relations_json, "实体关系")
+                    ))
+                    
+                    # 更新SQL模式的分析结果
+                    await llm_analyzer_service.update_sql_pattern_analysis_result(
+                        sql_hash=sql_pattern.sql_hash,
+                        status="COMPLETED",
+                        relations_json=relations_json
+                    )
+                    
+                    logger.info(f"已更新SQL模式 {sql_pattern.sql_hash[:8]}... 的分析结果")
+                finally:
+                    # 等待所有文件写入完成
+                    results = await asyncio.gather(*write_tasks, return_exceptions=True)
+                    for result in results:
+                        if isinstance(result, BaseException):
+                            logger.error(f"保存分析产物文件时出错: {str(result)}")
         else:
             # 启动LLM分析服务
             await start_llm_analyzer(
@@ -255,7 +329,9 @@ async def main() -> None:
         import traceback
         logger.error(traceback.format_exc())
     finally:
-        # 关闭数据库连接池
+        # 信号触发的关闭完成（所有任务已结束）后再关闭数据库连接池，连接池只在这里关闭
+        if _shutdown_task is not None:
+            await asyncio.gather(_shutdown_task, return_exceptions=True)
         await db_utils.close_db_pool()
 
 
@@ -21,7 +21,7 @@ import logging
 import signal
 import sys
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional, Set, Tuple
 
 from pglumilineage.common.logging_config import setup_logging
@@ -35,8 +35,8 @@ logger = logging.getLogger(__name__)
 # 全局任务列表
 tasks: List[asyncio.Task] = []
 
-# 调度规则缓存
-schedule_cache: Dict[str, Dict[str, Any]] = {
+# 调度规则缓存，data 为 数据源名称 -> 调度规则（asyncpg Record 或 dict），timestamp 为 time.monotonic() 时间戳
+schedule_cache: Dict[str, Any] = {
     "data": {},
     "timestamp": None
 }
@@ -44,197 +44,174 @@ schedule_cache: Dict[str, Dict[str, Any]] = {
 # 调度规则缓存过期时间（秒）
 SCHEDULE_CACHE_TTL = 300  # 5分钟
 
+# 连接池中为调度器自身（调度规则刷新、同步状态写入）预留的连接数
+SCHEDULER_POOL_OVERHEAD = 2
 
-async def get_sync_schedules() -> List[Dict[str, Any]]:
+# 缓存过期后先返回旧数据，同时在后台刷新；锁保证并发刷新只查询一次数据库
+_refresh_lock = asyncio.Lock()
+_refresh_task: Optional[asyncio.Task] = None
+
+
+# 已确认存在的表 (schema, 表名)，表存在后不再重复查询 information_schema；
+# 不缓存表不存在的结果，以便表在运行期间被创建后能被发现
+_tables_checked: Set[Tuple[str, str]] = set()
+_tables_lock = asyncio.Lock()
+
+
+async def _ensure_table(conn: Any, schema: str, name: str) -> bool:
     """
-    从内部数据库获取日志同步调度规则
-    使用缓存机制减少数据库查询
+    检查表是否存在，存在的结果在进程内缓存
     
+    Args:
+        conn: 数据库连接
+        schema: schema 名称
+        name: 表名称
+        
     Returns:
-        List[Dict[str, Any]]: 调度规则列表
+        bool: 表是否存在
     """
-    global schedule_cache
+    key = (schema, name)
+    if key in _tables_checked:
+        return True
     
-    # 检查缓存是否有效
-    now = datetime.now()
-    if (schedule_cache["timestamp"] is not None and 
-        (now - schedule_cache["timestamp"]).total_seconds() < SCHEDULE_CACHE_TTL and
-        schedule_cache["data"]):
-        logger.debug("使用缓存的调度规则配置")
-        return list(schedule_cache["data"].values())
+    async with _tables_lock:
+        if key in _tables_checked:
+            return True
+        
+        check_table_query = """
+        SELECT EXISTS (
+            SELECT FROM information_schema.tables 
+            WHERE table_schema = $1 
+            AND table_name = $2
+        )
+        """
+        
+        table_exists = await conn.fetchval(check_table_query, schema, name)
+        if table_exists:
+            _tables_checked.add(key)
+        return table_exists
+
+
+def _default_schedule() -> Dict[str, Any]:
+    """
+    返回默认调度规则
+    
+    Returns:
+        Dict[str, Any]: 默认调度规则
+    """
+    return {
+        "schedule_id": 1,
+        "source_name": "default",
+        "interval_seconds": 86400,  # 1天
+        "is_active": True,
+        "last_run": None,
+        "next_run": None
+    }
+
+
+async def _refresh_schedule_cache() -> List[Dict[str, Any]]:
+    """
+    从内部数据库重新加载日志同步调度规则并更新缓存
     
-    logger.info("从数据库获取调度规则配置")
+    并发调用时只有一个协程查询数据库，其余协程等待后直接使用刷新后的缓存
     
-    try:
+    Returns:
+        List[Dict[str, Any]]: 调度规则列表
+    """
+    requested_at = time.monotonic()
+    async with _refresh_lock:
+        # 等待锁期间缓存已被其他协程刷新
+        if schedule_cache["timestamp"] is not None and schedule_cache["timestamp"] >= requested_at:
+            return list(schedule_cache["data"].values())
+        
+        logger.info("从数据库获取调度规则配置")
+        
         # 获取数据库连接池
         pool = await db_utils.get_db_pool()
         
         async with pool.acquire() as conn:
             # 首先检查表是否存在
-            check_table_query = """
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'lumi_config' 
-                AND table_name = 'source_sync_schedules'
-            )
-            """
-            
-            table_exists = await conn.fetchval(check_table_query)
+            table_exists = await _ensure_table(conn, 'lumi_config', 'source_sync_schedules')
             
             if not table_exists:
                 logger.warning("表 lumi_config.source_sync_schedules 不存在，将使用默认调度规则")
-                # 返回默认调度规则
-                default_schedule = {
-                    "schedule_id": 1,
-                    "source_name": "default",
-                    "interval_seconds": 86400,  # 1天
-                    "is_active": True,
-                    "last_run": None,
-                    "next_run": None
-                }
-                
-                # 更新缓存
-                schedule_cache["data"] = {"default": default_schedule}
-                schedule_cache["timestamp"] = now
-                
-                return [default_schedule]
-            
-            # 查询活跃的调度规则
-            query = """
-            SELECT 
-                s.schedule_id, 
-                d.source_name, 
-                s.sync_interval_seconds as interval_seconds, 
-                s.is_schedule_active as is_active, 
-                s.last_sync_success_at as last_run, 
-                NULL as next_run,
-                s.created_at,
-                s.updated_at
-            FROM lumi_config.source_sync_schedules s
-            JOIN lumi_config.data_sources d ON s.source_id = d.source_id
-            WHERE s.is_schedule_active = TRUE
-            ORDER BY d.source_name
-            """
-            
-            rows = await conn.fetch(query)
-            
-            if not rows:
-                logger.warning("未找到活跃的调度规则，将使用默认调度规则")
-                # 返回默认调度规则
-                default_schedule = {
-                    "schedule_id": 1,
-                    "source_name": "default",
-                    "interval_seconds": 86400,  # 1天
-                    "is_active": True,
-                    "last_run": None,
-                    "next_run": None
-                }
+                schedules = {"default": _default_schedule()}
+            else:
+                # 查询活跃的调度规则
+                query = """
+                SELECT 
+                    s.schedule_id, 
+                    d.source_name, 
+                    s.sync_interval_seconds as interval_seconds, 
+                    s.is_schedule_active as is_active, 
+                    s.last_sync_success_at as last_run, 
+                    NULL as next_run,
+                    s.created_at,
+                    s.updated_at
+                FROM lumi_config.source_sync_schedules s
+                JOIN lumi_config.data_sources d ON s.source_id = d.source_id
+                WHERE s.is_schedule_active = TRUE
+                ORDER BY d.source_name
+                """
                 
-                # 更新缓存
-                schedule_cache["data"] = {"default": default_schedule}
-                schedule_cache["timestamp"] = now
+                rows = await conn.fetch(query)
                 
-                return [default_schedule]
-            
-            # 处理查询结果
-            schedules = {}
-            for row in rows:
-                schedule = dict(row)
-                source_name = schedule["source_name"]
-                schedules[source_name] = schedule
-            
-            # 更新缓存
-            schedule_cache["data"] = schedules
-            schedule_cache["timestamp"] = now
-            
-            logger.info(f"成功加载 {len(schedules)} 个调度规则")
-            return list(schedules.values())
-    
-    except Exception as e:
-        logger.error(f"获取调度规则时出错: {str(e)}")
+                if not rows:
+                    logger.warning("未找到活跃的调度规则，将使用默认调度规则")
+                    schedules = {"default": _default_schedule()}
+                else:
+                    # 直接缓存 Record 对象，按列名读取即可，无需逐行转换为 dict
+                    schedules = {row["source_name"]: row for row in rows}
+                    logger.info(f"成功加载 {len(schedules)} 个调度规则")
         
-        # 如果出错，返回默认调度规则
-        default_schedule = {
-            "schedule_id": 1,
-            "source_name": "default",
-            "interval_seconds": 86400,  # 1天
-            "is_active": True,
-            "last_run": None,
-            "next_run": None
-        }
+        # 更新缓存
+        schedule_cache["data"] = schedules
+        schedule_cache["timestamp"] = time.monotonic()
         
-        return [default_schedule]
+        return list(schedules.values())
 
 
-async def update_schedule_status(source_name: str, status: str, processed_count: int = 0) -> None:
+async def _refresh_schedule_cache_in_background() -> None:
     """
-    更新调度规则状态
-    
-    Args:
-        source_name: 数据源名称
-        status: 状态（success, error）
-        processed_count: 处理的记录数
+    在后台刷新调度规则缓存，出错时保留旧的缓存数据
     """
     try:
-        # 获取数据库连接池
-        pool = await db_utils.get_db_pool()
-        
-        async with pool.acquire() as conn:
-            # 首先检查表是否存在
-            check_table_query = """
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'lumi_config' 
-                AND table_name = 'source_sync_schedules'
-            )
-            """
-            
-            table_exists = await conn.fetchval(check_table_query)
-            
-            if not table_exists:
-                logger.warning("表 lumi_config.source_sync_schedules 不存在，无法更新调度状态")
-                return
-            
-            # 更新调度状态
-            now = datetime.now()
-            next_run = None
-            
-            # 获取当前调度规则
-            get_schedule_query = """
-            SELECT interval_seconds FROM lumi_config.source_sync_schedules
-            WHERE source_name = $1 AND is_active = TRUE
-            """
-            
-            interval_seconds = await conn.fetchval(get_schedule_query, source_name)
-            
-            if interval_seconds:
-                next_run = now + timedelta(seconds=interval_seconds)
-            
-            # 更新调度规则
-            update_query = """
-            UPDATE lumi_config.source_sync_schedules
-            SET 
-                last_run = $1, 
-                next_run = $2, 
-                last_status = $3,
-                last_processed_count = $4,
-                updated_at = $1
-            WHERE source_name = $5 AND is_active = TRUE
-            """
-            
-            await conn.execute(update_query, now, next_run, status, processed_count, source_name)
-            
-            logger.info(f"已更新调度规则状态: {source_name}, 状态: {status}, 下次运行: {next_run}")
-            
-            # 清空缓存，确保下次获取调度规则时会从数据库中重新加载
-            global schedule_cache
-            schedule_cache["timestamp"] = None
+        await _refresh_schedule_cache()
+    except Exception as e:
+        logger.error(f"后台刷新调度规则时出错: {str(e)}")
+
+
+async def get_sync_schedules() -> List[Dict[str, Any]]:
+    """
+    从内部数据库获取日志同步调度规则
+    使用缓存机制减少数据库查询：缓存过期后立即返回旧数据，并在后台刷新
+    
+    Returns:
+        List[Dict[str, Any]]: 调度规则列表
+    """
+    global _refresh_task
     
+    if schedule_cache["timestamp"] is not None and schedule_cache["data"]:
+        if time.monotonic() - schedule_cache["timestamp"] >= SCHEDULE_CACHE_TTL:
+            # 同一时间只有一个后台刷新任务
+            if _refresh_task is None or _refresh_task.done():
+                logger.debug("调度规则缓存已过期，在后台刷新")
+                _refresh_task = asyncio.create_task(_refresh_schedule_cache_in_background())
+        else:
+            logger.debug("使用缓存的调度规则配置")
+        return list(schedule_cache["data"].values())
+    
+    try:
+        return await _refresh_schedule_cache()
     except Exception as e:
-        logger.error(f"更新调度规则状态时出错: {str(e)}")
+        logger.error(f"获取调度规则时出错: {str(e)}")
+        
+        # 如果出错，返回默认调度规则
+        return [_default_schedule()]
 
 
-async def start_log_processor(source_name: str, interval_seconds: int = 86400, run_once: bool = True) -> asyncio.Task:
+async def start_log_processor(source_name: str, interval_seconds: int = 86400, run_once: bool = True,
+                              semaphore: Optional[asyncio.Semaphore] = None) -> asyncio.Task:
     """
     启动日志处理器服务
     
@@ -242,160 +219,164 @@ async def start_log_processor(source_name: str, interval_seconds: int = 86400, r
         source_name: 数据源名称
         interval_seconds: 处理间隔时间（秒）
         run_once: 是否只运行一次
+        semaphore: 可选的信号量，提供时日志处理器需获取信号量后才开始运行，用于限制同时处理的数据源数量
         
     Returns:
         asyncio.Task: 日志处理器任务
     """
     logger.info(f"启动日志处理器服务，数据源: {source_name}，间隔: {interval_seconds}秒，{'单次运行' if run_once else '持续运行'}")
     
+    async def _run_log_processor() -> None:
+        # 获取信号量后再创建协程，任务在等待信号量时被取消不会留下未 await 的协程
+        if semaphore is None:
+            await log_processor_service.process_log_files(
+                source_name=source_name,
+                interval_seconds=interval_seconds,
+                run_once=run_once
+            )
+        else:
+            async with semaphore:
+                await log_processor_service.process_log_files(
+                    source_name=source_name,
+                    interval_seconds=interval_seconds,
+                    run_once=run_once
+                )
+    
     # 创建并启动日志处理器任务
     task = asyncio.create_task(
-        log_processor_service.process_log_files(
-            source_name=source_name,
-            interval_seconds=interval_seconds,
-            run_once=run_once
-        ),
+        _run_log_processor(),
         name=f"log_processor_{source_name}"
     )
     
     return task
 
 
+# 日志处理所需的数据库对象，全部为幂等 DDL，在一次 execute 中发送执行
+LOG_PROCESSOR_DDL = """
+-- 创建 lumi_config schema
+CREATE SCHEMA IF NOT EXISTS lumi_config;
+
+-- 创建 data_sources 表
+CREATE TABLE IF NOT EXISTS lumi_config.data_sources (
+    source_id SERIAL PRIMARY KEY,
+    source_name TEXT NOT NULL UNIQUE,
+    source_type TEXT,
+    log_retrieval_method TEXT NOT NULL,
+    log_path_pattern TEXT,
+    db_host TEXT,
+    db_port INTEGER,
+    db_name TEXT,
+    db_user TEXT,
+    db_password TEXT,
+    ssh_host TEXT,
+    ssh_port INTEGER,
+    ssh_user TEXT,
+    ssh_password TEXT,
+    ssh_key_path TEXT,
+    ssh_remote_log_path_pattern TEXT,
+    kafka_bootstrap_servers TEXT,
+    kafka_topic TEXT,
+    kafka_group_id TEXT,
+    log_query_sql TEXT,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 创建 source_sync_schedules 表
+CREATE TABLE IF NOT EXISTS lumi_config.source_sync_schedules (
+    schedule_id SERIAL PRIMARY KEY,
+    source_name TEXT NOT NULL UNIQUE,
+    interval_seconds INTEGER NOT NULL DEFAULT 86400,
+    is_active BOOLEAN DEFAULT TRUE,
+    last_run TIMESTAMPTZ,
+    next_run TIMESTAMPTZ,
+    last_status TEXT,
+    last_processed_count INTEGER DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_source_name FOREIGN KEY (source_name)
+        REFERENCES lumi_config.data_sources (source_name) ON DELETE CASCADE
+);
+
+-- 创建 lumi_logs schema
+CREATE SCHEMA IF NOT EXISTS lumi_logs;
+
+-- 创建 processed_log_files 表
+CREATE TABLE IF NOT EXISTS lumi_logs.processed_log_files (
+    id SERIAL PRIMARY KEY,
+    source_name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    processed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_source_file UNIQUE (source_name, file_path)
+);
+
+-- 创建 raw_sql_logs 表
+CREATE TABLE IF NOT EXISTS lumi_logs.raw_sql_logs (
+    id SERIAL PRIMARY KEY,
+    log_time TIMESTAMPTZ NOT NULL,
+    username TEXT,
+    database_name_logged TEXT,
+    process_id INTEGER,
+    client_addr TEXT,
+    client_port INTEGER,
+    session_id TEXT,
+    session_line_num INTEGER,
+    command_tag TEXT,
+    session_start_time TIMESTAMPTZ,
+    virtual_transaction_id TEXT,
+    transaction_id BIGINT,
+    error_severity TEXT,
+    sql_state_code TEXT,
+    message TEXT,
+    detail TEXT,
+    hint TEXT,
+    internal_query TEXT,
+    internal_query_pos INTEGER,
+    context TEXT,
+    raw_sql_text TEXT,
+    query_pos INTEGER,
+    location TEXT,
+    application_name TEXT,
+    backend_type TEXT,
+    leader_pid INTEGER,
+    query_id BIGINT,
+    duration_ms INTEGER,
+    log_source_identifier TEXT,
+    source_name TEXT NOT NULL,
+    parsed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 创建索引
+CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_log_time ON lumi_logs.raw_sql_logs (log_time);
+CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_username ON lumi_logs.raw_sql_logs (username);
+CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_database ON lumi_logs.raw_sql_logs (database_name_logged);
+CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_application ON lumi_logs.raw_sql_logs (application_name);
+CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_source ON lumi_logs.raw_sql_logs (source_name);
+"""
+
+
 async def create_necessary_tables() -> None:
     """
     创建必要的数据库表
+    
+    所有 DDL 合并为一个脚本，通过一次往返执行
     """
     try:
         # 获取数据库连接池
         pool = await db_utils.get_db_pool()
         
         async with pool.acquire() as conn:
-            # 创建 lumi_config schema
-            create_schema_query = "CREATE SCHEMA IF NOT EXISTS lumi_config"
-            await conn.execute(create_schema_query)
-            logger.info("Schema lumi_config 已创建")
-            
-            # 创建 data_sources 表
-            create_data_sources_table_query = """
-            CREATE TABLE IF NOT EXISTS lumi_config.data_sources (
-                source_id SERIAL PRIMARY KEY,
-                source_name TEXT NOT NULL UNIQUE,
-                source_type TEXT,
-                log_retrieval_method TEXT NOT NULL,
-                log_path_pattern TEXT,
-                db_host TEXT,
-                db_port INTEGER,
-                db_name TEXT,
-                db_user TEXT,
-                db_password TEXT,
-                ssh_host TEXT,
-                ssh_port INTEGER,
-                ssh_user TEXT,
-                ssh_password TEXT,
-                ssh_key_path TEXT,
-                ssh_remote_log_path_pattern TEXT,
-                kafka_bootstrap_servers TEXT,
-                kafka_topic TEXT,
-                kafka_group_id TEXT,
-                log_query_sql TEXT,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-            await conn.execute(create_data_sources_table_query)
-            logger.info("表 lumi_config.data_sources 已创建")
-            
-            # 创建 source_sync_schedules 表
-            create_schedules_table_query = """
-            CREATE TABLE IF NOT EXISTS lumi_config.source_sync_schedules (
-                schedule_id SERIAL PRIMARY KEY,
-                source_name TEXT NOT NULL UNIQUE,
-                interval_seconds INTEGER NOT NULL DEFAULT 86400,
-                is_active BOOLEAN DEFAULT TRUE,
-                last_run TIMESTAMPTZ,
-                next_run TIMESTAMPTZ,
-                last_status TEXT,
-                last_processed_count INTEGER DEFAULT 0,
-                created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-                CONSTRAINT fk_source_name FOREIGN KEY (source_name)
-                    REFERENCES lumi_config.data_sources (source_name) ON DELETE CASCADE
-            )
-            """
-            await conn.execute(create_schedules_table_query)
-            logger.info("表 lumi_config.source_sync_schedules 已创建")
-            
-            # 创建 lumi_logs schema
-            create_logs_schema_query = "CREATE SCHEMA IF NOT EXISTS lumi_logs"
-            await conn.execute(create_logs_schema_query)
-            logger.info("Schema lumi_logs 已创建")
-            
-            # 创建 processed_log_files 表
-            create_processed_files_table_query = """
-            CREATE TABLE IF NOT EXISTS lumi_logs.processed_log_files (
-                id SERIAL PRIMARY KEY,
-                source_name TEXT NOT NULL,
-                file_path TEXT NOT NULL,
-                processed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-                CONSTRAINT uq_source_file UNIQUE (source_name, file_path)
-            )
-            """
-            await conn.execute(create_processed_files_table_query)
-            logger.info("表 lumi_logs.processed_log_files 已创建")
-            
-            # 创建 raw_sql_logs 表
-            create_raw_logs_table_query = """
-            CREATE TABLE IF NOT EXISTS lumi_logs.raw_sql_logs (
-                id SERIAL PRIMARY KEY,
-                log_time TIMESTAMPTZ NOT NULL,
-                username TEXT,
-                database_name_logged TEXT,
-                process_id INTEGER,
-                client_addr TEXT,
-                client_port INTEGER,
-                session_id TEXT,
-                session_line_num INTEGER,
-                command_tag TEXT,
-                session_start_time TIMESTAMPTZ,
-                virtual_transaction_id TEXT,
-                transaction_id BIGINT,
-                error_severity TEXT,
-                sql_state_code TEXT,
-                message TEXT,
-                detail TEXT,
-                hint TEXT,
-                internal_query TEXT,
-                internal_query_pos INTEGER,
-                context TEXT,
-                raw_sql_text TEXT,
-                query_pos INTEGER,
-                location TEXT,
-                application_name TEXT,
-                backend_type TEXT,
-                leader_pid INTEGER,
-                query_id BIGINT,
-                duration_ms INTEGER,
-                log_source_identifier TEXT,
-                source_name TEXT NOT NULL,
-                parsed_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-            await conn.execute(create_raw_logs_table_query)
-            logger.info("表 lumi_logs.raw_sql_logs 已创建")
-            
-            # 创建索引
-            create_indexes_query = """
-            CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_log_time ON lumi_logs.raw_sql_logs (log_time);
-            CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_username ON lumi_logs.raw_sql_logs (username);
-            CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_database ON lumi_logs.raw_sql_logs (database_name_logged);
-            CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_application ON lumi_logs.raw_sql_logs (application_name);
-            CREATE INDEX IF NOT EXISTS idx_raw_sql_logs_source ON lumi_logs.raw_sql_logs (source_name);
-            """
-            await conn.execute(create_indexes_query)
-            logger.info("索引已创建")
-            
-            logger.info("所有必要的数据库表已创建完成")
+            await conn.execute(LOG_PROCESSOR_DDL)
+        
+        logger.info("Schema lumi_config 已创建")
+        logger.info("表 lumi_config.data_sources 已创建")
+        logger.info("表 lumi_config.source_sync_schedules 已创建")
+        logger.info("Schema lumi_logs 已创建")
+        logger.info("表 lumi_logs.processed_log_files 已创建")
+        logger.info("表 lumi_logs.raw_sql_logs 已创建")
+        logger.info("索引已创建")
+        logger.info("所有必要的数据库表已创建完成")
     
     except Exception as e:
         logger.error(f"创建数据库表时出错: {str(e)}")
@@ -417,6 +398,10 @@ async def shutdown(sig: signal.Signals) -> None:
             logger.info(f"取消任务: {task.get_name()}")
             task.cancel()
     
+    # 取消正在进行的调度规则后台刷新
+    if _refresh_task is not None and not _refresh_task.done():
+        _refresh_task.cancel()
+    
     # 等待所有任务完成
     if tasks:
         await asyncio.gather(*tasks, return_exceptions=True)
@@ -463,11 +448,23 @@ async def main() -> None:
         action="store_true", 
         help="创建必要的数据库表"
     )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=10,
+        help="单次运行模式下同时处理的最大数据源数量，同时决定数据库连接池的大小，默认为 10"
+    )
     
     args = parser.parse_args()
     
-    # 初始化数据库连接池
-    await db_utils.init_db_pool()
+    # 初始化数据库连接池：调度器本身只偶尔刷新调度规则和写入状态，保留 2 个常驻连接即可。
+    # 每个同时处理的数据源最多占用 1 个记录已处理文件的连接和 INSERT_CONCURRENCY 个 COPY 写入连接，
+    # 另留 SCHEDULER_POOL_OVERHEAD 个连接给调度规则刷新和同步状态写入
+    await db_utils.init_db_pool(
+        min_size=2,
+        max_size=args.max_concurrency * (1 + log_processor_service.INSERT_CONCURRENCY) + SCHEDULER_POOL_OVERHEAD,
+        max_inactive_connection_lifetime=600.0
+    )
     logger.info("数据库连接池已初始化")
     
     # 设置信号处理
@@ -508,25 +505,31 @@ async def main() -> None:
             )
             tasks.append(log_processor_task)
         else:
-            # 根据调度规则启动日志处理器
+            # 筛选需要运行的调度规则
+            # 与调度规则表中的 TIMESTAMPTZ 一致，使用带 UTC 时区的当前时间比较
+            now = datetime.now(timezone.utc)
+            due_schedules = []
             for schedule in schedules:
-                source_name = schedule["source_name"]
-                interval_seconds = schedule.get("interval_seconds", args.interval)
-                
-                # 检查是否需要运行
                 next_run = schedule.get("next_run")
-                if next_run is None or next_run <= datetime.now():
-                    logger.info(f"根据调度规则启动日志处理器: {source_name}")
-                    
-                    # 启动日志处理器
-                    log_processor_task = await start_log_processor(
-                        source_name=source_name,
-                        interval_seconds=interval_seconds,
-                        run_once=args.run_once
-                    )
-                    tasks.append(log_processor_task)
+                if next_run is None or next_run <= now:
+                    logger.info(f"根据调度规则启动日志处理器: {schedule['source_name']}")
+                    due_schedules.append(schedule)
                 else:
-                    logger.info(f"跳过数据源 {source_name}，下次运行时间: {next_run}")
+                    logger.info(f"跳过数据源 {schedule['source_name']}，下次运行时间: {next_run}")
+            
+            # 并发启动各数据源的日志处理器。单次运行模式下用信号量限制同时处理的数据源数量；
+            # 持续运行模式下每个日志处理器都不会结束，限制数量会使其余数据源永远得不到处理
+            semaphore = asyncio.Semaphore(args.max_concurrency) if args.run_once else None
+            log_processor_tasks = await asyncio.gather(*(
+                start_log_processor(
+                    source_name=schedule["source_name"],
+                    interval_seconds=schedule.get("interval_seconds", args.interval),
+                    run_once=args.run_once,
+                    semaphore=semaphore
+                )
+                for schedule in due_schedules
+            ))
+            tasks.extend(log_processor_tasks)
     
     # 等待所有任务完成
     try:
@@ -31,6 +31,7 @@ CREATE TABLE IF NOT EXISTS lumi_metadata_store.objects_metadata (
     last_ddl_time TIMESTAMPTZ, -- 最后 DDL 时间 (可能较难获取，某些数据库支持，PG 中可从事件触发器或审计日志间接获取)
     last_analyzed TIMESTAMPTZ, -- PG 中的 pg_stat_all_tables.last_analyze / last_autoanalyze
     properties JSONB, -- 存储其他特定于对象类型的属性
+    content_hash BYTEA, -- 元数据内容指纹，内容未变化时跳过 UPSERT 更新
     normalized_sql_hash TEXT, -- SQL规范化后的哈希值，引用lumi_analytics.sql_patterns表的sql_hash列
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
     updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL, -- 应用层更新
@@ -44,6 +45,9 @@ CREATE INDEX IF NOT EXISTS idx_objects_metadata_schema_name ON lumi_metadata_sto
 CREATE INDEX IF NOT EXISTS idx_objects_metadata_object_type ON lumi_metadata_store.objects_metadata(object_type);
 CREATE INDEX IF NOT EXISTS idx_objects_metadata_object_name_pattern ON lumi_metadata_store.objects_metadata USING gin(object_name gin_trgm_ops);
 
+-- 兼容已有库：补充内容指纹列
+ALTER TABLE lumi_metadata_store.objects_metadata ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+
 -- 表注释
 COMMENT ON TABLE lumi_metadata_store.objects_metadata IS '存储被监控数据源中的数据库对象元数据，如表、视图、物化视图等。';
 
@@ -61,6 +65,7 @@ COMMENT ON COLUMN lumi_metadata_store.objects_metadata.row_count IS '表的估
 COMMENT ON COLUMN lumi_metadata_store.objects_metadata.last_ddl_time IS '最后一次DDL操作的时间';
 COMMENT ON COLUMN lumi_metadata_store.objects_metadata.last_analyzed IS '最后一次分析统计信息的时间';
 COMMENT ON COLUMN lumi_metadata_store.objects_metadata.properties IS '其他对象属性，以JSONB格式存储';
+COMMENT ON COLUMN lumi_metadata_store.objects_metadata.content_hash IS '元数据内容指纹（BLAKE2b），内容未变化时跳过UPSERT更新';
 COMMENT ON COLUMN lumi_metadata_store.objects_metadata.created_at IS '记录创建时间';
 COMMENT ON COLUMN lumi_metadata_store.objects_metadata.updated_at IS '记录更新时间';
 
@@ -86,6 +91,7 @@ CREATE TABLE IF NOT EXISTS lumi_metadata_store.columns_metadata (
     foreign_key_to_column_name TEXT,  -- 被引用的外键列名
     description TEXT, -- 列描述 (从 COMMENT ON ... 获取)
     properties JSONB, -- 其他列属性
+    content_hash BYTEA, -- 元数据内容指纹，内容未变化时跳过 UPSERT 更新
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
     updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL, -- 应用层更新
 
@@ -101,6 +107,9 @@ CREATE INDEX IF NOT EXISTS idx_columns_metadata_is_unique ON lumi_metadata_store
 CREATE INDEX IF NOT EXISTS idx_columns_metadata_foreign_key ON lumi_metadata_store.columns_metadata(foreign_key_to_table_schema, foreign_key_to_table_name) 
     WHERE foreign_key_to_table_schema IS NOT NULL AND foreign_key_to_table_name IS NOT NULL;
 
+-- 兼容已有库：补充内容指纹列
+ALTER TABLE lumi_metadata_store.columns_metadata ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+
 -- 表注释
 COMMENT ON TABLE lumi_metadata_store.columns_metadata IS '存储表和视图的列元数据信息，用于数据血缘分析。';
 
@@ -122,6 +131,7 @@ COMMENT ON COLUMN lumi_metadata_store.columns_metadata.foreign_key_to_table_name
 COMMENT ON COLUMN lumi_metadata_store.columns_metadata.foreign_key_to_column_name IS '外键引用的列名';
 COMMENT ON COLUMN lumi_metadata_store.columns_metadata.description IS '列的描述，从数据库COMMENT中提取';
 COMMENT ON COLUMN lumi_metadata_store.columns_metadata.properties IS '其他列属性，以JSONB格式存储';
+COMMENT ON COLUMN lumi_metadata_store.columns_metadata.content_hash IS '元数据内容指纹（BLAKE2b），内容未变化时跳过UPSERT更新';
 COMMENT ON COLUMN lumi_metadata_store.columns_metadata.created_at IS '记录创建时间';
 COMMENT ON COLUMN lumi_metadata_store.columns_metadata.updated_at IS '记录更新时间';
 
@@ -143,6 +153,7 @@ CREATE TABLE IF NOT EXISTS lumi_metadata_store.functions_metadata (
     owner TEXT, -- 函数所有者
     description TEXT, -- 函数描述 (从 COMMENT ON ... 获取)
     properties JSONB, -- 其他函数属性
+    content_hash BYTEA, -- 元数据内容指纹，内容未变化时跳过 UPSERT 更新
     normalized_sql_hash TEXT, -- SQL规范化后的哈希值，引用lumi_analytics.sql_patterns表的sql_hash列
     parameter_types TEXT[], -- 函数参数类型列表
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP NOT NULL,
@@ -158,6 +169,9 @@ CREATE INDEX IF NOT EXISTS idx_functions_metadata_function_type ON lumi_metadata
 CREATE INDEX IF NOT EXISTS idx_functions_metadata_function_name_pattern ON lumi_metadata_store.functions_metadata USING gin(function_name gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_functions_metadata_language ON lumi_metadata_store.functions_metadata(language);
 
+-- 兼容已有库：补充内容指纹列
+ALTER TABLE lumi_metadata_store.functions_metadata ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+
 -- 表注释
 COMMENT ON TABLE lumi_metadata_store.functions_metadata IS '存储用户自定义函数和存储过程的元数据信息，用于数据血缘分析。';
 
@@ -175,6 +189,7 @@ COMMENT ON COLUMN lumi_metadata_store.functions_metadata.language IS '函数实
 COMMENT ON COLUMN lumi_metadata_store.functions_metadata.owner IS '函数的所有者（数据库用户）';
 COMMENT ON COLUMN lumi_metadata_store.functions_metadata.description IS '函数的描述，从数据库COMMENT中提取';
 COMMENT ON COLUMN lumi_metadata_store.functions_metadata.properties IS '其他函数属性，以JSONB格式存储';
+COMMENT ON COLUMN lumi_metadata_store.functions_metadata.content_hash IS '元数据内容指纹（BLAKE2b），内容未变化时跳过UPSERT更新';
 COMMENT ON COLUMN lumi_metadata_store.functions_metadata.created_at IS '记录创建时间';
 COMMENT ON COLUMN lumi_metadata_store.functions_metadata.updated_at IS '记录更新时间';
 
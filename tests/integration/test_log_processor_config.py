@@ -213,24 +213,24 @@ class TestLogProcessorConfig(unittest.TestCase):
         
         self.assertIsNotNone(tpcds_source, "应存在名为 'tpcds' 的数据源")
         
-        # 更新同步状态
-        schedule_id = tpcds_source['schedule_id']
-        await service.update_sync_status(schedule_id, 'SUCCESS', '测试更新同步状态')
+        # 更新同步状态：(数据源ID, 处理的记录数, 插入的记录数)
+        source_id = tpcds_source['source_id']
+        await service.update_sync_status_batch([(source_id, 10, 8)])
         
         # 验证同步状态已更新
         pool = await db_utils.get_db_pool()
         async with pool.acquire() as conn:
             status = await conn.fetchval(
-                "SELECT last_sync_status FROM lumi_config.source_sync_schedules WHERE schedule_id = $1",
-                schedule_id
+                "SELECT last_sync_status FROM lumi_config.source_sync_schedules WHERE source_id = $1",
+                source_id
             )
             message = await conn.fetchval(
-                "SELECT last_sync_message FROM lumi_config.source_sync_schedules WHERE schedule_id = $1",
-                schedule_id
+                "SELECT last_sync_message FROM lumi_config.source_sync_schedules WHERE source_id = $1",
+                source_id
             )
         
         self.assertEqual(status, 'SUCCESS', "同步状态应为 'SUCCESS'")
-        self.assertEqual(message, '测试更新同步状态', "同步消息应为 '测试更新同步状态'")
+        self.assertEqual(message, '处理了 10 条记录，成功插入 8 条', "同步消息应包含处理和插入的记录数")
 
 
 def run_tests():
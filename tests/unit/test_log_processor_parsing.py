@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+日志处理器解析单元测试
+
+测试 CSV 日志文件的解析，不需要数据库连接。
+
+作者: Vance Chen
+"""
+
+import csv
+import io
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from pglumilineage.log_processor import service
+
+
+def _log_line(log_time: str, user: str, database: str, connection_from: str, session_id: str,
+              message: str, application_name: str = "psql", query_id: str = "",
+              error_severity: str = "LOG", query: str = "") -> str:
+    """
+    生成一行 PostgreSQL CSV 日志（26 列）
+    """
+    fields = dict.fromkeys(service.CSV_LOG_FIELDNAMES, "")
+    fields.update(
+        log_time=log_time, user_name=user, database_name=database, process_id="123",
+        connection_from=connection_from, session_id=session_id, session_line_num="1",
+        command_tag="SELECT", session_start_time="2024-01-01 09:00:00 UTC",
+        virtual_transaction_id="3/1", transaction_id="0", error_severity=error_severity,
+        sql_state_code="00000", message=message, query=query,
+        application_name=application_name, backend_type="client backend", query_id=query_id
+    )
+    output = io.StringIO()
+    csv.writer(output, lineterminator="\n").writerow(fields[name] for name in service.CSV_LOG_FIELDNAMES)
+    return output.getvalue()
+
+
+class LogFileTestCase(unittest.TestCase):
+    """在临时目录中写入日志文件的测试基类"""
+    
+    def setUp(self):
+        """创建临时目录"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+    
+    def write_log_file(self, *lines: str) -> str:
+        """写入日志文件并返回文件路径"""
+        log_file_path = os.path.join(self.temp_dir.name, "postgresql-test.csv")
+        with open(log_file_path, "w", encoding="utf-8", newline="") as f:
+            f.writelines(lines)
+        return log_file_path
+    
+    def parse_with_csv(self, log_file_path: str, target_db_name=None, prefilter=False):
+        """使用标准库 csv 模块解析"""
+        with mock.patch.object(service, "pa_csv", None):
+            return service._parse_log_file_sync("source", log_file_path, target_db_name, prefilter)
+    
+    def parse_with_arrow(self, log_file_path: str, target_db_name=None):
+        """使用 pyarrow 解析"""
+        if service.pa_csv is None:
+            self.skipTest("未安装 pyarrow")
+        return service._parse_log_file_sync("source", log_file_path, target_db_name)
+
+
+class TestLeadingComments(LogFileTestCase):
+    """测试SQL开头注释的处理：去掉开头的 -- 注释后保存语句，纯注释语句跳过"""
+    
+    def setUp(self):
+        super().setUp()
+        self.log_file_path = self.write_log_file(
+            _log_line("2024-01-01 10:00:00.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "statement: -- 报表查询\n-- 第二行注释\nSELECT * FROM orders"),
+            _log_line("2024-01-01 10:00:01.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "statement: -- 只有注释"),
+            _log_line("2024-01-01 10:00:02.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "statement: SELECT 1 -- 行尾注释保留"),
+        )
+    
+    def _assert_comments_handled(self, records):
+        self.assertEqual(
+            [record.raw_sql_text for record in records],
+            ["SELECT * FROM orders", "SELECT 1 -- 行尾注释保留"]
+        )
+    
+    def test_csv(self):
+        """csv 模块路径：注释开头的语句去掉注释后保存，纯注释语句跳过"""
+        self._assert_comments_handled(self.parse_with_csv(self.log_file_path))
+    
+    def test_arrow(self):
+        """pyarrow 路径：注释开头的语句去掉注释后保存，纯注释语句跳过"""
+        self._assert_comments_handled(self.parse_with_arrow(self.log_file_path))
+    
+    def test_leading_comment_regex(self):
+        """正则只去掉开头的注释和空白"""
+        self.assertEqual(service._LEADING_COMMENT_RE.sub('', "-- a\n  -- b\nSELECT 1", count=1), "SELECT 1")
+        self.assertEqual(service._LEADING_COMMENT_RE.sub('', "-- a", count=1), "")
+        self.assertIsNone(service._LEADING_COMMENT_RE.match("SELECT 1 -- a"))
+
+
+class TestParsers(LogFileTestCase):
+    """测试 pyarrow 与 csv 模块两条解析路径的结果一致"""
+    
+    def setUp(self):
+        super().setUp()
+        self.log_file_path = self.write_log_file(
+            _log_line("2024-01-01 10:00:00.123 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "statement: SELECT 1", query_id="42"),
+            # 连接日志不包含SQL，应被跳过
+            _log_line("2024-01-01 10:00:01.000 UTC", "bob", "db1", "10.0.0.2:5432", "s2",
+                      "connection authorized: user=bob database=db1"),
+            # 带引号、逗号和换行的多行语句
+            _log_line("2024-01-01 10:00:02.000 UTC", "bob", "db2", "[local]", "s3",
+                      'statement: INSERT INTO t VALUES (1, \'a,b\')\n  RETURNING "id"'),
+            # 错误日志中SQL位于 query 字段
+            _log_line("2024-01-01 10:00:03.000 UTC", "carol", "db1", "10.0.0.3:40000", "s4",
+                      'relation "missing" does not exist', error_severity="ERROR",
+                      query="SELECT * FROM missing"),
+        )
+    
+    def test_csv_and_arrow_records_match(self):
+        """两条解析路径产出相同的日志记录"""
+        csv_records = self.parse_with_csv(self.log_file_path)
+        arrow_records = self.parse_with_arrow(self.log_file_path)
+        
+        # 未指定日志时间时的回退时间每次解析不同，这里所有行都有日志时间
+        self.assertEqual(csv_records, arrow_records)
+        self.assertEqual(
+            [record.raw_sql_text for record in csv_records],
+            ["SELECT 1", 'INSERT INTO t VALUES (1, \'a,b\')\n  RETURNING "id"', "SELECT * FROM missing"]
+        )
+    
+    def test_target_db_filter(self):
+        """指定目标数据库时只保留该数据库的日志"""
+        for records in (self.parse_with_csv(self.log_file_path, "db2"),
+                        self.parse_with_arrow(self.log_file_path, "db2")):
+            self.assertEqual([record.database_name_logged for record in records], ["db2"])
+    
+    def test_record_fields(self):
+        """日志记录的各字段"""
+        record = self.parse_with_csv(self.log_file_path)[0]
+        
+        self.assertIsInstance(record, service.LogRecord)
+        self.assertEqual(record._fields, service._LOG_COLS)
+        self.assertEqual(record.log_time, datetime(2024, 1, 1, 10, 0, 0, 123000, tzinfo=timezone.utc))
+        self.assertEqual(record.source_database_name, "source")
+        self.assertEqual(record.username, "alice")
+        self.assertEqual(record.database_name_logged, "db1")
+        self.assertEqual(record.client_addr, "10.0.0.1")
+        self.assertEqual(record.application_name, "psql")
+        self.assertEqual(record.session_id, "s1")
+        self.assertEqual(record.query_id, 42)
+        self.assertEqual(record.duration_ms, 0)
+        self.assertEqual(record.log_source_identifier, "postgresql-test.csv")
+    
+    def test_file_without_sql_is_skipped(self):
+        """开启预筛选时，不包含SQL行标记的文件不进行解析"""
+        log_file_path = self.write_log_file(
+            _log_line("2024-01-01 10:00:01.000 UTC", "bob", "db1", "10.0.0.2:5432", "s2",
+                      "connection authorized: user=bob database=db1"),
+        )
+        self.assertEqual(service._scan_log_file(log_file_path, prefilter=True), (False, False))
+        self.assertEqual(service._scan_log_file(log_file_path), (True, False))
+        self.assertEqual(self.parse_with_csv(log_file_path), [])
+    
+    def test_header_row(self):
+        """带标题行的日志文件跳过标题行"""
+        header = ",".join(service.CSV_LOG_FIELDNAMES) + "\n"
+        log_file_path = self.write_log_file(
+            header,
+            _log_line("2024-01-01 10:00:00.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "statement: SELECT 1"),
+        )
+        self.assertEqual(service._scan_log_file(log_file_path), (True, True))
+        for records in (self.parse_with_csv(log_file_path), self.parse_with_arrow(log_file_path)):
+            self.assertEqual([record.raw_sql_text for record in records], ["SELECT 1"])
+
+
+class TestSqlPrefilter(LogFileTestCase):
+    """测试基于 SQL_ROW_MARKERS 的预筛选：默认关闭，开启后与逐行解析接受的行保持一致"""
+    
+    def test_markers(self):
+        """statement/execute/duration 日志和错误级别的记录可能包含SQL"""
+        for message in ("statement: SELECT 1", "execute S_1: SELECT 1",
+                        "duration: 0.5 ms  execute S_1: SELECT 1", "duration: 0.5 ms"):
+            record = _log_line("2024-01-01 10:00:00.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1", message)
+            self.assertTrue(service._may_contain_sql(record), message)
+            self.assertTrue(service._may_contain_sql(record.encode()), message)
+        
+        record = _log_line("2024-01-01 10:00:00.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                           'relation "missing" does not exist', error_severity="ERROR", query="SELECT 1")
+        self.assertTrue(service._may_contain_sql(record))
+        
+        record = _log_line("2024-01-01 10:00:00.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                           "connection authorized: user=alice database=db1")
+        self.assertFalse(service._may_contain_sql(record))
+    
+    def test_execute_and_duration_files_are_scanned(self):
+        """只有 execute/duration 日志的文件开启预筛选后也不会被跳过"""
+        log_file_path = self.write_log_file(
+            _log_line("2024-01-01 10:00:00.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "duration: 0.5 ms  execute S_1: SELECT 1"),
+        )
+        self.assertEqual(service._scan_log_file(log_file_path, prefilter=True), (True, False))
+    
+    def test_query_rows_kept_by_default(self):
+        """默认不预筛选：其他级别（log_min_error_statement 调低时）和本地化日志中 query 字段的SQL都会保留"""
+        log_file_path = self.write_log_file(
+            _log_line("2024-01-01 10:00:00.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "some notice", error_severity="NOTICE", query="SELECT notice_query()"),
+            _log_line("2024-01-01 10:00:01.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      '关系 "missing" 不存在', error_severity="错误", query="SELECT * FROM missing"),
+        )
+        self.assertEqual(service._scan_log_file(log_file_path), (True, False))
+        for records in (self.parse_with_csv(log_file_path), self.parse_with_arrow(log_file_path)):
+            self.assertEqual([record.raw_sql_text for record in records],
+                             ["SELECT notice_query()", "SELECT * FROM missing"])
+        
+        # 开启预筛选后这类文件会被整体跳过，因此预筛选只能按配置开启
+        self.assertEqual(service._scan_log_file(log_file_path, prefilter=True), (False, False))
+    
+    def test_record_prefilter_matches_file_skip(self):
+        """逐条记录的预筛选与整个文件的跳过判断使用同一标记，开启后保留的行与不预筛选时一致"""
+        log_file_path = self.write_log_file(
+            _log_line("2024-01-01 10:00:00.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "connection authorized: user=alice database=db1"),
+            _log_line("2024-01-01 10:00:01.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "statement: SELECT 1"),
+            _log_line("2024-01-01 10:00:02.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      "duration: 0.5 ms  execute S_1: SELECT 2", query="SELECT 2"),
+            _log_line("2024-01-01 10:00:03.000 UTC", "alice", "db1", "10.0.0.1:5432", "s1",
+                      'relation "missing" does not exist', error_severity="ERROR",
+                      query="SELECT * FROM missing"),
+        )
+        expected = ["SELECT 1", "SELECT 2", "SELECT * FROM missing"]
+        self.assertEqual([r.raw_sql_text for r in self.parse_with_csv(log_file_path)], expected)
+        self.assertEqual([r.raw_sql_text for r in self.parse_with_csv(log_file_path, prefilter=True)], expected)
+        
+        with open(log_file_path, encoding="utf-8") as f:
+            candidates = list(service._iter_candidate_records(f))
+        self.assertEqual(len(candidates), 3)
+    
+    def test_prefilter_setting(self):
+        """预筛选由配置 PG_LOG_SQL_PREFILTER 开启，默认关闭"""
+        with mock.patch("pglumilineage.common.config.get_settings_instance", return_value=object()):
+            self.assertFalse(service._sql_prefilter_enabled())
+        settings = mock.Mock(PG_LOG_SQL_PREFILTER=True)
+        with mock.patch("pglumilineage.common.config.get_settings_instance", return_value=settings):
+            self.assertTrue(service._sql_prefilter_enabled())
+
+
+class TestBuildLogRecord(unittest.TestCase):
+    """测试由日志行构建日志记录"""
+    
+    fallback_log_time = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    
+    def _build(self, **row):
+        return service._build_log_record(row, "SELECT 1", "source", "postgresql.csv", self.fallback_log_time)
+    
+    def test_client_addr(self):
+        """客户端地址去掉端口号，无效地址使用本地回环地址"""
+        self.assertEqual(self._build(connection_from="10.1.2.3:5432").client_addr, "10.1.2.3")
+        self.assertEqual(self._build(connection_from='"10.1.2.3:5432"').client_addr, "10.1.2.3")
+        self.assertEqual(self._build(connection_from="[local]").client_addr, "127.0.0.1")
+        self.assertEqual(self._build().client_addr, "127.0.0.1")
+    
+    def test_duration(self):
+        """从 message 中解析持续时间"""
+        self.assertEqual(self._build(message="duration: 1.5 ms  statement: SELECT 1").duration_ms, 1500)
+        self.assertEqual(self._build(message="statement: SELECT 1").duration_ms, 0)
+    
+    def test_query_id(self):
+        """查询ID非数字或为空时记为 None"""
+        self.assertEqual(self._build(query_id="-123").query_id, -123)
+        self.assertIsNone(self._build(query_id="").query_id)
+        self.assertIsNone(self._build(query_id="abc").query_id)
+    
+    def test_fallback_log_time(self):
+        """日志时间缺失或无法解析时使用回退时间"""
+        self.assertEqual(self._build().log_time, self.fallback_log_time)
+        self.assertEqual(self._build(log_time="not a time").log_time, self.fallback_log_time)
+    
+    def test_missing_fields(self):
+        """缺失的文本字段记为空字符串"""
+        record = self._build()
+        self.assertEqual(
+            (record.username, record.database_name_logged, record.application_name, record.session_id),
+            ("", "", "", "")
+        )
+
+
+class TestParseLogTime(unittest.TestCase):
+    """测试日志时间的时区处理"""
+    
+    def _assert_parsed(self, parse):
+        # UTC/GMT 后缀解析为带 UTC 时区的时间
+        self.assertEqual(parse("2024-01-01 12:34:56.789 UTC"),
+                         datetime(2024, 1, 1, 12, 34, 56, 789000, tzinfo=timezone.utc))
+        self.assertEqual(parse("2024-01-01 12:34:56 GMT"),
+                         datetime(2024, 1, 1, 12, 34, 56, tzinfo=timezone.utc))
+        
+        # 其他时区缩写无法可靠映射，保持为不带时区的时间
+        log_time = parse("2024-01-01 12:34:56 CST")
+        self.assertEqual(log_time, datetime(2024, 1, 1, 12, 34, 56))
+        self.assertIsNone(log_time.tzinfo)
+        
+        # 没有时区缩写的 log_timezone 输出数字偏移，解析为对应的固定偏移时区
+        self.assertEqual(parse("2024-01-01 10:00:00 +08"),
+                         datetime(2024, 1, 1, 10, 0, tzinfo=timezone(timedelta(hours=8))))
+        self.assertEqual(parse("2024-01-01 10:00:00.250 -03:30"),
+                         datetime(2024, 1, 1, 10, 0, 0, 250000, tzinfo=timezone(-timedelta(hours=3, minutes=30))))
+        self.assertEqual(parse("2024-01-01 10:00:00 +0545").utcoffset(), timedelta(hours=5, minutes=45))
+        self.assertEqual(parse("2024-01-01 10:00:00 +08"), datetime(2024, 1, 1, 2, 0, tzinfo=timezone.utc))
+        
+        # 没有时区后缀
+        self.assertIsNone(parse("2024-01-01 12:34:56").tzinfo)
+        
+        # 无效格式
+        with self.assertRaises(ValueError):
+            parse("not a time")
+    
+    def test_parse_log_time(self):
+        """使用默认解析实现"""
+        self._assert_parsed(service._parse_log_time)
+    
+    def test_parse_log_time_without_ciso8601(self):
+        """未安装 ciso8601 时使用 datetime.fromisoformat"""
+        with mock.patch.object(service, "ciso8601", None):
+            self._assert_parsed(service._parse_log_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
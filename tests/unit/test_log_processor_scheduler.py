@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+日志处理调度器单元测试
+
+测试调度规则缓存：缓存过期后先返回旧数据并在后台刷新，不需要数据库连接。
+
+作者: Vance Chen
+"""
+
+import asyncio
+import contextlib
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from pglumilineage.scheduler import log_processor_main
+
+
+class FakePool:
+    """返回预设调度规则的连接池，记录查询次数"""
+    
+    def __init__(self, rows, table_exists=True):
+        self.rows = rows
+        self.table_exists = table_exists
+        self.fetch_count = 0
+        self.error = None
+    
+    @contextlib.asynccontextmanager
+    async def _acquire(self):
+        yield self
+    
+    def acquire(self):
+        return self._acquire()
+    
+    async def fetchval(self, query, *args):
+        return self.table_exists
+    
+    async def fetch(self, query, *args):
+        self.fetch_count += 1
+        if self.error is not None:
+            raise self.error
+        # 让出事件循环，模拟查询耗时
+        await asyncio.sleep(0)
+        return list(self.rows)
+
+
+def _schedule(source_name, interval_seconds=3600):
+    return {"schedule_id": 1, "source_name": source_name, "interval_seconds": interval_seconds,
+            "is_active": True, "last_run": None, "next_run": None}
+
+
+class TestScheduleCache(unittest.TestCase):
+    """测试调度规则缓存"""
+    
+    def setUp(self):
+        self.pool = FakePool([_schedule("tpcds")])
+        
+        async def get_db_pool():
+            return self.pool
+        
+        patchers = [
+            mock.patch.object(log_processor_main.db_utils, "get_db_pool", get_db_pool),
+            mock.patch.dict(log_processor_main.schedule_cache, {"data": {}, "timestamp": None}),
+            mock.patch.object(log_processor_main, "_refresh_task", None),
+            mock.patch.object(log_processor_main, "_tables_checked", set()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def run_async(self, coro_func):
+        """在新的事件循环中运行，锁在该事件循环中创建"""
+        async def runner():
+            with mock.patch.object(log_processor_main, "_refresh_lock", asyncio.Lock()), \
+                    mock.patch.object(log_processor_main, "_tables_lock", asyncio.Lock()):
+                return await coro_func()
+        return asyncio.run(runner())
+    
+    def expire_cache(self):
+        log_processor_main.schedule_cache["timestamp"] = time.monotonic() - log_processor_main.SCHEDULE_CACHE_TTL - 1
+    
+    def test_first_call_queries_database(self):
+        """缓存为空时同步查询数据库"""
+        schedules = self.run_async(log_processor_main.get_sync_schedules)
+        self.assertEqual([s["source_name"] for s in schedules], ["tpcds"])
+        self.assertEqual(self.pool.fetch_count, 1)
+    
+    def test_fresh_cache_is_used(self):
+        """缓存未过期时不查询数据库"""
+        async def scenario():
+            await log_processor_main.get_sync_schedules()
+            return await log_processor_main.get_sync_schedules()
+        
+        schedules = self.run_async(scenario)
+        self.assertEqual([s["source_name"] for s in schedules], ["tpcds"])
+        self.assertEqual(self.pool.fetch_count, 1)
+    
+    def test_concurrent_first_calls_query_once(self):
+        """并发的首次调用只查询一次数据库"""
+        async def scenario():
+            return await asyncio.gather(*(log_processor_main.get_sync_schedules() for _ in range(5)))
+        
+        results = self.run_async(scenario)
+        self.assertTrue(all([s["source_name"] for s in schedules] == ["tpcds"] for schedules in results))
+        self.assertEqual(self.pool.fetch_count, 1)
+    
+    def test_stale_cache_returned_while_refreshing(self):
+        """缓存过期后立即返回旧数据，后台刷新完成后返回新数据"""
+        async def scenario():
+            await log_processor_main.get_sync_schedules()
+            self.expire_cache()
+            self.pool.rows = [_schedule("tpcds"), _schedule("tpch")]
+            
+            stale = await log_processor_main.get_sync_schedules()
+            # 同一时间只有一个后台刷新任务
+            refresh_task = log_processor_main._refresh_task
+            self.assertIsNotNone(refresh_task)
+            await log_processor_main.get_sync_schedules()
+            self.assertIs(log_processor_main._refresh_task, refresh_task)
+            
+            await refresh_task
+            fresh = await log_processor_main.get_sync_schedules()
+            return stale, fresh
+        
+        stale, fresh = self.run_async(scenario)
+        self.assertEqual([s["source_name"] for s in stale], ["tpcds"])
+        self.assertEqual([s["source_name"] for s in fresh], ["tpcds", "tpch"])
+        self.assertEqual(self.pool.fetch_count, 2)
+    
+    def test_failed_background_refresh_keeps_stale_data(self):
+        """后台刷新失败时保留旧的缓存数据"""
+        async def scenario():
+            await log_processor_main.get_sync_schedules()
+            self.expire_cache()
+            self.pool.error = RuntimeError("数据库不可用")
+            
+            await log_processor_main.get_sync_schedules()
+            await log_processor_main._refresh_task
+            return await log_processor_main.get_sync_schedules()
+        
+        schedules = self.run_async(scenario)
+        self.assertEqual([s["source_name"] for s in schedules], ["tpcds"])
+    
+    def test_default_schedule(self):
+        """调度规则表不存在或首次查询失败时使用默认调度规则"""
+        self.pool.table_exists = False
+        schedules = self.run_async(log_processor_main.get_sync_schedules)
+        self.assertEqual([s["source_name"] for s in schedules], ["default"])
+        
+        log_processor_main.schedule_cache.update(data={}, timestamp=None)
+        self.pool.table_exists = True
+        self.pool.error = RuntimeError("数据库不可用")
+        schedules = self.run_async(log_processor_main.get_sync_schedules)
+        self.assertEqual([s["source_name"] for s in schedules], ["default"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+元数据收集器单元测试
+
+测试元数据批量保存语句的构建和下次运行时间的计算，不需要数据库连接。
+
+作者: Vance Chen
+"""
+
+import asyncio
+import contextlib
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from pglumilineage.metadata_collector import service
+
+
+class FakeConnection:
+    """记录执行的语句并返回预设结果的数据库连接"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+        self.in_transaction = False
+    
+    @contextlib.asynccontextmanager
+    async def _transaction(self):
+        self.calls.append(("BEGIN",))
+        self.in_transaction = True
+        try:
+            yield
+        finally:
+            self.in_transaction = False
+            self.calls.append(("END",))
+    
+    def transaction(self):
+        return self._transaction()
+    
+    async def execute(self, query, *args):
+        self.calls.append(("execute", query, args, self.in_transaction))
+    
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.calls.append(("copy", table_name, list(records), columns, self.in_transaction))
+    
+    async def fetch(self, query, *args):
+        self.calls.append(("fetch", query, args, self.in_transaction))
+        return self.rows
+
+
+class TestSaveMetadataToStore(unittest.TestCase):
+    """测试经暂存表批量 UPSERT 元数据并按输入顺序返回ID"""
+    
+    def setUp(self):
+        # (object_id, column_name, ordinal_position, data_type, max_length, numeric_precision, numeric_scale,
+        #  is_nullable, default_value, is_primary_key, is_unique, 外键 schema/表/列, description, properties, content_hash)
+        self.params_list = [
+            (10, "id", 1, "integer", None, 32, 0, False, None, True, True, None, None, None, None, "{}", b"h1"),
+            (10, "name", 2, "text", None, None, None, True, None, False, False, None, None, None, "名称", "{}", b"h2"),
+            (11, "id", 1, "bigint", None, 64, 0, False, None, True, True, None, None, None, None, "{}", b"h3"),
+        ]
+        self.conn = FakeConnection([(101,), (102,), (201,)])
+        self.ids = asyncio.run(service.save_metadata_to_store(
+            self.conn, self.params_list,
+            "lumi_metadata_store.columns_metadata", "column_id",
+            service.COLUMN_KEY_COLUMNS, service.COLUMN_VALUE_COLUMNS
+        ))
+    
+    def test_returns_ids_in_input_order(self):
+        """返回的ID与查询结果顺序一致，即按暂存表 ord 排序"""
+        self.assertEqual(self.ids, [101, 102, 201])
+    
+    def test_statements_run_in_one_transaction(self):
+        """建表、COPY 和 UPSERT 在同一个事务中执行"""
+        kinds = [call[0] for call in self.conn.calls]
+        self.assertEqual(kinds, ["BEGIN", "execute", "copy", "fetch", "END"])
+        self.assertTrue(all(call[-1] for call in self.conn.calls[1:-1]))
+    
+    def test_staging_table(self):
+        """暂存表为事务结束即删除的临时表，记录带有输入顺序 ord"""
+        _, create_query, _, _ = self.conn.calls[1]
+        self.assertIn("CREATE TEMP TABLE _stg_columns_metadata (ord bigint, object_id bigint, column_name text", create_query)
+        self.assertIn("ON COMMIT DROP", create_query)
+        
+        _, table_name, records, columns, _ = self.conn.calls[2]
+        column_names = [name for name, _ in service.COLUMN_KEY_COLUMNS + service.COLUMN_VALUE_COLUMNS]
+        self.assertEqual(table_name, "_stg_columns_metadata")
+        self.assertEqual(columns, ["ord"] + column_names)
+        self.assertEqual(records, [(ord_, *params) for ord_, params in enumerate(self.params_list)])
+    
+    def test_upsert_query(self):
+        """UPSERT 语句按唯一键去重、跳过内容未变化的更新，并从已有记录补全ID"""
+        _, upsert_query, args, _ = self.conn.calls[3]
+        
+        self.assertIn("INSERT INTO lumi_metadata_store.columns_metadata AS t", upsert_query)
+        self.assertIn("SELECT DISTINCT ON (object_id, column_name)", upsert_query)
+        self.assertIn("ORDER BY object_id, column_name, ord DESC", upsert_query)
+        self.assertIn("ON CONFLICT (object_id, column_name)", upsert_query)
+        self.assertIn("WHERE t.content_hash IS DISTINCT FROM EXCLUDED.content_hash", upsert_query)
+        self.assertIn("RETURNING column_id, object_id, column_name", upsert_query)
+        self.assertIn("SELECT COALESCE(u.column_id, e.column_id)", upsert_query)
+        self.assertIn("LEFT JOIN upserted u ON u.object_id = s.object_id AND u.column_name = s.column_name", upsert_query)
+        self.assertIn("LEFT JOIN lumi_metadata_store.columns_metadata e ON e.object_id = s.object_id AND e.column_name = s.column_name", upsert_query)
+        self.assertIn("ORDER BY s.ord", upsert_query)
+        
+        # 批次时间戳带时区
+        (now,) = args
+        self.assertIsNotNone(now.tzinfo)
+    
+    def test_empty_params_list(self):
+        """空参数列表不访问数据库"""
+        conn = FakeConnection([])
+        ids = asyncio.run(service.save_metadata_to_store(
+            conn, [], "lumi_metadata_store.columns_metadata", "column_id",
+            service.COLUMN_KEY_COLUMNS, service.COLUMN_VALUE_COLUMNS
+        ))
+        self.assertEqual(ids, [])
+        self.assertEqual(conn.calls, [])
+    
+    def test_content_hash(self):
+        """内容指纹只取决于参数内容"""
+        params = self.params_list[0][:-1]
+        self.assertEqual(service._content_hash(params), service._content_hash(tuple(list(params))))
+        self.assertNotEqual(service._content_hash(params), service._content_hash(self.params_list[1][:-1]))
+
+
+class TestCalculateNextRunTime(unittest.TestCase):
+    """测试下次运行时间的计算"""
+    
+    from_time = datetime(2024, 1, 1, 10, 15, tzinfo=timezone.utc)
+    
+    def setUp(self):
+        patcher = mock.patch.dict(service._cron_iterators, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_interval(self):
+        """间隔调度"""
+        self.assertEqual(service.calculate_next_run_time('interval', 3600, None, self.from_time),
+                         self.from_time + timedelta(hours=1))
+    
+    def test_manual_and_unknown(self):
+        """手动调度返回远期时间，未知类型默认一天"""
+        self.assertEqual(service.calculate_next_run_time('manual', 0, None, self.from_time),
+                         self.from_time + timedelta(days=365))
+        self.assertEqual(service.calculate_next_run_time('unknown', 0, None, self.from_time),
+                         self.from_time + timedelta(days=1))
+    
+    def test_cron(self):
+        """cron 调度返回起始时间之后的下一个匹配时间，保留时区"""
+        if service.croniter is None:
+            self.skipTest("未安装 croniter")
+        next_run = service.calculate_next_run_time('cron', 0, '0 * * * *', self.from_time)
+        self.assertEqual(next_run, datetime(2024, 1, 1, 11, 0, tzinfo=timezone.utc))
+        self.assertEqual(next_run.utcoffset(), timedelta(0))
+    
+    def test_cron_iterator_cached(self):
+        """同一 cron 表达式复用已解析的迭代器，并按每次的起始时间重新定位"""
+        if service.croniter is None:
+            self.skipTest("未安装 croniter")
+        expression = '30 2 * * *'
+        
+        first = service.calculate_next_run_time('cron', 0, expression, self.from_time)
+        cron = service._cron_iterators[expression]
+        self.assertEqual(first, datetime(2024, 1, 2, 2, 30, tzinfo=timezone.utc))
+        
+        # 起始时间提前时不应沿用迭代器上一次的位置
+        earlier = service.calculate_next_run_time('cron', 0, expression, self.from_time - timedelta(days=3))
+        self.assertEqual(earlier, datetime(2023, 12, 30, 2, 30, tzinfo=timezone.utc))
+        
+        # 同一起始时间重复计算结果不变
+        self.assertEqual(service.calculate_next_run_time('cron', 0, expression, self.from_time), first)
+        self.assertIs(service._cron_iterators[expression], cron)
+        self.assertEqual(list(service._cron_iterators), [expression])
+    
+    def test_invalid_cron_expression(self):
+        """无效的 cron 表达式按默认间隔计算，且不缓存迭代器"""
+        if service.croniter is None:
+            self.skipTest("未安装 croniter")
+        for expression in ('not a cron', '61 * * * *', '0 0 31 2 *'):
+            with self.assertLogs(service.logger, level="WARNING"):
+                next_run = service.calculate_next_run_time('cron', 0, expression, self.from_time)
+            self.assertEqual(next_run, self.from_time + timedelta(days=1))
+            self.assertNotIn(expression, service._cron_iterators)
+    
+    def test_cron_without_croniter(self):
+        """未安装 croniter 时 cron 调度退化为每天运行一次"""
+        with mock.patch.object(service, "croniter", None):
+            self.assertEqual(service.calculate_next_run_time('cron', 0, '0 * * * *', self.from_time),
+                             self.from_time + timedelta(days=1))
+
+
+if __name__ == "__main__":
+    unittest.main()